@@ -0,0 +1,170 @@
+"""
+This module generates a deterministic synthetic dataset the size of the real series.
+
+At scale 1.0 the dataset has 110 volumes, 1110 chapters of 20 pages of 6 panels,
+about a million character appearances and as many character events. Characters
+appear with a skewed popularity, as the main cast does in the series.
+Every value is drawn from a random generator seeded with the given seed,
+so two runs with the same scale and seed produce the same rows.
+"""
+
+import random
+from typing import Any, Iterator
+
+VOLUMES = 110
+CHAPTERS = 1110
+ARCS = 33
+CHARACTERS = 1500
+AFFILIATIONS = 100
+LOCATIONS = 200
+PAGES_PER_CHAPTER = 20
+PANELS_PER_PAGE = 6
+MAX_APPEARANCES_PER_PANEL = 16
+EVENT_PROBABILITY = 0.9
+STATUSES = ("Alive", "Dead", "Unknown")
+
+
+def get_counts(scale: float) -> dict[str, int]:
+    """
+    Scales the entity counts of the real series. The page and panel counts per chapter are kept.
+
+    Parameters:
+        scale (float): 1.0 for the full series.
+
+    Returns:
+        dict: The number of volumes, chapters, arcs, characters, affiliations and locations.
+    """
+    return {
+        "volumes": max(1, round(VOLUMES * scale)),
+        "chapters": max(1, round(CHAPTERS * scale)),
+        "arcs": max(1, round(ARCS * scale)),
+        "characters": max(20, round(CHARACTERS * scale)),
+        "affiliations": max(5, round(AFFILIATIONS * scale)),
+        "locations": max(5, round(LOCATIONS * scale)),
+    }
+
+
+class SyntheticDataset:
+    """
+    A deterministic generator of the rows of the benchmark database.
+
+    Attributes:
+        counts (dict): The number of rows of every generated entity.
+        seed (int): The seed of the random generators.
+    """
+
+    def __init__(self, scale: float = 1.0, seed: int = 0) -> None:
+        """
+        Constructs all the necessary attributes for the SyntheticDataset object.
+
+        Parameters:
+            scale (float): 1.0 for the full series.
+            seed (int): The seed of the random generators.
+        """
+        self.counts = get_counts(scale)
+        self.seed = seed
+        # Zipf-like popularity: the n-th character appears about 1/n as often as the first.
+        self._cum_weights: list[float] = []
+        total = 0.0
+        for rank in range(1, self.counts["characters"] + 1):
+            total += 1.0 / rank
+            self._cum_weights.append(total)
+
+    def arc_rows(self) -> list[tuple[int, str]]:
+        """
+        Returns the rows of the Arcs table.
+
+        Returns:
+            list[tuple]: Rows of (ArcID, ArcName).
+        """
+        return [(arc_id, f"Arc {arc_id}") for arc_id in range(1, self.counts["arcs"] + 1)]
+
+    def character_rows(self) -> list[tuple[int, str]]:
+        """
+        Returns the rows of the Characters table.
+
+        Returns:
+            list[tuple]: Rows of (CharacterID, Name).
+        """
+        return [(cid, f"Character {cid}") for cid in range(1, self.counts["characters"] + 1)]
+
+    def affiliation_rows(self) -> list[tuple[int, str]]:
+        """
+        Returns the rows of the Affiliations table.
+
+        Returns:
+            list[tuple]: Rows of (AffiliationID, AffiliationName).
+        """
+        return [
+            (affiliation_id, f"Affiliation {affiliation_id}")
+            for affiliation_id in range(1, self.counts["affiliations"] + 1)
+        ]
+
+    def records(self) -> Iterator[dict[str, Any]]:
+        """
+        Generates the import records of the Volumes -> Chapters -> Pages -> Panels
+        -> CharacterAppearances hierarchy, one per appearance, or one per panel
+        without appearances.
+
+        Yields:
+            dict: A record for the Importer.
+        """
+        rng = random.Random(self.seed)
+        chapters, locations = self.counts["chapters"], self.counts["locations"]
+        character_ids = range(1, self.counts["characters"] + 1)
+        appearance_id = 0
+        for chapter in range(1, chapters + 1):
+            chapter_record = {
+                "VolumeNumber": (chapter - 1) * self.counts["volumes"] // chapters + 1,
+                "ChapterID": chapter,
+                "ArcID": (chapter - 1) * self.counts["arcs"] // chapters + 1,
+                "ChapterNumber": chapter,
+                "ChapterName": f"Chapter {chapter}",
+            }
+            for page in range(1, PAGES_PER_CHAPTER + 1):
+                page_id = (chapter - 1) * PAGES_PER_CHAPTER + page
+                for panel in range(1, PANELS_PER_PAGE + 1):
+                    panel_record = {
+                        **chapter_record,
+                        "PageID": page_id,
+                        "PageNumber": page,
+                        "PanelID": (page_id - 1) * PANELS_PER_PAGE + panel,
+                        "PanelNumber": panel,
+                        "Location": f"Location {rng.randint(1, locations)}",
+                    }
+                    count = rng.randint(0, MAX_APPEARANCES_PER_PANEL)
+                    characters = set(
+                        rng.choices(character_ids, cum_weights=self._cum_weights, k=count)
+                    )
+                    if not characters:
+                        yield panel_record
+                    for character_id in sorted(characters):
+                        appearance_id += 1
+                        yield {
+                            **panel_record,
+                            "AppearanceID": appearance_id,
+                            "CharacterID": character_id,
+                        }
+
+    def events(self) -> Iterator[tuple]:
+        """
+        Generates the rows of the CharacterEvents table, one for most appearances.
+        The appearances are generated again, so the records are not held in memory.
+
+        Yields:
+            tuple: Rows of (EventID, AppearanceID, PanelID, AffiliationID, Bounty, Status).
+        """
+        rng = random.Random(self.seed + 1)
+        event_id = 0
+        for record in self.records():
+            if "AppearanceID" not in record or rng.random() >= EVENT_PROBABILITY:
+                continue
+            event_id += 1
+            yield (
+                event_id,
+                record["AppearanceID"],
+                record["PanelID"],
+                rng.randint(1, self.counts["affiliations"]),
+                rng.randrange(0, 5_000_000_000, 1_000_000),
+                rng.choice(STATUSES),
+            )
@@ -0,0 +1,421 @@
+"""
+This module runs the benchmark suite and writes its results to a JSON file.
+
+It measures, on the synthetic dataset:
+    - the schema bootstrap time, from the SQL files and from a cached template,
+    - the insert throughput of the Importer, of DBQueryHandler.executemany and of Commands,
+    - the cold and warm latency of the canonical analytics queries,
+    - the peak memory of the process.
+
+Usage:
+    python -m benchmarks.run [--scale 1.0] [--seed 0] [--output results.json]
+                             [--baseline previous.json]
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from benchmarks.dataset import SyntheticDataset
+from datapiece.scripts.commands import Commands
+from datapiece.scripts.db_query_handler import DBQueryHandler
+from datapiece.scripts.importer import Importer
+from datapiece.scripts.rollups import APPEARANCES_JOIN
+from datapiece.scripts.timeline import defer_timeline, rebuild_timeline
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "..", "sql")
+
+CANONICAL_QUERIES: dict[str, tuple[str, tuple]] = {
+    "appearances_per_arc": (
+        f"SELECT Chapters.ArcID, CharacterID, COUNT(*) {APPEARANCES_JOIN} "
+        "GROUP BY Chapters.ArcID, CharacterID",
+        (),
+    ),
+    "top_characters_of_volume": (
+        f"SELECT CharacterID, COUNT(*) AS Appearances {APPEARANCES_JOIN} "
+        "WHERE Chapters.VolumeNumber = ? GROUP BY CharacterID ORDER BY Appearances DESC LIMIT 10",
+        (1,),
+    ),
+    "character_chapters_rollup": (
+        "SELECT ChapterID, AppearanceCount FROM CharacterChapterAppearances WHERE CharacterID = ?",
+        (1,),
+    ),
+    "co_appearances": (
+        "SELECT Other.CharacterID, COUNT(*) AS Panels FROM CharacterAppearances AS Main "
+        "JOIN CharacterAppearances AS Other ON Other.PanelID = Main.PanelID "
+        "AND Other.CharacterID != Main.CharacterID "
+        "WHERE Main.CharacterID = ? GROUP BY Other.CharacterID ORDER BY Panels DESC LIMIT 10",
+        (2,),
+    ),
+    "bounty_by_affiliation": (
+        "SELECT AffiliationName, MAX(Bounty) FROM CharacterEvents "
+        "JOIN Affiliations ON Affiliations.AffiliationID = CharacterEvents.AffiliationID "
+        "GROUP BY CharacterEvents.AffiliationID",
+        (),
+    ),
+    "panels_at_location": ("SELECT COUNT(*) FROM Panels WHERE Location = ?", ("Location 1",)),
+}
+
+COMMANDS_VOLUMES = 1000
+
+
+def get_handler_config(db_path: str, **overrides: Any) -> dict[str, Any]:
+    """
+    Returns the handler configuration of the benchmark database.
+
+    Parameters:
+        db_path (str): Path to the database file.
+        overrides (Any): Other configuration values.
+
+    Returns:
+        dict: The handler configuration.
+    """
+    return {
+        "schema": os.path.join(SQL_DIR, "schema.sql"),
+        "indexes": os.path.join(SQL_DIR, "indexes.sql"),
+        "db": db_path,
+        **overrides,
+    }
+
+
+def timed(func: Callable[[], Any]) -> tuple[Any, float]:
+    """
+    Calls a function and measures its duration.
+
+    Parameters:
+        func (Callable): The function.
+
+    Returns:
+        tuple: The result of the function and the elapsed seconds.
+    """
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def get_peak_memory() -> Optional[int]:
+    """
+    Returns the peak resident memory of the process.
+
+    Returns:
+        int: Size in bytes, or None where the resource module is unavailable.
+    """
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def benchmark_bootstrap(work_dir: str) -> dict[str, float]:
+    """
+    Measures the creation of an empty database from the SQL files and from a template.
+
+    Parameters:
+        work_dir (str): Directory of the temporary databases.
+
+    Returns:
+        dict: Seconds to create the schema, to build the template and to clone it.
+    """
+    template_dir = os.path.join(work_dir, "templates")
+    results = {}
+    for name, config in (
+        ("schema_seconds", get_handler_config(os.path.join(work_dir, "schema.db"))),
+        (
+            "template_build_seconds",
+            get_handler_config(os.path.join(work_dir, "build.db"), template_dir=template_dir),
+        ),
+        (
+            "template_clone_seconds",
+            get_handler_config(os.path.join(work_dir, "clone.db"), template_dir=template_dir),
+        ),
+    ):
+        handler, results[name] = timed(functools.partial(DBQueryHandler, config))
+        handler.close()
+    return results
+
+
+def insert_in_chunks(handler: DBQueryHandler, query: str, rows: Iterable[tuple]) -> int:
+    """
+    Inserts rows through the handler's batch, one chunk of batch.max_rows at a time.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+        query (str): The insert statement.
+        rows (Iterable): The rows to insert.
+
+    Returns:
+        int: Number of inserted rows.
+    """
+    total = 0
+    iterator = iter(rows)
+    handler.begin_batch()
+    try:
+        while chunk := list(itertools.islice(iterator, handler.batch.max_rows)):
+            handler.executemany(query, chunk)
+            total += len(chunk)
+    finally:
+        handler.end_batch()
+    return total
+
+
+def benchmark_inserts(handler: DBQueryHandler, dataset: SyntheticDataset) -> dict[str, Any]:
+    """
+    Loads the dataset and measures the insert throughput of every write path.
+    The indexes are dropped and the timeline triggers deferred during the load, and the
+    indexes and the timeline are built afterwards.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of an empty database.
+        dataset (SyntheticDataset): The dataset to load.
+
+    Returns:
+        dict: Row counts, seconds and rows per second of every write path.
+    """
+    results: dict[str, Any] = {}
+    handler.apply_profile("bulk_load")
+    _, results["drop_indexes_seconds"] = timed(handler.drop_indexes)
+    defer_timeline(handler)
+    for table, query, reference_rows in (
+        ("Arcs", "INSERT INTO Arcs (ArcID, ArcName) VALUES (?, ?)", dataset.arc_rows()),
+        (
+            "Characters",
+            "INSERT INTO Characters (CharacterID, Name) VALUES (?, ?)",
+            dataset.character_rows(),
+        ),
+        (
+            "Affiliations",
+            "INSERT INTO Affiliations (AffiliationID, AffiliationName) VALUES (?, ?)",
+            dataset.affiliation_rows(),
+        ),
+    ):
+        handler.executemany(query, reference_rows)
+        results[f"{table.lower()}_rows"] = len(reference_rows)
+
+    rows, seconds = timed(lambda: Importer(handler).import_records(dataset.records()))
+    results["importer"] = get_throughput(rows, seconds)
+    rows, seconds = timed(
+        lambda: insert_in_chunks(
+            handler,
+            "INSERT INTO CharacterEvents (EventID, AppearanceID, PanelID, AffiliationID, "
+            "Bounty, Status) VALUES (?, ?, ?, ?, ?, ?)",
+            dataset.events(),
+        )
+    )
+    results["executemany_events"] = get_throughput(rows, seconds)
+
+    commands = Commands(handler, {})
+    first_volume = dataset.counts["volumes"] + 1
+
+    def run_commands() -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            commands.begin_batch()
+            for number in range(first_volume, first_volume + COMMANDS_VOLUMES):
+                commands.start_volume(number)
+            commands.end_batch()
+        return COMMANDS_VOLUMES
+
+    rows, seconds = timed(run_commands)
+    results["commands_start_volume"] = get_throughput(rows, seconds)
+    _, results["create_indexes_seconds"] = timed(handler.create_indexes)
+    _, results["rebuild_timeline_seconds"] = timed(lambda: rebuild_timeline(handler))
+    handler.apply_profile("interactive")
+    return results
+
+
+def get_throughput(rows: int, seconds: float) -> dict[str, float]:
+    """
+    Returns the throughput of a write path.
+
+    Parameters:
+        rows (int): Number of written rows.
+        seconds (float): Elapsed seconds.
+
+    Returns:
+        dict: The rows, the seconds and the rows per second.
+    """
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else 0.0,
+    }
+
+
+def fetch_rows(handler: DBQueryHandler, query: str, params: tuple) -> list[Any]:
+    """
+    Reads every row of a query.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+        query (str): SQL query.
+        params (tuple): Values bound to the placeholders.
+
+    Returns:
+        list: The rows.
+    """
+    return list(handler.fetch(query, params))
+
+
+def benchmark_queries(db_path: str, repeats: int) -> dict[str, dict[str, float]]:
+    """
+    Measures the latency of the canonical queries. Every query runs first on a freshly
+    opened handler, with a cold SQLite page cache, then repeatedly with a warm one.
+
+    Parameters:
+        db_path (str): Path to the loaded database.
+        repeats (int): Number of warm runs.
+
+    Returns:
+        dict: The row count, cold latency and median and minimum warm latencies
+            of every query, in milliseconds.
+    """
+    results = {}
+    for name, (query, params) in CANONICAL_QUERIES.items():
+        handler = DBQueryHandler(get_handler_config(db_path, profile="interactive"))
+        try:
+            fetch_all = functools.partial(fetch_rows, handler, query, params)
+            rows, cold = timed(fetch_all)
+            warm = [timed(fetch_all)[1] for _ in range(repeats)]
+        finally:
+            handler.close()
+        results[name] = {
+            "rows": len(rows),
+            "cold_ms": cold * 1000,
+            "warm_median_ms": statistics.median(warm) * 1000,
+            "warm_min_ms": min(warm) * 1000,
+        }
+    return results
+
+
+def run(scale: float, seed: int, repeats: int, work_dir: str) -> dict[str, Any]:
+    """
+    Runs the benchmark suite.
+
+    Parameters:
+        scale (float): Size of the dataset, 1.0 for the full series.
+        seed (int): Seed of the dataset.
+        repeats (int): Number of warm runs of every query.
+        work_dir (str): Directory of the temporary databases.
+
+    Returns:
+        dict: The results.
+    """
+    dataset = SyntheticDataset(scale, seed)
+    db_path = os.path.join(work_dir, "benchmark.db")
+    results: dict[str, Any] = {
+        "meta": {
+            "scale": scale,
+            "seed": seed,
+            "repeats": repeats,
+            "counts": dataset.counts,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "bootstrap": benchmark_bootstrap(work_dir),
+    }
+    handler = DBQueryHandler(get_handler_config(db_path))
+    try:
+        results["inserts"] = benchmark_inserts(handler, dataset)
+        results["meta"]["database_bytes"] = handler.maintenance.get_size()
+    finally:
+        handler.close()
+    results["queries"] = benchmark_queries(db_path, repeats)
+    results["memory"] = {"peak_rss_bytes": get_peak_memory()}
+    return results
+
+
+def flatten(results: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    """
+    Flattens the numeric results into dotted metric names.
+
+    Parameters:
+        results (dict): The nested results.
+        prefix (str): Prefix of the metric names.
+
+    Returns:
+        dict: The value of every numeric metric.
+    """
+    metrics: dict[str, float] = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[f"{prefix}{key}"] = value
+    return metrics
+
+
+def compare(baseline: dict[str, Any], results: dict[str, Any]) -> list[str]:
+    """
+    Compares the timings, throughputs and memory of two runs.
+
+    Parameters:
+        baseline (dict): The results of the reference run.
+        results (dict): The results of the current run.
+
+    Returns:
+        list[str]: One line per metric present in both runs, with the relative change.
+    """
+    before = flatten({key: baseline.get(key, {}) for key in ("bootstrap", "inserts", "queries")})
+    after = flatten({key: results.get(key, {}) for key in ("bootstrap", "inserts", "queries")})
+    before["memory.peak_rss_bytes"] = baseline.get("memory", {}).get("peak_rss_bytes") or 0
+    after["memory.peak_rss_bytes"] = results.get("memory", {}).get("peak_rss_bytes") or 0
+    lines = []
+    for name in sorted(before.keys() & after.keys()):
+        if name.endswith("rows") or not before[name]:
+            continue
+        change = (after[name] - before[name]) / before[name] * 100
+        lines.append(f"{name}: {before[name]:.4g} -> {after[name]:.4g} ({change:+.1f}%)")
+    return lines
+
+
+def main(argv: Optional[list[str]] = None) -> dict[str, Any]:
+    """
+    Parses the command line, runs the benchmark suite and writes the results.
+
+    Parameters:
+        argv (list, optional): The command line arguments, sys.argv if omitted.
+
+    Returns:
+        dict: The results.
+    """
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--scale", type=float, default=1.0, help="1.0 for the full series.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the dataset.")
+    parser.add_argument("--repeats", type=int, default=5, help="Warm runs of every query.")
+    parser.add_argument(
+        "--output", type=str, default="benchmark_results.json", help="The results file."
+    )
+    parser.add_argument(
+        "--baseline", type=str, default=None, help="Results of a previous run to compare with."
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run(args.scale, args.seed, args.repeats, work_dir)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"Results written to {args.output}.")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for line in compare(baseline, results):
+            print(line)
+    return results
+
+
+if __name__ == "__main__":
+    main()
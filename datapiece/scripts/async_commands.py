@@ -0,0 +1,67 @@
+"""
+This module defines the AsyncCommands class, an asyncio front-end for Commands.
+"""
+
+from typing import Any, Awaitable, Callable
+
+from datapiece.scripts.async_handler import AsyncDBQueryHandler
+from datapiece.scripts.commands import COMMAND_ALIASES, Commands
+
+
+class AsyncCommands:
+    """
+    Awaitable versions of the Commands methods.
+
+    Every command available in the console is available as a coroutine function
+    with the same name and arguments, running on the handler's executor thread,
+    e.g. `await async_commands.start_volume(1)`.
+
+    Attributes:
+        commands (Commands): The commands to run.
+        async_handler (AsyncDBQueryHandler): The async handler whose executor runs them.
+    """
+
+    def __init__(self, commands: Commands, async_handler: AsyncDBQueryHandler) -> None:
+        """
+        Constructs all the necessary attributes for the AsyncCommands object.
+
+        Parameters:
+            commands (Commands): The commands to run.
+            async_handler (AsyncDBQueryHandler): The async handler whose executor runs them.
+        """
+        self.commands = commands
+        self.async_handler = async_handler
+        self._names = set(commands.get_command_names())
+
+    def get_command_names(self) -> list[str]:
+        """
+        Get the list of the commands available as coroutine functions.
+
+        Returns:
+            list[str]: A list of commands
+        """
+        return sorted(name for name in self._names if not name.startswith("_"))
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        """
+        Returns the awaitable version of a command.
+
+        Parameters:
+            name (str): Name of the command.
+
+        Returns:
+            Callable: A coroutine function running the command.
+
+        Raises:
+            AttributeError: If there is no such command.
+        """
+        if name.startswith("_") or name not in self._names:
+            raise AttributeError(name)
+        method = getattr(self.commands, COMMAND_ALIASES.get(name, name))
+
+        async def run_command(*args: Any) -> Any:
+            return await self.async_handler.run(method, *args)
+
+        run_command.__name__ = name
+        run_command.__doc__ = method.__doc__
+        return run_command
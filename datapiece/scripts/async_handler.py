@@ -0,0 +1,168 @@
+"""
+This module defines the AsyncDBQueryHandler class, an asyncio front-end for DBQueryHandler.
+
+Every database call runs on a dedicated executor thread, so coroutines awaiting
+queries never block the event loop, and concurrent coroutines are queued
+on the executor instead of competing for the connection.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import (Any, AsyncIterator, Callable, Iterable, Optional, Sequence,
+                    TypeVar)
+
+from datapiece.scripts.db_query_handler import DBQueryHandler
+
+T = TypeVar("T")
+
+
+class AsyncDBQueryHandler:
+    """
+    An asyncio front-end for a DBQueryHandler.
+
+    Attributes:
+        handler (DBQueryHandler): The handler running the queries.
+        executor (ThreadPoolExecutor): The single thread running the SQLite work.
+    """
+
+    def __init__(self, handler: DBQueryHandler) -> None:
+        """
+        Constructs all the necessary attributes for the AsyncDBQueryHandler object.
+
+        Parameters:
+            handler (DBQueryHandler): The handler running the queries.
+        """
+        self.handler = handler
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+    async def __aenter__(self) -> "AsyncDBQueryHandler":
+        """
+        Enters the async context.
+        """
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """
+        Closes the handler when leaving the async context.
+        """
+        await self.close()
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Runs a blocking function on the executor thread.
+
+        Parameters:
+            func (Callable): The function to run.
+            args (Any): Positional arguments of the function.
+            kwargs (Any): Keyword arguments of the function.
+
+        Returns:
+            Any: The result of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def execute(
+        self, query: str, params: Sequence[Any] = (), commit: bool = True
+    ) -> None:
+        """
+        Executes the given SQL query with bound parameters.
+
+        Parameters:
+            query (str): SQL query with "?" placeholders.
+            params (Sequence): Values bound to the placeholders.
+            commit (bool): Whether to commit after the query.
+        """
+        await self.run(self.handler.execute, query, params, commit)
+
+    async def executemany(
+        self, query: str, rows: Iterable[Sequence[Any]], commit: bool = True
+    ) -> None:
+        """
+        Executes the given SQL query once for every parameter row.
+
+        Parameters:
+            query (str): SQL query with "?" placeholders.
+            rows (Iterable): Parameter rows bound to the placeholders.
+            commit (bool): Whether to commit after the query.
+        """
+        await self.run(self.handler.executemany, query, list(rows), commit)
+
+    async def fetch(
+        self, query: str, params: Sequence[Any] = (), as_rows: bool = False
+    ) -> list[Any]:
+        """
+        Runs a read query and returns all of its rows.
+
+        Parameters:
+            query (str): SQL query with "?" placeholders.
+            params (Sequence): Values bound to the placeholders.
+            as_rows (bool): Whether to return sqlite3.Row objects instead of tuples.
+
+        Returns:
+            list: The rows of the result.
+        """
+        return await self.run(
+            lambda: list(self.handler.fetch(query, params, as_rows=as_rows))
+        )
+
+    async def stream(
+        self,
+        query: str,
+        params: Sequence[Any] = (),
+        batch_size: Optional[int] = None,
+        as_rows: bool = False,
+    ) -> AsyncIterator[list[Any]]:
+        """
+        Runs a read query and asynchronously yields its result in fetchmany batches.
+        Every batch is read on the executor thread.
+
+        Parameters:
+            query (str): SQL query with "?" placeholders.
+            params (Sequence): Values bound to the placeholders.
+            batch_size (int, optional): Rows per batch, the handler's fetch_size if omitted.
+            as_rows (bool): Whether to return sqlite3.Row objects instead of tuples.
+
+        Yields:
+            list: A non-empty batch of rows.
+        """
+        batches = self.handler.fetch_batches(query, params, batch_size, as_rows)
+        try:
+            while (batch := await self.run(next, batches, None)) is not None:
+                yield batch
+        finally:
+            await self.run(batches.close)
+
+    async def begin_batch(self) -> None:
+        """
+        Starts buffering writes so that they are committed together.
+        """
+        await self.run(self.handler.begin_batch)
+
+    async def flush(self) -> int:
+        """
+        Writes the buffered rows in one transaction.
+
+        Returns:
+            int: Number of rows written.
+        """
+        return await self.run(self.handler.flush)
+
+    async def end_batch(self) -> int:
+        """
+        Flushes the buffered writes and leaves batch mode.
+
+        Returns:
+            int: Number of rows written by the final flush.
+        """
+        return await self.run(self.handler.end_batch)
+
+    async def close(self) -> None:
+        """
+        Closes the handler and shuts the executor down.
+        """
+        await self.run(self.handler.close)
+        self.executor.shutdown(wait=True)
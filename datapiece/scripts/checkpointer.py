@@ -0,0 +1,75 @@
+"""
+This module defines the Checkpointer class which runs a task periodically in the background.
+"""
+
+import logging
+import threading
+from typing import Callable, Optional
+
+
+class Checkpointer:
+    """
+    A daemon thread calling a checkpoint function at a fixed interval.
+
+    Attributes:
+        checkpoint (Callable): The function saving the data.
+        interval (float): Seconds between two checkpoints.
+        name (str): Name of the thread, also used in the log messages.
+    """
+
+    def __init__(
+        self, checkpoint: Callable[[], object], interval: float, name: str = "checkpointer"
+    ) -> None:
+        """
+        Constructs all the necessary attributes for the Checkpointer object.
+
+        Parameters:
+            checkpoint (Callable): The function saving the data.
+            interval (float): Seconds between two checkpoints.
+            name (str): Name of the thread, also used in the log messages.
+        """
+        self.checkpoint = checkpoint
+        self.interval = interval
+        self.name = name
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """
+        Starts the background thread.
+        """
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background thread and waits for it to finish.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def is_running(self) -> bool:
+        """
+        Checks if the background thread is running.
+
+        Returns:
+            bool: True if the thread is running, False otherwise.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        """
+        Calls the checkpoint function every interval until stopped.
+        A failing checkpoint is logged and retried at the next interval.
+        """
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.checkpoint()
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                logging.error("Background %s failed: %s", self.name, error)
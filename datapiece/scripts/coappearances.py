@@ -0,0 +1,329 @@
+"""
+This module defines the CoAppearanceIndex class which counts the panels shared by
+every pair of characters.
+
+The counts form a sparse character x character matrix indexed by CharacterID, built
+with vectorized NumPy from the (PanelID, CharacterID) pairs of CharacterAppearances
+instead of a quadratic self-join in SQL. A matrix is kept per scope, the whole series,
+an arc or a volume, as memory-mapped arrays in a cache directory, together with the
+highest appearance rowid it includes. New appearances are added incrementally: the
+pairs of the panels they touch are added, less the pairs these panels held before.
+"""
+
+import contextlib
+import os
+import threading
+from typing import Any, Iterator, Optional
+
+import numpy as np
+
+from datapiece.scripts.csr import CSRMatrix, get_group_pairs, load_meta
+from datapiece.scripts.db_query_handler import DBQueryHandler
+from datapiece.scripts.rollups import APPEARANCES_JOIN
+
+DEFAULT_COAPPEARANCE_DIR = "analysis/coappearances"
+DEFAULT_CHUNK_ROWS = 200000
+
+COAPPEARANCE_SCOPES: dict[str, str] = {
+    "arc": "Chapters.ArcID",
+    "volume": "Chapters.VolumeNumber",
+}
+
+
+def get_coappearance_matrix(
+    panels: np.ndarray, characters: np.ndarray, size: int = 0
+) -> CSRMatrix:
+    """
+    Counts the panels shared by every pair of characters.
+
+    Parameters:
+        panels (np.ndarray): PanelIDs of the appearances, sorted.
+        characters (np.ndarray): CharacterIDs of the appearances, sorted within a panel.
+        size (int): Minimum number of rows and columns.
+
+    Returns:
+        CSRMatrix: The symmetric matrix of the shared panels, without diagonal.
+    """
+    if len(panels) == 0:
+        return CSRMatrix.empty(size)
+    # A character appearing twice in a panel shares it once with the others.
+    distinct = np.r_[True, (panels[1:] != panels[:-1]) | (characters[1:] != characters[:-1])]
+    left, right = get_group_pairs(panels[distinct], characters[distinct])
+    return CSRMatrix.from_coo(left, right, size=size)
+
+
+def get_coappearance_delta(chunk: np.ndarray, watermark: int) -> CSRMatrix:
+    """
+    Returns the change of the shared panels made by the appearances above a watermark:
+    the pairs of their panels, less the pairs of the older appearances of these panels.
+
+    Parameters:
+        chunk (np.ndarray): Rows of (PanelID, CharacterID, rowid) of every appearance
+            of the touched panels, ordered by panel and character.
+        watermark (int): The highest appearance rowid already counted.
+
+    Returns:
+        CSRMatrix: The change, with negative values where pairs were only counted before.
+    """
+    old = chunk[chunk[:, 2] <= watermark]
+    rows, cols, values = get_coappearance_matrix(old[:, 0], old[:, 1]).to_coo()
+    before = CSRMatrix.from_coo(rows, cols, -values)
+    return get_coappearance_matrix(chunk[:, 0], chunk[:, 1]).add(before)
+
+
+def iter_panel_chunks(cursor: Any, chunk_rows: int) -> Iterator[np.ndarray]:
+    """
+    Reads rows ordered by panel in chunks that never split the rows of a panel.
+
+    Parameters:
+        cursor (sqlite3.Cursor): A cursor over integer rows whose first column is the panel.
+        chunk_rows (int): Number of rows fetched at a time.
+
+    Yields:
+        np.ndarray: A two-dimensional array of the rows of complete panels.
+    """
+    carry: Optional[np.ndarray] = None
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        chunk = np.array(rows, dtype=np.int64)
+        if carry is not None:
+            chunk = np.concatenate([carry, chunk])
+        # The last panel may continue in the next fetch.
+        split = int(np.searchsorted(chunk[:, 0], chunk[-1, 0]))
+        carry = chunk[split:]
+        if split > 0:
+            yield chunk[:split]
+    if carry is not None and len(carry) > 0:
+        yield carry
+
+
+class CoAppearanceIndex:
+    """
+    Character co-appearance matrices per scope, cached on disk and updated incrementally.
+
+    Attributes:
+        handler (DBQueryHandler): The handler of the database to read from.
+        cache_dir (str): Directory of the cached matrices.
+        chunk_rows (int): Number of appearances read at a time.
+    """
+
+    def __init__(
+        self,
+        handler: DBQueryHandler,
+        cache_dir: str = DEFAULT_COAPPEARANCE_DIR,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    ) -> None:
+        """
+        Constructs all the necessary attributes for the CoAppearanceIndex object.
+
+        Parameters:
+            handler (DBQueryHandler): The handler of the database to read from.
+            cache_dir (str): Directory of the cached matrices.
+            chunk_rows (int): Number of appearances read at a time.
+        """
+        self.handler = handler
+        self.cache_dir = cache_dir
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+
+    def get_directory(self, scope: Optional[str] = None, key: Optional[int] = None) -> str:
+        """
+        Returns the cache directory of the matrix of a scope.
+
+        Parameters:
+            scope (str, optional): "arc" or "volume", the whole series if omitted.
+            key (int, optional): The ArcID or VolumeNumber.
+
+        Returns:
+            str: The directory.
+
+        Raises:
+            ValueError: If the scope is unknown or its key is missing.
+        """
+        if scope is None:
+            return os.path.join(self.cache_dir, "series")
+        if scope not in COAPPEARANCE_SCOPES or key is None:
+            raise ValueError(f"Usage: scope {'|'.join(COAPPEARANCE_SCOPES)} with its ID")
+        return os.path.join(self.cache_dir, f"{scope}-{int(key)}")
+
+    def get_matrix(self, scope: Optional[str] = None, key: Optional[int] = None) -> CSRMatrix:
+        """
+        Returns the co-appearance matrix of a scope, updated with the new appearances.
+
+        Parameters:
+            scope (str, optional): "arc" or "volume", the whole series if omitted.
+            key (int, optional): The ArcID or VolumeNumber.
+
+        Returns:
+            CSRMatrix: The memory-mapped matrix of the panels shared by every pair
+                of CharacterIDs.
+
+        Raises:
+            ValueError: If the scope is unknown or its key is missing.
+        """
+        directory = self.get_directory(scope, key)
+        with self._lock:
+            self.update(scope, key)
+            matrix, _ = CSRMatrix.load(directory)
+        return matrix
+
+    def get_partners(
+        self, character_id: int, scope: Optional[str] = None, key: Optional[int] = None
+    ) -> list[tuple[int, int]]:
+        """
+        Returns the characters sharing panels with a character, most shared first.
+
+        Parameters:
+            character_id (int): The CharacterID.
+            scope (str, optional): "arc" or "volume", the whole series if omitted.
+            key (int, optional): The ArcID or VolumeNumber.
+
+        Returns:
+            list[tuple]: Pairs of CharacterID and number of shared panels.
+        """
+        indices, data = self.get_matrix(scope, key).row(character_id)
+        order = np.lexsort((indices, -data))
+        return [(int(indices[i]), int(data[i])) for i in order]
+
+    def update(self, scope: Optional[str] = None, key: Optional[int] = None) -> int:
+        """
+        Adds the appearances inserted since the last update to the cached matrix of a scope.
+        The matrix is rebuilt if it is not cached yet or if appearances were deleted.
+        Only the metadata of the cached matrix is read to find out whether it is current;
+        its arrays are read when there are appearances to add.
+        The appearances are read in one transaction, so that they are consistent.
+
+        Parameters:
+            scope (str, optional): "arc" or "volume", the whole series if omitted.
+            key (int, optional): The ArcID or VolumeNumber.
+
+        Returns:
+            int: Number of appearances read, 0 if the matrix was current.
+
+        Raises:
+            ValueError: If the scope is unknown or its key is missing.
+        """
+        directory = self.get_directory(scope, key)
+        try:
+            meta = load_meta(directory)
+        except (FileNotFoundError, ValueError):
+            meta = {}
+        if self.handler.batch.rows:
+            self.handler.flush()
+        with self.handler.lock:
+            conn = self.handler.conn
+            conn.execute("SAVEPOINT coappearances")
+            try:
+                max_rowid, total = conn.execute(
+                    "SELECT COALESCE(MAX(rowid), 0), COUNT(*) FROM CharacterAppearances"
+                ).fetchone()
+                watermark = int(meta.get("watermark", 0))
+                kept = conn.execute(
+                    "SELECT COUNT(*) FROM CharacterAppearances WHERE rowid <= ?", (watermark,)
+                ).fetchone()[0]
+                if meta and kept == meta.get("rows") and max_rowid == watermark:
+                    return 0
+                matrix = None
+                if meta and kept == meta.get("rows"):
+                    # The saved arrays are mapped, the sum is written to a new version.
+                    with contextlib.suppress(FileNotFoundError, ValueError):
+                        matrix, _ = CSRMatrix.load(directory)
+                if matrix is None:
+                    matrix, rows = self._build(scope, key)
+                else:
+                    matrix, rows = self._add_new(matrix, watermark, scope, key)
+            finally:
+                conn.execute("RELEASE coappearances")
+        matrix.save(directory, {"watermark": max_rowid, "rows": total, "scope": scope, "key": key})
+        return rows
+
+    def _get_query(
+        self, scope: Optional[str], key: Optional[int], condition: str
+    ) -> tuple[str, list[Any]]:
+        """
+        Returns the query of the (PanelID, CharacterID, rowid) rows of the appearances
+        of a scope, ordered by panel and character.
+
+        Parameters:
+            scope (str, optional): "arc" or "volume", the whole series if omitted.
+            key (int, optional): The ArcID or VolumeNumber.
+            condition (str): Additional condition on the appearances.
+
+        Returns:
+            tuple: The query and its parameters.
+        """
+        source = "FROM CharacterAppearances"
+        conditions = [
+            "CharacterAppearances.PanelID IS NOT NULL",
+            "CharacterAppearances.CharacterID IS NOT NULL",
+            condition,
+        ]
+        params: list[Any] = []
+        if scope is not None:
+            source = APPEARANCES_JOIN
+            conditions.append(f"{COAPPEARANCE_SCOPES[scope]} = ?")
+            params.append(key)
+        return (
+            "SELECT CharacterAppearances.PanelID, CharacterAppearances.CharacterID, "
+            f"CharacterAppearances.rowid {source} WHERE {' AND '.join(conditions)} "
+            "ORDER BY CharacterAppearances.PanelID, CharacterAppearances.CharacterID",
+            params,
+        )
+
+    def _build(self, scope: Optional[str], key: Optional[int]) -> tuple[CSRMatrix, int]:
+        """
+        Builds the matrix of a scope from every appearance, one chunk of panels at a time.
+        Must be called with the lock held.
+
+        Parameters:
+            scope (str, optional): "arc" or "volume", the whole series if omitted.
+            key (int, optional): The ArcID or VolumeNumber.
+
+        Returns:
+            tuple: The matrix and the number of appearances read.
+        """
+        query, params = self._get_query(scope, key, "1")
+        matrix, rows = CSRMatrix.empty(), 0
+        cursor = self.handler.conn.execute(query, params)
+        try:
+            for chunk in iter_panel_chunks(cursor, self.chunk_rows):
+                matrix = matrix.add(get_coappearance_matrix(chunk[:, 0], chunk[:, 1]))
+                rows += len(chunk)
+        finally:
+            cursor.close()
+        return matrix, rows
+
+    def _add_new(
+        self, matrix: CSRMatrix, watermark: int, scope: Optional[str], key: Optional[int]
+    ) -> tuple[CSRMatrix, int]:
+        """
+        Adds the appearances above the watermark to a matrix. The pairs of the panels
+        they touch are added, and the pairs these panels had before are subtracted.
+        Must be called with the lock held.
+
+        Parameters:
+            matrix (CSRMatrix): The matrix up to the watermark.
+            watermark (int): The highest appearance rowid included in the matrix.
+            scope (str, optional): "arc" or "volume", the whole series if omitted.
+            key (int, optional): The ArcID or VolumeNumber.
+
+        Returns:
+            tuple: The updated matrix and the number of appearances read.
+        """
+        query, params = self._get_query(
+            scope,
+            key,
+            "CharacterAppearances.PanelID IN "
+            "(SELECT PanelID FROM CharacterAppearances WHERE rowid > ?)",
+        )
+        rows = 0
+        cursor = self.handler.conn.execute(query, [watermark, *params])
+        try:
+            for chunk in iter_panel_chunks(cursor, self.chunk_rows):
+                matrix = matrix.add(get_coappearance_delta(chunk, watermark))
+                rows += len(chunk)
+        finally:
+            cursor.close()
+        return matrix, rows
@@ -1,23 +1,76 @@
 """
 This module defines the Commands class which provides an interface for executing SQL commands.
-
-TODO:
-    * Add more command methods as needed.
-    * Store temporary informations in a file
 """
 
-from typing import Any
+from typing import Any, Optional
 
+from datapiece.scripts.coappearances import (DEFAULT_COAPPEARANCE_DIR,
+                                             CoAppearanceIndex)
 from datapiece.scripts.db_query_handler import DBQueryHandler
-from datapiece.scripts.utils.config import get_key_list
+from datapiece.scripts.export import DEFAULT_EXPORT_DIR, export_tables
+from datapiece.scripts.graph import InteractionGraph
+from datapiece.scripts.importer import Importer
+from datapiece.scripts.maintenance import MAINTENANCE_STEPS
+from datapiece.scripts.rollups import (ROLLUP_LEVELS, get_appearance_counts,
+                                       rebuild_rollups)
+from datapiece.scripts.search import SEARCH_KINDS, rebuild_search, search
+from datapiece.scripts.timeline import (defer_timeline, get_history,
+                                        get_snapshot, rebuild_timeline,
+                                        split_ordinal)
+from datapiece.scripts.utils.config import (get_key_dict, get_key_list,
+                                            get_key_str)
+from datapiece.scripts.utils.sql import format_query_plan
+
+COMMAND_ALIASES = {"import": "import_file"}
+
+READ_KEYWORDS = ("SELECT", "WITH", "VALUES", "EXPLAIN")
+
+MORE_PROMPT = "-- more (Enter: next page, q: quit) --"
+
+STATS_TOP = 20
+COAPPEARANCES_TOP = 20
+GRAPH_TOP = 10
+
+
+def format_stats(summary: dict[str, Any], top: int = STATS_TOP) -> list[str]:
+    """
+    Formats the summary of QueryStats for the terminal.
 
+    Args:
+        summary (dict): The summary returned by QueryStats.summary.
+        top (int): Number of statement shapes shown.
 
-class Commands:
+    Returns:
+        list[str]: The lines to print.
+    """
+    statements = summary["statements"]
+    shown = min(top, len(statements))
+    lines = [f"Statements ({len(statements)} shapes, top {shown} by total time):"]
+    for item in statements[:top]:
+        p95 = "-" if item["p95_ms"] is None else f"<={item['p95_ms']:g}"
+        lines.append(
+            f"  {item['count']}x {item['total_ms']:.1f} ms total, {item['mean_ms']:.3f} ms mean, "
+            f"p95 {p95} ms, {item['max_ms']:.1f} ms max, {item['rows']} rows: {item['sql']}"
+        )
+    commits = summary["commits"]
+    lines.append(f"Commits: {commits['count']}, {commits['total_ms']:.1f} ms total")
+    slow_queries = summary["slow_queries"]
+    lines.append(f"Slow queries (>= {summary['slow_query_ms']:g} ms): {len(slow_queries)}")
+    for entry in slow_queries:
+        lines.append(f"  {entry['ms']:.1f} ms, {entry['rows']} rows: {entry['sql']}")
+        lines.extend(f"    {line}" for line in entry["plan"])
+    return lines
+
+
+class Commands:  # pylint: disable=too-many-public-methods
     """
     A class for executing database commands.
 
     Attributes:
         handler (DBQueryHandler): Executes the queries.
+        coappearance_index (CoAppearanceIndex): The cached character co-appearance matrices.
+        interaction_graph (InteractionGraph): The in-memory graph of the character interactions.
+        interactive (bool): Whether the commands may prompt, e.g. to page a query result.
     """
 
     def __init__(self, handler: DBQueryHandler, config: dict[str, Any]) -> None:
@@ -31,15 +84,26 @@ class Commands:
         self.handler = handler
         self.config = config
         self.exclude_list = get_key_list(config, "exclude_list")
+        self.coappearance_index = CoAppearanceIndex(
+            handler, get_key_str(config, "coappearance_dir") or DEFAULT_COAPPEARANCE_DIR
+        )
+        self.interaction_graph = InteractionGraph(handler, get_key_dict(config, "graph_weights"))
+        self.interactive = True
+        # The IDs and numbers of the rows last added by start_volume, start_chapter,
+        # add_page and add_panel, to which the following rows are attached.
+        self.position: dict[str, Optional[int]] = dict.fromkeys(
+            ("volume", "chapter", "page", "panel", "page_number", "panel_number")
+        )
 
     def get_command_names(self) -> list[str]:
         """
-        Get a list of command names that are not exlcuded (i.e. __init__).
+        Get a list of command names that are not exlcuded (i.e. __init__), including aliases.
 
         Returns:
             list[str]: A list of commands
         """
-        return [func for func in dir(self) if self._is_valid_command(func)]
+        names = [func for func in dir(self) if self._is_valid_command(func)]
+        return names + [alias for alias, func in COMMAND_ALIASES.items() if func in names]
 
     def _is_valid_command(self, func: str) -> bool:
         """
@@ -54,6 +118,507 @@ class Commands:
         Args:
             volume_number (int): The number of the volume to be started.
         """
-        query = f"INSERT INTO `Volumes` (`VolumeNumber`) VALUES ({volume_number})"
-        self.handler.execute_query(query)
-        self.handler.conn.commit()
+        query = "INSERT INTO `Volumes` (`VolumeNumber`) VALUES (?)"
+        self.handler.execute(query, (volume_number,))
+        self.position["volume"] = int(volume_number)
+
+    def start_chapter(
+        self,
+        chapter_number: int,
+        volume_number: Optional[int] = None,
+        arc_id: Optional[int] = None,
+    ) -> None:
+        """
+        Inserts a new chapter with an allocated ChapterID, to which the following pages are added.
+
+        Args:
+            chapter_number (int): The number of the chapter.
+            volume_number (int, optional): The volume, the last started volume if omitted.
+            arc_id (int, optional): The ArcID of the chapter.
+        """
+        if volume_number is None:
+            volume_number = self.position["volume"]
+        chapter_id = self.handler.id_allocator.next_id("Chapters")
+        self.handler.execute(
+            "INSERT INTO Chapters (ChapterID, VolumeNumber, ArcID, ChapterNumber) "
+            "VALUES (?, ?, ?, ?)",
+            (chapter_id, volume_number, arc_id, int(chapter_number)),
+        )
+        self.position.update(chapter=chapter_id, page=None, panel=None, page_number=0)
+        print(f"Chapter {chapter_number}: ChapterID {chapter_id}.")
+
+    def add_page(self, page_number: Optional[int] = None) -> None:
+        """
+        Inserts a new page with an allocated PageID into the current chapter,
+        to which the following panels are added.
+
+        Args:
+            page_number (int, optional): The number of the page, the next one if omitted.
+
+        Raises:
+            ValueError: If no chapter was started.
+        """
+        chapter_id = self.position["chapter"]
+        if chapter_id is None:
+            raise ValueError("No current chapter, use start_chapter first.")
+        number = (
+            int(page_number) if page_number is not None else (self.position["page_number"] or 0) + 1
+        )
+        page_id = self.handler.id_allocator.next_id("Pages")
+        self.handler.execute(
+            "INSERT INTO Pages (PageID, ChapterID, PageNumber) VALUES (?, ?, ?)",
+            (page_id, chapter_id, number),
+        )
+        self.position.update(page=page_id, panel=None, page_number=number, panel_number=0)
+        print(f"Page {number}: PageID {page_id}.")
+
+    def add_panel(self, *args: str) -> None:
+        """
+        Inserts a new panel with an allocated PanelID into the current page,
+        to which the following appearances are added.
+
+        Usage:
+            add_panel [number] [location]
+
+        Args:
+            args (str): The number of the panel, the next one if omitted, followed by
+                the words of its location, 'Unknown' if omitted.
+
+        Raises:
+            ValueError: If no page was added.
+        """
+        page_id = self.position["page"]
+        if page_id is None:
+            raise ValueError("No current page, use add_page first.")
+        location = list(args)
+        if location and location[0].isdigit():
+            number = int(location.pop(0))
+        else:
+            number = (self.position["panel_number"] or 0) + 1
+        panel_id = self.handler.id_allocator.next_id("Panels")
+        self.handler.execute(
+            "INSERT INTO Panels (PanelID, PageID, PanelNumber, Location) "
+            "VALUES (?, ?, ?, COALESCE(?, 'Unknown'))",
+            (panel_id, page_id, number, " ".join(location) or None),
+        )
+        self.position.update(panel=panel_id, panel_number=number)
+        print(f"Panel {number}: PanelID {panel_id}.")
+
+    def add_appearance(self, character_id: int, panel_id: Optional[int] = None) -> None:
+        """
+        Inserts an appearance of a character with an allocated AppearanceID.
+
+        Args:
+            character_id (int): The CharacterID.
+            panel_id (int, optional): The PanelID, the current panel if omitted.
+
+        Raises:
+            ValueError: If no panel was added and none is given.
+        """
+        if panel_id is None:
+            panel_id = self.position["panel"]
+            if panel_id is None:
+                raise ValueError("No current panel, use add_panel first.")
+        appearance_id = self.handler.id_allocator.next_id("CharacterAppearances")
+        self.handler.execute(
+            "INSERT INTO CharacterAppearances (AppearanceID, CharacterID, PanelID) "
+            "VALUES (?, ?, ?)",
+            (appearance_id, int(character_id), int(panel_id)),
+        )
+        print(f"AppearanceID {appearance_id}.")
+
+    def begin_batch(self) -> None:
+        """
+        Starts buffering the following writes into a single transaction.
+        """
+        self.handler.begin_batch()
+        print("Batch mode on.")
+
+    def flush(self) -> None:
+        """
+        Writes the buffered rows of the current batch.
+        """
+        rows = self.handler.flush()
+        print(f"Flushed {rows} rows.")
+
+    def end_batch(self) -> None:
+        """
+        Writes the buffered rows and stops batching.
+        """
+        rows = self.handler.end_batch()
+        print(f"Batch mode off, flushed {rows} rows.")
+
+    def import_file(
+        self, path: str, file_format: Optional[str] = None, chunk_size: Optional[str] = None
+    ) -> None:
+        """
+        Streams a CSV or JSONL file of annotated records into the database.
+        Available in the console as "import".
+
+        Args:
+            path (str): Path to the file.
+            file_format (str, optional): "csv" or "jsonl", guessed from the extension if omitted.
+            chunk_size (str, optional): Number of rows written per transaction.
+        """
+        importer = Importer(self.handler, int(chunk_size) if chunk_size else None)
+        rows, elapsed = importer.import_file(path, file_format)
+        rate = rows / elapsed if elapsed > 0 else float(rows)
+        print(f"Imported {rows} rows in {elapsed:.2f}s ({rate:.0f} rows/s).")
+
+    def indexes(self, *args: str) -> None:
+        """
+        Manages the maintained index set.
+
+        Usage:
+            indexes [list]             shows the maintained indexes and whether they exist
+            indexes create             creates the missing indexes
+            indexes drop               drops the indexes, e.g. before a bulk load
+            indexes rebuild            drops and creates the indexes again
+            indexes explain <query>    shows the query plan of a query
+
+        Args:
+            args (str): The action followed by its arguments.
+        """
+        action = args[0] if args else "list"
+        if action == "explain":
+            for line in format_query_plan(self.handler.explain(" ".join(args[1:]))):
+                print(line)
+        elif action in ("create", "drop", "rebuild"):
+            names = getattr(self.handler, f"{action}_indexes")()
+            print(f"{action.capitalize()}: {len(names)} indexes.")
+        elif action == "list":
+            existing = self.handler.get_existing_indexes()
+            for name in self.handler.get_index_names():
+                print(f"{name}: {'present' if name in existing else 'missing'}")
+        else:
+            print(f"Unknown indexes action: {action}")
+
+    def query(self, *args: str) -> None:
+        """
+        Runs a read query and pages its result to the terminal,
+        streaming one page of rows at a time. The result is printed without
+        paging when the commands are not interactive.
+
+        Args:
+            args (str): The words of the SQL query.
+        """
+        sql = " ".join(args)
+        if not sql.upper().startswith(READ_KEYWORDS):
+            print(f"Only read queries starting with {', '.join(READ_KEYWORDS)} are allowed.")
+            return
+        batches = self.handler.fetch_batches(sql, as_rows=True)
+        batch = next(batches, None)
+        if batch is None:
+            print("No rows.")
+            return
+        print(" | ".join(batch[0].keys()))
+        while batch is not None:
+            for row in batch:
+                print(" | ".join(str(value) for value in row))
+            batch = next(batches, None)
+            if (
+                batch is not None
+                and self.interactive
+                and input(MORE_PROMPT).strip().lower() == "q"
+            ):
+                batches.close()
+                break
+
+    def rollups(self, *args: str) -> None:
+        """
+        Reads or rebuilds the appearance counts per character and chapter, arc or volume.
+
+        Usage:
+            rollups rebuild                               recomputes every rollup table
+            rollups <chapter|arc|volume> [character_id]   prints the appearance counts
+
+        Args:
+            args (str): The action or level followed by its arguments.
+        """
+        action = args[0] if args else ""
+        if action == "rebuild":
+            rebuild_rollups(self.handler)
+            print("Rollups rebuilt.")
+        elif action in ROLLUP_LEVELS:
+            character_id = args[1] if len(args) > 1 else None
+            print(f"CharacterID | {ROLLUP_LEVELS[action][1]} | AppearanceCount")
+            for row in get_appearance_counts(self.handler, action, character_id):
+                print(" | ".join(str(value) for value in row))
+        else:
+            print(f"Usage: rollups rebuild | rollups <{'|'.join(ROLLUP_LEVELS)}> [character_id]")
+
+    def profile(self, name: Optional[str] = None) -> None:
+        """
+        Lists the connection performance profiles or switches to one of them.
+
+        Args:
+            name (str, optional): Name of the profile to switch to.
+        """
+        if name is None:
+            for profile in self.handler.profiles:
+                marker = "*" if profile == self.handler.profile else " "
+                print(f"{marker} {profile}")
+            return
+        self.handler.apply_profile(name)
+        print(f"Profile {name} active.")
+
+    def checkpoint(self) -> None:
+        """
+        Writes the in-memory working database to disk now.
+        """
+        if self.handler.checkpoint():
+            print("Checkpoint written.")
+        else:
+            print("Nothing to checkpoint: the database is not in memory or a write is pending.")
+
+    def pool(self) -> None:
+        """
+        Prints the statistics of the read connection pool.
+        """
+        for name, value in self.handler.pool.stats().items():
+            print(f"{name}: {value:.4f}" if isinstance(value, float) else f"{name}: {value}")
+
+    def maintenance(self, *args: str) -> None:
+        """
+        Runs maintenance steps, or prints the writes since their last runs.
+
+        Usage:
+            maintenance                 runs analyze, optimize, vacuum and checkpoint
+            maintenance <step> ...      runs the given steps
+            maintenance status          prints the writes and threshold of every step
+
+        Args:
+            args (str): "status", or names of the steps to run.
+        """
+        if args == ("status",):
+            maintenance = self.handler.maintenance
+            for step in MAINTENANCE_STEPS:
+                print(
+                    f"{step}: {maintenance.writes_since(step)} writes, "
+                    f"threshold {maintenance.thresholds[step]}"
+                )
+            return
+        report = self.handler.maintain(args or None)
+        if not report:
+            print("Maintenance skipped: a transaction is open.")
+        for step, seconds, freed in report:
+            print(f"{step}: {seconds:.4f}s, {freed} bytes freed")
+
+    def cache(self, action: Optional[str] = None) -> None:
+        """
+        Prints the statistics of the query result cache, or clears it.
+
+        Args:
+            action (str, optional): "clear" to remove every entry.
+        """
+        if action == "clear":
+            print(f"Cleared {self.handler.query_cache.clear()} entries.")
+        elif action is None:
+            for name, value in self.handler.query_cache.stats().items():
+                print(f"{name}: {value}")
+        else:
+            print(f"Unknown cache action: {action}")
+
+    def stats(self, *args: str) -> None:
+        """
+        Prints the latency statistics of the statements, the commits and the slow queries.
+
+        Usage:
+            stats                  prints the statement shapes taking the most time in total
+            stats json [path]      prints the statistics as JSON, or writes them to a file
+            stats reset            forgets the recorded statistics
+
+        Args:
+            args (str): The action followed by its arguments.
+        """
+        action = args[0] if args else ""
+        if action == "json":
+            if len(args) > 1:
+                with open(args[1], "w", encoding="utf-8") as f:
+                    f.write(self.handler.stats.to_json())
+                print(f"Statistics written to {args[1]}.")
+            else:
+                print(self.handler.stats.to_json())
+        elif action == "reset":
+            self.handler.stats.reset()
+            print("Statistics reset.")
+        elif action == "":
+            for line in format_stats(self.handler.stats.summary()):
+                print(line)
+        else:
+            print(f"Unknown stats action: {action}")
+
+    def export(self, *args: str) -> None:
+        """
+        Exports the analysis tables as column-oriented .npy files to the export_dir
+        of the commands config. Tables unchanged since their last export are skipped.
+
+        Usage:
+            export [table ...]           exports the changed tables, every table if none is given
+            export force [table ...]     exports the tables even if unchanged
+
+        Args:
+            args (str): "force" and names of the tables.
+        """
+        force = "force" in args
+        tables = [arg for arg in args if arg != "force"] or None
+        directory = get_key_str(self.config, "export_dir") or DEFAULT_EXPORT_DIR
+        for table, rows, seconds, skipped in export_tables(self.handler, directory, tables, force):
+            if skipped:
+                print(f"{table}: unchanged, {rows} rows.")
+            else:
+                print(f"{table}: {rows} rows exported in {seconds:.2f}s.")
+
+    def coappearances(
+        self, character_id: str, scope: Optional[str] = None, key: Optional[str] = None
+    ) -> None:
+        """
+        Prints the characters sharing the most panels with a character, in the whole series
+        or in an arc or volume. The cached co-appearance matrix is updated first.
+
+        Usage:
+            coappearances <character_id> [arc|volume <id>]
+
+        Args:
+            character_id (str): The CharacterID.
+            scope (str, optional): "arc" or "volume".
+            key (str, optional): The ArcID or VolumeNumber.
+        """
+        partners = self.coappearance_index.get_partners(
+            int(character_id), scope, int(key) if key is not None else None
+        )[:COAPPEARANCES_TOP]
+        if not partners:
+            print("No shared panels.")
+            return
+        placeholders = ", ".join("?" for _ in partners)
+        names = dict(
+            self.handler.fetch(
+                f"SELECT CharacterID, Name FROM Characters WHERE CharacterID IN ({placeholders})",
+                [partner for partner, _ in partners],
+            )
+        )
+        print("CharacterID | Name | SharedPanels")
+        for partner, shared in partners:
+            print(f"{partner} | {names.get(partner, '')} | {shared}")
+
+    def graph(self, *args: str) -> None:
+        """
+        Queries the graph of the characters linked by their interactions. The graph is kept
+        in memory and only reads the participants added since its last query.
+
+        Usage:
+            graph                       prints the number of characters, links and components
+            graph reload [full]         reads the new participants, or every participant
+            graph degree <id>           prints the characters a character interacted with
+            graph path <id> <id>        prints a chain of interactions linking two characters
+            graph central [n]           prints the characters with the highest PageRank
+            graph components [n]        prints the largest groups of connected characters
+
+        Args:
+            args (str): The action followed by its arguments.
+        """
+        action, arguments = (args[0], args[1:]) if args else ("", ())
+        graph = self.interaction_graph
+        if action == "reload":
+            rows = graph.refresh(full=arguments[:1] == ("full",))
+            print(f"Read {rows} participants, {len(graph.ids)} characters.")
+        elif action == "degree" and len(arguments) == 1:
+            neighbors, strength = graph.degree(arguments[0])
+            print(f"{neighbors} characters, total weight {strength:g}.")
+        elif action == "path" and len(arguments) == 2:
+            path = graph.shortest_path(arguments[0], arguments[1])
+            print(" -> ".join(map(str, path)) if path else "Not connected.")
+        elif action == "central":
+            print("CharacterID | PageRank")
+            for character_id, rank in graph.central(int(arguments[0]) if arguments else GRAPH_TOP):
+                print(f"{character_id} | {rank:.6f}")
+        elif action == "components":
+            count = int(arguments[0]) if arguments else GRAPH_TOP
+            for group in graph.components()[:count]:
+                print(f"{len(group)}: {' '.join(map(str, group[:GRAPH_TOP]))}")
+        elif action == "":
+            components = graph.components()
+            print(
+                f"{len(graph.ids)} characters, {graph.matrix.nnz // 2} links, "
+                f"{len(components)} components."
+            )
+        else:
+            print(f"Unknown graph action: {' '.join(args)}")
+
+    def search(self, *args: str) -> None:
+        """
+        Searches the names of the characters, chapters and locations containing a text,
+        or the closest names if none contains it.
+
+        Usage:
+            search [character|chapter|location] <text>    prints the best matches first
+            search rebuild                                 recomputes the search index
+
+        Args:
+            args (str): The kind of entity, if any, followed by the words of the text.
+        """
+        if args == ("rebuild",):
+            rebuild_search(self.handler)
+            print("Search index rebuilt.")
+            return
+        kind = args[0] if args and args[0] in SEARCH_KINDS else None
+        text = " ".join(args[1:] if kind else args)
+        if not text:
+            print(f"Usage: search [{'|'.join(SEARCH_KINDS)}] <text> | search rebuild")
+            return
+        hits = search(self.handler, text, kind)
+        if not hits:
+            print("No matches.")
+            return
+        print("Kind | ID | Name")
+        for hit_kind, entity_id, name, distance in hits:
+            suffix = f" (~{distance})" if distance else ""
+            print(f"{hit_kind} | {entity_id} | {name}{suffix}")
+
+    def timeline(self, *args: str) -> None:
+        """
+        Prints the known bounty, status, fruit, affiliation and ability of a character
+        as of the end of a chapter, or their changes within a range of chapters.
+
+        Usage:
+            timeline <character_id> [chapter]                       values as of a chapter
+            timeline <character_id> <first> <last> [attribute]      values within chapters
+            timeline defer                                          suspends its triggers
+            timeline rebuild                                        recomputes the timeline
+
+        Args:
+            args (str): The CharacterID followed by the chapters, "defer" or "rebuild".
+        """
+        if args == ("defer",):
+            defer_timeline(self.handler)
+            print("Timeline deferred until the next timeline rebuild.")
+        elif args == ("rebuild",):
+            rebuild_timeline(self.handler)
+            print("Timeline rebuilt.")
+        elif len(args) in (1, 2):
+            chapter = int(args[1]) if len(args) > 1 else None
+            print("Attribute | Value | Chapter | Page | Panel")
+            for attribute, (value, ordinal, _) in get_snapshot(
+                self.handler, int(args[0]), chapter
+            ).items():
+                print(" | ".join(str(item) for item in (attribute, value, *split_ordinal(ordinal))))
+        elif len(args) in (3, 4):
+            entries = get_history(
+                self.handler,
+                int(args[0]),
+                int(args[1]),
+                int(args[2]),
+                args[3] if len(args) > 3 else None,
+            )
+            print("Chapter | Page | Panel | EventID | Attribute | Value")
+            for ordinal, event_id, attribute, value in entries:
+                print(
+                    " | ".join(
+                        str(item) for item in (*split_ordinal(ordinal), event_id, attribute, value)
+                    )
+                )
+        else:
+            print(
+                "Usage: timeline <character_id> [chapter] | "
+                "timeline <character_id> <first> <last> [attribute] | timeline defer|rebuild"
+            )
@@ -0,0 +1,175 @@
+"""
+This module defines the PrefixTrie and EntityIndex classes used for tab completion.
+
+The console completes the first word of a line from the command names and the
+following words from the entity values of the database: character names, arc names,
+locations and affiliation names. The values are loaded once into prefix tries; after
+the database was written to, they are read again and only the tries of the entity
+kinds whose values changed are rebuilt.
+"""
+
+from typing import Any, Iterable, Optional
+
+from datapiece.scripts.db_query_handler import DBQueryHandler
+
+MAX_COMPLETIONS = 100
+
+ENTITY_QUERIES: dict[str, str] = {
+    "character": "SELECT Name FROM Characters WHERE Name IS NOT NULL",
+    "arc": "SELECT ArcName FROM Arcs WHERE ArcName IS NOT NULL",
+    "location": "SELECT Name FROM Locations",
+    "affiliation": "SELECT AffiliationName FROM Affiliations WHERE AffiliationName IS NOT NULL",
+}
+
+_END = ""
+
+
+class PrefixTrie:
+    """
+    A case-insensitive prefix tree of words.
+
+    Finding the completions of a prefix walks the prefix, then only the subtree
+    of the matching words, up to the requested number of them.
+
+    Attributes:
+        size (int): Number of distinct words.
+    """
+
+    def __init__(self, words: Iterable[str] = ()) -> None:
+        """
+        Constructs all the necessary attributes for the PrefixTrie object.
+
+        Parameters:
+            words (Iterable): The initial words.
+        """
+        self._root: dict[str, Any] = {}
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        """
+        Adds a word, keeping its original case for the completions.
+
+        Parameters:
+            word (str): The word to add.
+        """
+        node = self._root
+        for char in word.lower():
+            node = node.setdefault(char, {})
+        variants = node.setdefault(_END, [])
+        if word not in variants:
+            variants.append(word)
+            self.size += 1
+
+    def complete(self, prefix: str, limit: Optional[int] = MAX_COMPLETIONS) -> list[str]:
+        """
+        Returns the words starting with a prefix, in alphabetical order.
+
+        Parameters:
+            prefix (str): The prefix, matched case-insensitively.
+            limit (int, optional): Maximum number of words, unlimited if None.
+
+        Returns:
+            list[str]: The matching words.
+        """
+        node = self._root
+        for char in prefix.lower():
+            if char not in node:
+                return []
+            node = node[char]
+        words: list[str] = []
+        stack = [node]
+        while stack and (limit is None or len(words) < limit):
+            node = stack.pop()
+            words.extend(node.get(_END, ()))
+            stack.extend(node[char] for char in sorted(node, reverse=True) if char != _END)
+        return words if limit is None else words[:limit]
+
+
+class EntityIndex:
+    """
+    Prefix tries of the entity values of the database, rebuilt after writes changing them.
+
+    Attributes:
+        handler (DBQueryHandler): The handler of the database to read from.
+        queries (dict): Query returning the values of every entity kind.
+        tries (dict): The prefix trie of every entity kind.
+        values (PrefixTrie): The values of every entity kind.
+    """
+
+    def __init__(
+        self, handler: DBQueryHandler, queries: Optional[dict[str, str]] = None
+    ) -> None:
+        """
+        Constructs all the necessary attributes for the EntityIndex object.
+        The values are loaded on the first completion.
+
+        Parameters:
+            handler (DBQueryHandler): The handler of the database to read from.
+            queries (dict, optional): Query of every entity kind, ENTITY_QUERIES if omitted.
+        """
+        self.handler = handler
+        self.queries = queries or ENTITY_QUERIES
+        self.tries: dict[str, PrefixTrie] = {}
+        self.values = PrefixTrie()
+        self._loaded_changes: Optional[int] = None
+        self._loaded_values: dict[str, list[str]] = {}
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reads the values again if the database was written to since the last load and
+        rebuilds the tries of the entity kinds whose values changed. Only the reads hold
+        the handler's lock; building the tries does not.
+
+        Parameters:
+            force (bool): Whether to rebuild every trie even without writes.
+
+        Returns:
+            bool: True if a trie was rebuilt, False otherwise.
+        """
+        with self.handler.lock:
+            changes = self.handler.conn.total_changes
+            if not force and changes == self._loaded_changes:
+                return False
+            loaded = {
+                kind: [str(row[0]) for row in self.handler.conn.execute(query)]
+                for kind, query in self.queries.items()
+            }
+        self._loaded_changes = changes
+        changed = [
+            kind
+            for kind, words in loaded.items()
+            if force or words != self._loaded_values.get(kind)
+        ]
+        if not changed:
+            return False
+        tries = dict(self.tries)
+        for kind in changed:
+            tries[kind] = PrefixTrie(loaded[kind])
+        values = PrefixTrie()
+        for trie in tries.values():
+            for word in trie.complete("", None):
+                values.add(word)
+        self.tries, self.values, self._loaded_values = tries, values, loaded
+        return True
+
+    def complete(self, prefix: str, kind: Optional[str] = None) -> list[str]:
+        """
+        Returns the entity values starting with a prefix.
+
+        Parameters:
+            prefix (str): The prefix, matched case-insensitively.
+            kind (str, optional): The entity kind, every kind if omitted.
+
+        Returns:
+            list[str]: The matching values.
+
+        Raises:
+            ValueError: If the entity kind is unknown.
+        """
+        if kind is not None and kind not in self.queries:
+            raise ValueError(f"Unknown entity kind: {kind}")
+        self.refresh()
+        trie = self.values if kind is None else self.tries[kind]
+        return trie.complete(prefix)
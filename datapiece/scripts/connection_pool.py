@@ -0,0 +1,257 @@
+"""
+This module defines the ConnectionPool class which shares the database across threads.
+
+Readers lease one of a bounded set of read-only connections, so that several
+analytic queries run in parallel with the writes of the console. With the database
+in WAL mode the readers never block the single writer connection, nor are blocked by it.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+DEFAULT_POOL_SIZE = 4
+
+
+class ConnectionPool:  # pylint: disable=too-many-instance-attributes
+    """
+    A pool of read-only connections plus a single shared writer connection.
+
+    A thread holding a reader lease gets the same connection back when it asks again,
+    so nested reads in the same thread never wait for a second connection.
+
+    Attributes:
+        db_path (str): Path to the SQLite database file, empty if readers are unavailable.
+        size (int): Maximum number of read-only connections.
+        writer_conn (sqlite3.Connection): The connection used for writes.
+        writer_lock (threading.RLock): Serializes the use of the writer connection.
+        on_write (Callable, optional): Called after a writer lease committed changes, e.g. to
+            clear the results cached from the writer connection.
+        on_rollback (Callable, optional): Called after a writer lease was rolled back, e.g. to
+            drop the state derived from its uncommitted writes.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        db_path: str,
+        writer_conn: sqlite3.Connection,
+        writer_lock: threading.RLock,
+        size: int = DEFAULT_POOL_SIZE,
+        on_write: Optional[Callable[[], Any]] = None,
+        on_rollback: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        Constructs all the necessary attributes for the ConnectionPool object.
+        Read-only connections are opened lazily on the first leases.
+
+        Parameters:
+            db_path (str): Path to the SQLite database file, empty if readers are unavailable.
+            writer_conn (sqlite3.Connection): The connection used for writes.
+            writer_lock (threading.RLock): Serializes the use of the writer connection.
+            size (int): Maximum number of read-only connections.
+            on_write (Callable, optional): Called after a writer lease committed changes.
+            on_rollback (Callable, optional): Called after a writer lease was rolled back.
+        """
+        self.db_path = db_path
+        self.size = size
+        self.writer_conn = writer_conn
+        self.writer_lock = writer_lock
+        self.on_write = on_write
+        self.on_rollback = on_rollback
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self._wal_checked = False
+        self._stats: dict[str, Any] = {
+            "reader_leases": 0,
+            "reader_waits": 0,
+            "reader_wait_seconds": 0.0,
+            "writer_leases": 0,
+            "writer_wait_seconds": 0.0,
+        }
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Leases a read-only connection to the current thread.
+        Waits for a connection to be released when all of them are in use.
+
+        Yields:
+            sqlite3.Connection: A read-only connection.
+
+        Raises:
+            RuntimeError: If the pool has no database file to read from or is closed.
+        """
+        leased = getattr(self._local, "conn", None)
+        if leased is not None:
+            self._local.depth += 1
+            try:
+                yield leased
+            finally:
+                self._local.depth -= 1
+            return
+        conn = self._acquire_reader()
+        self._local.conn, self._local.depth = conn, 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            if conn.in_transaction:
+                conn.rollback()
+            self._release(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Leases the writer connection, committing on success and rolling back on errors.
+        The commits of the writer connection do not change its PRAGMA data_version, so
+        on_write is called when the lease changed any row.
+
+        Yields:
+            sqlite3.Connection: The writer connection.
+        """
+        started = time.perf_counter()
+        with self.writer_lock:
+            self._record(writer_leases=1, writer_wait_seconds=time.perf_counter() - started)
+            changes = self.writer_conn.total_changes
+            try:
+                yield self.writer_conn
+                self.writer_conn.commit()
+            except BaseException:
+                self.writer_conn.rollback()
+                if self.on_rollback is not None:
+                    self.on_rollback()
+                raise
+            if self.on_write is not None and self.writer_conn.total_changes != changes:
+                self.on_write()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the usage statistics of the pool.
+
+        Returns:
+            dict: Counters of leases and waits, and the number of open and idle readers.
+        """
+        with self._stats_lock:
+            idle = self._idle.qsize()
+            return {
+                **self._stats,
+                "size": self.size,
+                "readers_open": self._created,
+                "readers_idle": idle,
+                "readers_in_use": self._created - idle,
+            }
+
+    def close(self) -> None:
+        """
+        Closes the idle read-only connections. The leased ones are closed when released,
+        and no reader can be leased any more.
+        """
+        with self._stats_lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close_reader(conn)
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        """
+        Returns a released reader to the idle ones, or closes it if the pool is closed.
+
+        Parameters:
+            conn (sqlite3.Connection): The released read-only connection.
+        """
+        with self._stats_lock:
+            closed = self._closed
+            if not closed:
+                self._idle.put(conn)
+        if closed:
+            self._close_reader(conn)
+
+    def _close_reader(self, conn: sqlite3.Connection) -> None:
+        """
+        Closes a read-only connection and forgets it.
+
+        Parameters:
+            conn (sqlite3.Connection): The read-only connection.
+        """
+        conn.close()
+        with self._stats_lock:
+            self._created -= 1
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        """
+        Takes an idle reader, opens a new one if the pool is not full,
+        or waits for one to be released.
+
+        Returns:
+            sqlite3.Connection: A read-only connection.
+        """
+        if not self.db_path:
+            raise RuntimeError("The read pool is unavailable for in-memory databases.")
+        if self._closed:
+            raise RuntimeError("The read pool is closed.")
+        try:
+            conn = self._idle.get_nowait()
+            self._record(reader_leases=1)
+            return conn
+        except queue.Empty:
+            pass
+        with self._stats_lock:
+            can_open = self._created < self.size
+            if can_open:
+                self._created += 1
+        if can_open:
+            try:
+                conn = self._open_reader()
+            except sqlite3.Error:
+                with self._stats_lock:
+                    self._created -= 1
+                raise
+            self._record(reader_leases=1)
+            return conn
+        started = time.perf_counter()
+        conn = self._idle.get()
+        self._record(
+            reader_leases=1,
+            reader_waits=1,
+            reader_wait_seconds=time.perf_counter() - started,
+        )
+        return conn
+
+    def _open_reader(self) -> sqlite3.Connection:
+        """
+        Opens a read-only connection, switching the database to WAL mode
+        the first time no write transaction is open.
+
+        Returns:
+            sqlite3.Connection: A read-only connection.
+        """
+        if not self._wal_checked:
+            with self.writer_lock:
+                if not self.writer_conn.in_transaction:
+                    self.writer_conn.execute("PRAGMA journal_mode = WAL").fetchall()
+                    self._wal_checked = True
+        uri = f"file:{urllib.parse.quote(self.db_path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _record(self, **increments: float) -> None:
+        """
+        Adds the given increments to the statistics counters.
+
+        Parameters:
+            increments (float): Increments by counter name.
+        """
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
@@ -3,16 +3,30 @@ This module provides a console interface for interacting with a database.
 """
 
 import logging
-from typing import Optional
+import sqlite3
+import sys
+import time
+from typing import Iterable, Iterator, Optional
 
 from pyreadline3 import Readline  # type: ignore
 
-from datapiece.scripts.commands import Commands
+from datapiece.scripts.commands import COMMAND_ALIASES, Commands
+from datapiece.scripts.completion import EntityIndex, PrefixTrie
 from datapiece.scripts.db_query_handler import DBQueryHandler
-from datapiece.scripts.utils.config import get_key_dict
+from datapiece.scripts.profiler import (DEFAULT_PROFILE_DIR,
+                                        DEFAULT_REPORT_TOP,
+                                        DEFAULT_TRACE_FRAMES, SessionProfiler)
+from datapiece.scripts.utils.config import (get_key_dict, get_key_int,
+                                            get_key_str)
 
+# Console commands handled by the console itself, around the dispatch of the others.
+PROFILER_ACTIONS = {
+    "profile": ("start", "stop", "dump"),
+    "memtrace": ("start", "stop", "snapshot", "diff"),
+}
 
-class Console:
+
+class Console:  # pylint: disable=too-many-instance-attributes
     """
     A console interface for interacting with a database.
 
@@ -21,6 +35,10 @@ class Console:
         config (dict): A configuration dictionary.
         commands_instance (Commands): An instance of Commands for handling commands.
         commands (list): A list of command names.
+        command_trie (PrefixTrie): The command names, for completion.
+        entities (EntityIndex): The entity values of the database, for completion.
+        readline (Readline): The line reader, None until the console is started.
+        profiler (SessionProfiler): Profiles the dispatched commands on demand.
     """
 
     def __init__(self, handler: DBQueryHandler, config: dict) -> None:
@@ -34,7 +52,18 @@ class Console:
         self.handler = handler
         self.config = config
         self.commands_instance = Commands(handler, get_key_dict(config, "commands"))
-        self.commands = self.commands_instance.get_command_names()
+        self.commands = self.commands_instance.get_command_names() + ["memtrace"]
+        self.command_trie = PrefixTrie(self.commands)
+        self.entities = EntityIndex(handler)
+        self.readline: Optional[Readline] = None
+        self._matches: list[str] = []
+        self._command_names = set(self.commands)
+        profiling_config = get_key_dict(config, "profiling")
+        self.profiler = SessionProfiler(
+            get_key_str(profiling_config, "output_dir") or DEFAULT_PROFILE_DIR,
+            get_key_int(profiling_config, "top", DEFAULT_REPORT_TOP),
+            get_key_int(profiling_config, "frames", DEFAULT_TRACE_FRAMES),
+        )
 
     def start(self) -> None:
         """
@@ -43,6 +72,7 @@ class Console:
         readline = Readline()
         readline.parse_and_bind("tab: complete")
         readline.set_completer(self.completer)
+        self.readline = readline
 
         print('Welcome to the SQL Console. Type "exit" to quit.')
 
@@ -51,12 +81,8 @@ class Console:
                 command = readline.readline(">>> ")
                 if command.lower().strip() == "exit":
                     break
-                command_parts = command.split()
-                command_name = command_parts[0]
-                if command_name in self.commands:
-                    getattr(self.commands_instance, command_name)(*command_parts[1:])
-                else:
-                    print(f"Unknown command: {command_name}")
+                if not self.dispatch(command):
+                    print(f"Unknown command: {command.split()[0]}")
             except KeyboardInterrupt:
                 # Handle Ctrl+C
                 logging.info("Exit")
@@ -65,12 +91,191 @@ class Console:
                 logging.info("Exit")
                 # Handle Ctrl+D / EOF
                 break
+            except (sqlite3.Error, OSError, ValueError) as error:
+                logging.error("Command failed: %s", error)
+                print(f"Error: {error}")
+
+        self.profiler.close()
+        self.handler.close()
+
+    def dispatch(self, line: str) -> bool:
+        """
+        Parses a command line and runs the command.
+
+        Parameters:
+            line (str): The command name followed by its arguments. Blank lines are ignored.
+
+        Returns:
+            bool: False if the command is unknown, True otherwise.
+        """
+        parts = line.split()
+        if not parts:
+            return True
+        if self._is_profiler_command(parts):
+            self.run_profiler(parts[0], *parts[1:])
+            return True
+        if parts[0] not in self._command_names:
+            return False
+        command = getattr(self.commands_instance, COMMAND_ALIASES.get(parts[0], parts[0]))
+        with self.profiler.profiled():
+            command(*parts[1:])
+        return True
+
+    def _is_profiler_command(self, parts: list[str]) -> bool:
+        """
+        Checks if a command line is handled by the profiler. "profile" followed by
+        another argument is the command switching the connection profile.
+
+        Parameters:
+            parts (list[str]): The words of the command line.
+
+        Returns:
+            bool: True for the profiling commands, False otherwise.
+        """
+        if parts[0] == "memtrace":
+            return True
+        return parts[0] == "profile" and len(parts) == 2 and parts[1] in PROFILER_ACTIONS["profile"]
+
+    def run_profiler(self, name: str, *args: str) -> None:
+        """
+        Runs a profiling command.
+
+        Usage:
+            profile start|stop          profiles the following commands with cProfile
+            profile dump                writes the pstats data and the cumulative time report
+            memtrace start|stop         traces the memory allocations with tracemalloc
+            memtrace snapshot           writes the largest allocation sites
+            memtrace diff               writes the allocation growth since the last snapshot
+
+        Parameters:
+            name (str): "profile" or "memtrace".
+            args (str): The action of the command.
+
+        Raises:
+            ValueError: If the action is unknown or not possible in the current state.
+        """
+        action = args[0] if len(args) == 1 else ""
+        if action not in PROFILER_ACTIONS[name]:
+            raise ValueError(f"Usage: {name} {'|'.join(PROFILER_ACTIONS[name])}")
+        profiler = self.profiler
+        if name == "profile" and action == "dump":
+            stats_path, report_path = profiler.dump()
+            print(f"Profile written to {stats_path} and {report_path}.")
+        elif name == "profile":
+            getattr(profiler, action)()
+            print(f"Profiling {'started' if action == 'start' else 'stopped'}.")
+        elif action in ("start", "stop"):
+            getattr(profiler, f"{action}_trace")()
+            print(f"Memory tracing {'started' if action == 'start' else 'stopped'}.")
+        else:
+            print(f"Memory report written to {getattr(profiler, action)()}.")
+
+    def run_script(
+        self, lines: Iterable[str], transaction_size: int = 0, stop_on_error: bool = True
+    ) -> tuple[int, int]:
+        """
+        Runs the commands of a script, one per line, without prompting or paging.
+        Blank lines and lines starting with "#" are skipped, "exit" ends the script.
 
-        self.handler.conn.close()
+        The commands run in one transaction of the handler: every transaction_size
+        commands, or the whole script if 0. Their writes are buffered in the handler's
+        batch; a command reading the database, or a flush, writes them without committing,
+        so that the following commands see them. Only a command that must commit, e.g.
+        profile, commits the current transaction early.
+
+        Parameters:
+            lines (Iterable): The lines of the script.
+            transaction_size (int): Number of commands per transaction, 0 for the whole script.
+            stop_on_error (bool): Whether to stop at the first failing command, rolling back
+                the current transaction, or to log it and go on. A command failing while
+                writing the batch rolls back the current transaction in either case.
+
+        Returns:
+            tuple: Number of commands run and number of failed commands.
+        """
+        thresholds = self.handler.batch.max_rows, self.handler.batch.max_seconds
+        self.handler.batch.max_rows, self.handler.batch.max_seconds = sys.maxsize, float("inf")
+        self.handler.begin_batch()
+        self.commands_instance.interactive = False
+        script = self._read_script(lines)
+        count = errors = 0
+        finished = aborted = False
+        started = time.perf_counter()
+        try:
+            while not (finished or aborted):
+                try:
+                    with self.handler.transaction():
+                        for number, line in script:
+                            count += 1
+                            if not self._run_script_line(number, line):
+                                errors += 1
+                                if stop_on_error:
+                                    aborted = True
+                                    raise ValueError(f"Script stopped on line {number}.")
+                            if transaction_size and count % transaction_size == 0:
+                                break
+                        else:
+                            finished = True
+                except (sqlite3.Error, OSError, ValueError, TypeError) as error:
+                    if not aborted:
+                        errors += 1
+                        print(f"Error at the end of the transaction: {error}")
+                        aborted = stop_on_error
+        finally:
+            self.commands_instance.interactive = True
+            self.handler.batch.stop()
+            self.handler.batch.max_rows, self.handler.batch.max_seconds = thresholds
+        elapsed = time.perf_counter() - started
+        print(
+            f"Ran {count} commands ({errors} failed) in {elapsed:.2f}s "
+            f"({count / elapsed if elapsed > 0 else 0.0:.0f} commands/s)."
+        )
+        return count, errors
+
+    @staticmethod
+    def _read_script(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+        """
+        Reads the commands of a script, skipping blank lines and comments, up to "exit".
+
+        Parameters:
+            lines (Iterable): The lines of the script.
+
+        Yields:
+            tuple: The line number and the command line.
+        """
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.lower() == "exit":
+                return
+            yield number, line
+
+    def _run_script_line(self, number: int, line: str) -> bool:
+        """
+        Runs a command of a script, logging and printing its error if it fails.
+
+        Parameters:
+            number (int): The line number.
+            line (str): The command line.
+
+        Returns:
+            bool: True if the command succeeded, False otherwise.
+        """
+        try:
+            if not self.dispatch(line):
+                raise ValueError(f"Unknown command: {line.split()[0]}")
+        except (sqlite3.Error, OSError, ValueError, TypeError) as error:
+            logging.error("Line %d failed: %s", number, error)
+            print(f"Error on line {number}: {error}")
+            return False
+        return True
 
     def completer(self, text: str, state: int) -> Optional[str]:
         """
-        Provides command completion options.
+        Provides completion options: command names for the first word of the line,
+        entity values of the database for the following words.
+        The options are looked up once, when readline asks for the first one.
 
         Parameters:
             text (str): The current input text.
@@ -80,7 +285,22 @@ class Console:
             str: A completion option that starts with the input text,
                 or None if no more options are available.
         """
-        options = [i for i in self.commands if i.startswith(text)]
-        if state < len(options):
-            return options[state]
+        if state == 0:
+            if self._is_first_word():
+                self._matches = self.command_trie.complete(text, None)
+            else:
+                self._matches = self.entities.complete(text)
+        if state < len(self._matches):
+            return self._matches[state]
         return None
+
+    def _is_first_word(self) -> bool:
+        """
+        Checks if the word being completed is the first word of the line.
+
+        Returns:
+            bool: True if no word precedes the completed one, False otherwise.
+        """
+        if self.readline is None:
+            return True
+        return not self.readline.get_line_buffer()[: self.readline.get_begidx()].strip()
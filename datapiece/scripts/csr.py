@@ -0,0 +1,336 @@
+"""
+This module defines the CSRMatrix class, a compressed sparse row matrix of counts or
+weights built, combined and traversed with vectorized NumPy operations.
+
+Row i of the matrix holds the column indices indices[indptr[i]:indptr[i + 1]], in
+increasing order, and their values at the same positions of data. The three arrays
+are saved as .npy files that can be mapped in memory instead of read. Every save
+writes them to a new version directory and then switches the metadata file to it,
+so that a save is atomic and never replaces a file a reader has mapped.
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional, Union
+
+import numpy as np
+
+CSR_ARRAYS = ("indptr", "indices", "data")
+CSR_META_NAME = "meta.json"
+CSR_VERSION_PREFIX = "arrays-"
+# Key of the metadata file naming the version directory of the arrays.
+CSR_VERSION_KEY = "arrays"
+WEIGHT_TOLERANCE = 1e-9
+
+
+def load_meta(directory: str) -> dict:
+    """
+    Reads the metadata saved with a matrix, without its arrays.
+
+    Parameters:
+        directory (str): The directory of the matrix.
+
+    Returns:
+        dict: The metadata.
+
+    Raises:
+        FileNotFoundError: If the matrix was not saved to the directory.
+    """
+    with open(os.path.join(directory, CSR_META_NAME), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    meta.pop(CSR_VERSION_KEY, None)
+    return meta
+
+
+def get_group_pair_positions(groups: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns every ordered pair of distinct positions sharing a group.
+    The number of pairs grows with the square of the group sizes only.
+
+    Parameters:
+        groups (np.ndarray): The group of every position, sorted.
+
+    Returns:
+        tuple: The first and second positions of the pairs.
+    """
+    if len(groups) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    sizes = np.diff(np.r_[starts, len(groups)])
+    # Every value is paired with every value of its group, itself included.
+    element_sizes = np.repeat(sizes, sizes)
+    element_starts = np.repeat(starts, sizes)
+    left = np.repeat(np.arange(len(groups)), element_sizes)
+    first_pair = np.cumsum(element_sizes) - element_sizes
+    right = np.repeat(element_starts, element_sizes) + (
+        np.arange(len(left)) - np.repeat(first_pair, element_sizes)
+    )
+    distinct = left != right
+    return left[distinct], right[distinct]
+
+
+def get_group_pairs(groups: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns every ordered pair of distinct values sharing a group, e.g. the characters
+    sharing a panel.
+
+    Parameters:
+        groups (np.ndarray): The group of every value, sorted.
+        values (np.ndarray): The values, distinct within a group.
+
+    Returns:
+        tuple: The first and second values of the pairs.
+    """
+    left, right = get_group_pair_positions(groups)
+    return values[left], values[right]
+
+
+class CSRMatrix:
+    """
+    A square compressed sparse row matrix of int64 counts or float64 weights,
+    without explicit zeros.
+
+    Attributes:
+        indptr (np.ndarray): Start of every row in indices and data, plus the end of the last.
+        indices (np.ndarray): Column index of every stored value.
+        data (np.ndarray): The stored values.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray) -> None:
+        """
+        Constructs all the necessary attributes for the CSRMatrix object.
+
+        Parameters:
+            indptr (np.ndarray): Start of every row in indices and data, plus the end of the last.
+            indices (np.ndarray): Column index of every stored value.
+            data (np.ndarray): The stored values.
+        """
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @property
+    def size(self) -> int:
+        """
+        The number of rows and columns.
+        """
+        return len(self.indptr) - 1
+
+    @property
+    def nnz(self) -> int:
+        """
+        The number of stored values.
+        """
+        return len(self.data)
+
+    @classmethod
+    def empty(cls, size: int = 0) -> "CSRMatrix":
+        """
+        Returns a matrix without values.
+
+        Parameters:
+            size (int): The number of rows and columns.
+
+        Returns:
+            CSRMatrix: The empty matrix.
+        """
+        return cls(
+            np.zeros(size + 1, dtype=np.int64),
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_coo(
+        cls,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        values: Optional[np.ndarray] = None,
+        size: int = 0,
+    ) -> "CSRMatrix":
+        """
+        Builds a matrix from coordinates, summing the values of repeated coordinates
+        and dropping the zero sums.
+
+        Parameters:
+            rows (np.ndarray): Row index of every value.
+            cols (np.ndarray): Column index of every value.
+            values (np.ndarray, optional): Integer or float values, 1 for every coordinate
+                if omitted.
+            size (int): Minimum number of rows and columns.
+
+        Returns:
+            CSRMatrix: The matrix.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        if len(rows) > 0:
+            size = max(size, int(rows.max()) + 1, int(cols.max()) + 1)
+        values = np.ones(len(rows), dtype=np.int64) if values is None else np.asarray(values)
+        keys, inverse = np.unique(rows * size + cols, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=values, minlength=len(keys))
+        if np.issubdtype(values.dtype, np.integer):
+            sums = np.rint(sums).astype(np.int64)
+            nonzero = sums != 0
+        else:
+            # Weights added and subtracted again leave rounding residues.
+            nonzero = np.abs(sums) > WEIGHT_TOLERANCE
+        keys, sums = keys[nonzero], sums[nonzero]
+        counts = np.bincount(keys // size, minlength=size) if size else np.zeros(0, np.int64)
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return cls(indptr, keys % size if size else keys, sums)
+
+    def to_coo(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the coordinates and values of the stored values.
+
+        Returns:
+            tuple: The row indices, column indices and values.
+        """
+        rows = np.repeat(np.arange(self.size, dtype=np.int64), np.diff(self.indptr))
+        return rows, np.asarray(self.indices), np.asarray(self.data)
+
+    def add(self, other: "CSRMatrix") -> "CSRMatrix":
+        """
+        Returns the sum of two matrices, the larger size of both.
+
+        Parameters:
+            other (CSRMatrix): The matrix to add.
+
+        Returns:
+            CSRMatrix: The sum.
+        """
+        rows, cols, values = self.to_coo()
+        other_rows, other_cols, other_values = other.to_coo()
+        return CSRMatrix.from_coo(
+            np.concatenate([rows, other_rows]),
+            np.concatenate([cols, other_cols]),
+            np.concatenate([values, other_values]),
+            max(self.size, other.size),
+        )
+
+    def row(self, index: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the stored values of a row.
+
+        Parameters:
+            index (int): The row index.
+
+        Returns:
+            tuple: The column indices and values, empty outside of the matrix.
+        """
+        if not 0 <= index < self.size:
+            return self.indices[:0], self.data[:0]
+        start, end = self.indptr[index], self.indptr[index + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def get_edges(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the stored values of several rows at once.
+
+        Parameters:
+            rows (np.ndarray): The row indices.
+
+        Returns:
+            tuple: The row index, column index and value of every stored value of the rows.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.indptr[rows]
+        counts = self.indptr[rows + 1] - starts
+        first = np.cumsum(counts) - counts
+        positions = np.repeat(starts - first, counts) + np.arange(int(counts.sum()))
+        return np.repeat(rows, counts), self.indices[positions], self.data[positions]
+
+    def get(self, row: int, col: int) -> Union[int, float]:
+        """
+        Returns a value of the matrix.
+
+        Parameters:
+            row (int): The row index.
+            col (int): The column index.
+
+        Returns:
+            int | float: The value, 0 if it is not stored.
+        """
+        indices, data = self.row(row)
+        position = int(np.searchsorted(indices, col))
+        if position < len(indices) and indices[position] == col:
+            return data[position].item()
+        return 0
+
+    def save(self, directory: str, meta: Optional[dict] = None) -> None:
+        """
+        Writes the arrays of the matrix, and its metadata, to a directory.
+        The arrays are written to a new version directory, then the metadata file naming
+        it replaces the previous one, so that readers see either the previous or the new
+        matrix, and the arrays they mapped are never overwritten. The previous versions
+        are removed, unless they are still mapped on a system that forbids it.
+        One process at a time is expected to save to a directory.
+
+        Parameters:
+            directory (str): The directory of the matrix.
+            meta (dict, optional): Metadata saved with the matrix.
+        """
+        os.makedirs(directory, exist_ok=True)
+        version_dir = tempfile.mkdtemp(prefix=CSR_VERSION_PREFIX, dir=directory)
+        for name in CSR_ARRAYS:
+            with open(os.path.join(version_dir, f"{name}.npy"), "wb") as f:
+                np.save(f, np.asarray(getattr(self, name)))
+        version = os.path.basename(version_dir)
+        path = os.path.join(directory, CSR_META_NAME)
+        with open(f"{path}.{os.getpid()}.tmp", "w", encoding="utf-8") as f:
+            json.dump({**(meta or {}), CSR_VERSION_KEY: version}, f, indent=2)
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+        for entry in os.listdir(directory):
+            if entry.startswith(CSR_VERSION_PREFIX) and entry != version:
+                shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+            elif entry in (f"{name}.npy" for name in CSR_ARRAYS):
+                # The arrays of the unversioned layout.
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(directory, entry))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> tuple["CSRMatrix", dict]:
+        """
+        Reads a matrix written by save.
+
+        Parameters:
+            directory (str): The directory of the matrix.
+            mmap (bool): Whether to map the arrays in memory, read-only, instead of reading them.
+
+        Returns:
+            tuple: The matrix and its metadata.
+
+        Raises:
+            FileNotFoundError: If the matrix was not saved to the directory.
+        """
+        try:
+            return cls._load_version(directory, mmap)
+        except FileNotFoundError:
+            # A save may have removed the version between reading the metadata and the arrays.
+            return cls._load_version(directory, mmap)
+
+    @classmethod
+    def _load_version(cls, directory: str, mmap: bool) -> tuple["CSRMatrix", dict]:
+        """
+        Reads the metadata of a matrix and the arrays of the version it names.
+
+        Parameters:
+            directory (str): The directory of the matrix.
+            mmap (bool): Whether to map the arrays in memory, read-only, instead of reading them.
+
+        Returns:
+            tuple: The matrix and its metadata.
+        """
+        with open(os.path.join(directory, CSR_META_NAME), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays_dir = os.path.join(directory, meta.pop(CSR_VERSION_KEY, ""))
+        arrays = [
+            np.load(os.path.join(arrays_dir, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in CSR_ARRAYS
+        ]
+        return CSRMatrix(*arrays), meta
@@ -2,25 +2,78 @@
 This module defines the DBQueryHandler class for handling database queries.
 """
 
+import contextlib
+import itertools
 import logging
 import os
+import re
 import sqlite3
+import threading
+import time
+from functools import partial
+from typing import Any, Generator, Iterable, Iterator, Optional, Sequence
 
-from datapiece.scripts.utils.config import get_key_str
-from datapiece.scripts.utils.files import (is_readable_existing_file,
+from datapiece.scripts.checkpointer import Checkpointer
+from datapiece.scripts.connection_pool import DEFAULT_POOL_SIZE, ConnectionPool
+from datapiece.scripts.id_allocator import DEFAULT_ID_BLOCK_SIZE, IdAllocator
+from datapiece.scripts.maintenance import (DEFAULT_MAINTENANCE_INTERVAL,
+                                           Maintenance)
+from datapiece.scripts.profiles import get_pragma_statements, merge_profiles
+from datapiece.scripts.query_cache import (DEFAULT_CACHE_MAX_BYTES, QueryCache,
+                                           get_rows_size)
+from datapiece.scripts.query_stats import (DEFAULT_SLOW_LOG_SIZE,
+                                           DEFAULT_SLOW_QUERY_MS, QueryStats)
+from datapiece.scripts.template_cache import (build_template, clone_template,
+                                              get_template_path)
+from datapiece.scripts.utils.config import (get_key_dict, get_key_float,
+                                            get_key_int, get_key_str)
+from datapiece.scripts.utils.files import (is_path_existent,
+                                           is_readable_existing_file,
                                            is_writeable_file_directory)
+from datapiece.scripts.utils.sql import format_query_plan, split_sql_statements
+from datapiece.scripts.write_batch import (DEFAULT_BATCH_MAX_ROWS,
+                                           DEFAULT_BATCH_MAX_SECONDS,
+                                           WriteBatch)
 
+DEFAULT_STATEMENT_CACHE_SIZE = 256
+DEFAULT_FETCH_SIZE = 500
+DEFAULT_CHECKPOINT_INTERVAL = 30.0
+MEMORY_DB_PATH = ":memory:"
 
-class DBQueryHandler:
+INDEX_NAME_PATTERN = re.compile(
+    r"CREATE\s+INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE
+)
+
+
+class DBQueryHandler:  # pylint: disable=too-many-instance-attributes
     """
     A handler for database queries.
 
     Attributes:
         schema_file (str): Path to the schema file.
+        index_file (str): Path to the file with the maintained index set.
+        template_dir (str): Directory of the cached template databases, empty to disable them.
         db_path (str): Path to the SQLite database file.
         delete_db (bool): Flag indicating whether to delete the existing database.
         conn (sqlite3.Connection): SQLite database connection.
         cursor (sqlite3.Cursor): SQLite database cursor.
+        batch (WriteBatch): Buffer of the writes waiting to be committed together.
+        fetch_size (int): Number of rows read per fetchmany call.
+        profiles (dict): Connection performance profiles, by name.
+        profile (str): Name of the active profile, empty if none was applied.
+        in_memory (bool): Flag indicating whether the database is worked on in memory
+            and periodically checkpointed to db_path.
+        lock (threading.RLock): Serializes the use of the connection across threads.
+        pool (ConnectionPool): Read-only connections for concurrent readers
+            and the shared writer connection.
+        maintenance (Maintenance): Runs ANALYZE, PRAGMA optimize, incremental vacuum
+            and WAL checkpoints, in the background once enough rows were written.
+        query_cache (QueryCache): Results of the read queries, evicted by the writes
+            to the tables they read. Disabled unless query_cache.max_entries is set.
+        stats (QueryStats): Latency and row counts of the statements by shape, commits
+            and the slow-query log.
+        id_allocator (IdAllocator): Hands out the IDs of the tables from blocks reserved
+            in the Sequences table.
     """
 
     def __init__(self, config: dict, delete_db: bool = False) -> None:
@@ -33,13 +86,154 @@ class DBQueryHandler:
         """
 
         self.schema_file = get_key_str(config, "schema")
+        self.index_file = get_key_str(config, "indexes")
+        self.template_dir = get_key_str(config, "template_dir")
         self.db_path = get_key_str(config, "db")
         self.test_mode = get_key_str(config, "mode") == "test"
         self.delete_db = delete_db
+        batch_config = get_key_dict(config, "batch")
+        self.batch = WriteBatch(
+            get_key_int(batch_config, "max_rows", DEFAULT_BATCH_MAX_ROWS),
+            get_key_float(batch_config, "max_seconds", DEFAULT_BATCH_MAX_SECONDS),
+        )
+        self.fetch_size = get_key_int(config, "fetch_size", DEFAULT_FETCH_SIZE)
+        self.profiles = merge_profiles(get_key_dict(config, "profiles"))
+        self.profile = ""
+        self.in_memory = bool(config.get("in_memory", False))
+        self.lock = threading.RLock()
+        self._transaction_open = False
+        cache_config = get_key_dict(config, "query_cache")
+        self.query_cache = QueryCache(
+            get_key_int(cache_config, "max_entries"),
+            get_key_int(cache_config, "max_bytes", DEFAULT_CACHE_MAX_BYTES),
+        )
+        stats_config = get_key_dict(config, "stats")
+        self.stats = QueryStats(
+            bool(stats_config.get("enabled", True)),
+            get_key_float(stats_config, "slow_query_ms", DEFAULT_SLOW_QUERY_MS),
+            get_key_int(stats_config, "slow_log_size", DEFAULT_SLOW_LOG_SIZE),
+        )
+        self._disk_conn: Optional[sqlite3.Connection] = None
+        self._checkpointer = Checkpointer(
+            self.checkpoint,
+            get_key_float(config, "checkpoint_interval", DEFAULT_CHECKPOINT_INTERVAL),
+        )
         self._handle_database_deletion()
-        self.conn = sqlite3.connect(self.db_path)
+        is_new_database = not is_path_existent(self.db_path)
+        is_cloned = is_new_database and self._clone_template()
+        cached_statements = get_key_int(
+            config, "statement_cache_size", DEFAULT_STATEMENT_CACHE_SIZE
+        )
+        self.conn = sqlite3.connect(
+            self.db_path, cached_statements=cached_statements, check_same_thread=False
+        )
+        self.cursor = self.conn.cursor()
+        if is_new_database and not is_cloned:
+            self._connect_to_database()
+        if self.in_memory:
+            self._load_into_memory(cached_statements)
+        self.id_allocator = IdAllocator(
+            self.conn,
+            self.lock,
+            get_key_int(get_key_dict(config, "ids"), "block_size", DEFAULT_ID_BLOCK_SIZE),
+            self.query_cache.invalidate,
+        )
+        self.pool = ConnectionPool(
+            "" if self.in_memory else self.db_path,
+            self.conn,
+            self.lock,
+            get_key_int(config, "pool_size", DEFAULT_POOL_SIZE),
+            self.query_cache.clear,
+            self.id_allocator.discard,
+        )
+        maintenance_config = get_key_dict(config, "maintenance")
+        self.maintenance = Maintenance(
+            self.conn,
+            self.lock,
+            "" if self.in_memory else self.db_path,
+            get_key_dict(maintenance_config, "thresholds"),
+        )
+        self._maintainer = Checkpointer(
+            self.maintenance.run_due,
+            get_key_float(maintenance_config, "interval", DEFAULT_MAINTENANCE_INTERVAL),
+            "maintenance",
+        )
+        if maintenance_config.get("scheduled", False):
+            self._maintainer.start()
+        if get_key_str(config, "profile"):
+            self.apply_profile(get_key_str(config, "profile"))
+
+    def apply_profile(self, name: str) -> None:
+        """
+        Applies a connection performance profile, flushing any pending batch first.
+
+        Parameters:
+            name (str): Name of the profile.
+
+        Raises:
+            ValueError: If the profile is unknown or invalid.
+        """
+        if name not in self.profiles:
+            raise ValueError(f"Unknown profile: {name}")
+        statements = get_pragma_statements(self.profiles[name])
+        with self.lock:
+            self.flush()
+            self.conn.commit()
+            for statement in statements:
+                self.conn.execute(statement).fetchall()
+        self.profile = name
+
+    def _load_into_memory(self, cached_statements: int) -> None:
+        """
+        Copies the on-disk database into an in-memory one that becomes the working
+        connection, and starts the background checkpoints to disk.
+
+        Parameters:
+            cached_statements (int): Statement cache size of the in-memory connection.
+        """
+        memory_conn = sqlite3.connect(
+            MEMORY_DB_PATH, cached_statements=cached_statements, check_same_thread=False
+        )
+        self.conn.commit()
+        self.conn.backup(memory_conn)
+        self._disk_conn = self.conn
+        self.conn = memory_conn
         self.cursor = self.conn.cursor()
-        self._connect_to_database()
+        self._checkpointer.start()
+
+    def checkpoint(self) -> bool:
+        """
+        Writes the in-memory database to db_path with the online backup API.
+        Only committed data is written: the checkpoint is skipped while
+        a transaction is open.
+
+        Returns:
+            bool: True if the database was written, False otherwise.
+        """
+        if self._disk_conn is None:
+            return False
+        with self.lock:
+            if self.conn.in_transaction:
+                return False
+            self.conn.backup(self._disk_conn)
+        return True
+
+    def maintain(self, steps: Optional[Sequence[str]] = None) -> list[tuple[str, float, int]]:
+        """
+        Flushes any pending batch and runs maintenance steps.
+
+        Parameters:
+            steps (Sequence, optional): Names of the steps, every step if omitted.
+
+        Returns:
+            list[tuple]: The (step, seconds, freed bytes) of every step that ran.
+
+        Raises:
+            ValueError: If a step is unknown.
+        """
+        with self.lock:
+            self.flush()
+            return self.maintenance.run(steps)
 
     def _handle_database_deletion(self) -> None:
         """
@@ -61,29 +255,74 @@ class DBQueryHandler:
         """
         Connects to the SQLite database.
         """
-        if is_writeable_file_directory(self.db_path):
+        if self.db_path == MEMORY_DB_PATH or is_writeable_file_directory(self.db_path):
             self._create_database()
 
     def _create_database(self) -> None:
         """
-        Creates the database schema if necessary.
+        Creates the database schema and the maintained indexes if necessary.
 
         """
-        sql_commands = self._load_commands_from_schema()
+        sql_commands = self._load_commands_from_schema() + self._load_index_commands()
         self._execute_sql_commands_list(sql_commands)
 
+    def _clone_template(self) -> bool:
+        """
+        Creates the database as a copy of the cached template database,
+        building the template first if the schema files changed.
+
+        Returns:
+            bool: True if the database was cloned, False if templates are disabled,
+                the database is not a file or the schema could not be loaded.
+        """
+        if not self.template_dir or self.db_path == MEMORY_DB_PATH:
+            return False
+        template_path = get_template_path(
+            self.template_dir, [self.schema_file, self.index_file]
+        )
+        if not is_readable_existing_file(template_path):
+            sql_commands = self._load_commands_from_schema() + self._load_index_commands()
+            if not sql_commands:
+                return False
+            build_template(template_path, sql_commands)
+        clone_template(template_path, self.db_path)
+        return True
+
     def _load_commands_from_schema(self) -> list[str]:
         """
         Loads the SQL commands from the schema file.
 
+        Returns:
+            list[str]: List of SQL commands.
+        """
+        return self._load_commands_from_file(self.schema_file)
+
+    def _load_index_commands(self) -> list[str]:
+        """
+        Loads the CREATE INDEX commands from the index file, if one is configured.
+
+        Returns:
+            list[str]: List of SQL commands.
+        """
+        if not self.index_file:
+            return []
+        return self._load_commands_from_file(self.index_file)
+
+    def _load_commands_from_file(self, sql_file: str) -> list[str]:
+        """
+        Loads the SQL commands from a file.
+
+        Parameters:
+            sql_file (str): Path to the SQL file.
+
         Returns:
             list[str]: List of SQL commands.
         """
         try:
-            with open(self.schema_file, "r", encoding="utf-8") as f:
-                return f.read().split(";")
+            with open(sql_file, "r", encoding="utf-8") as f:
+                return split_sql_statements(f.read())
         except FileNotFoundError:
-            logging.error("Schema file %s does not exist.", self.schema_file)
+            logging.error("SQL file %s does not exist.", sql_file)
             return []
 
     def _execute_sql_commands_list(self, sql_commands: list[str]) -> None:
@@ -95,21 +334,467 @@ class DBQueryHandler:
         """
         for command in sql_commands:
             self.execute_query(command, commit=False)
-        self.conn.commit()
+        self._commit()
 
     def execute_query(self, query: str, commit=True) -> None:
         """
         Executes the given SQL query and commits the changes.
+        While a batch is open the query is buffered instead and written on the next flush.
 
         Parameters:
             query (str): SQL query.
         """
-        self.cursor.execute(query)
-        if commit:
-            self.conn.commit()
+        self.execute(query, commit=commit)
+
+    def execute(
+        self, query: str, params: Sequence[Any] = (), commit: bool = True
+    ) -> None:
+        """
+        Executes the given SQL query with bound parameters and commits the changes.
+        While a batch is open the query is buffered instead and written on the next flush.
+
+        Parameters:
+            query (str): SQL query with "?" placeholders.
+            params (Sequence): Values bound to the placeholders.
+            commit (bool): Whether to commit after the query.
+        """
+        if self.batch.active:
+            self._buffer(query, tuple(params))
+            return
+        with self.lock:
+            self._invalidate_cache(query, params)
+            self._run(query, params)
+            if commit:
+                self._commit()
+
+    def executemany(
+        self, query: str, rows: Iterable[Sequence[Any]], commit: bool = True
+    ) -> None:
+        """
+        Executes the given SQL query once for every parameter row and commits the changes.
+        While a batch is open the rows are buffered instead and written on the next flush.
+
+        Parameters:
+            query (str): SQL query with "?" placeholders.
+            rows (Iterable): Parameter rows bound to the placeholders.
+            commit (bool): Whether to commit after the query.
+        """
+        if self.batch.active:
+            if self.batch.add_many(query, [tuple(row) for row in rows]):
+                self.flush()
+            return
+        with self.lock:
+            if len(self.query_cache) > 0:
+                rows = iter(rows)
+                first = next(rows, None)
+                if first is not None:
+                    self._invalidate_cache(query, first)
+                    rows = itertools.chain([first], rows)
+            self._run(query, rows, many=True)
+            if commit:
+                self._commit()
+
+    def execute_transaction(self, statements: Iterable[tuple[str, Sequence[Any]]]) -> None:
+        """
+        Executes the given statements immediately in one transaction,
+        after flushing any pending batch. The transaction is rolled back if a statement fails.
+
+        Parameters:
+            statements (Iterable): Pairs of SQL query and bound parameters.
+        """
+        with self.lock:
+            self.flush()
+            try:
+                for query, params in statements:
+                    self._invalidate_cache(query, params)
+                    self._run(query, params)
+                self._commit()
+            except sqlite3.Error:
+                self._rollback()
+                raise
+
+    def fetch_batches(
+        self,
+        query: str,
+        params: Sequence[Any] = (),
+        batch_size: Optional[int] = None,
+        as_rows: bool = False,
+    ) -> Generator[list[Any], None, None]:
+        """
+        Lazily runs a read query and yields its result in fetchmany batches.
+        Pending batch writes are flushed first so that they are visible to the query.
+        With the query cache enabled, a result read outside of a transaction is cached
+        once it was read to the end, unless it is larger than the cache.
+
+        Parameters:
+            query (str): SQL query with "?" placeholders.
+            params (Sequence): Values bound to the placeholders.
+            batch_size (int, optional): Rows per batch, fetch_size if omitted.
+            as_rows (bool): Whether to return sqlite3.Row objects instead of tuples.
+
+        Yields:
+            list: A non-empty batch of rows.
+        """
+        self.flush()
+        batch_size = batch_size or self.fetch_size
+        key = self.query_cache.get_key(query, params, as_rows) if self.query_cache.enabled else None
+        if key is not None:
+            with self.lock:
+                self.query_cache.sync(self.conn)
+                collected: Optional[list[Any]] = None if self.conn.in_transaction else []
+                changes = self.conn.total_changes
+            cached = self.query_cache.get(key)
+            if cached is not None:
+                for start in range(0, len(cached), batch_size):
+                    yield cached[start:start + batch_size]
+                return
+        else:
+            collected, changes = None, 0
+        collected_size = 0
+        batches = self._read_batches(query, params, batch_size, as_rows)
+        try:
+            for batch in batches:
+                if collected is not None:
+                    collected.extend(batch)
+                    collected_size += get_rows_size(batch)
+                    if collected_size > self.query_cache.max_bytes:
+                        collected = None
+                yield batch
+        finally:
+            batches.close()
+        if key is not None and collected is not None:
+            with self.lock:
+                # A write between two batches may have made the collected rows stale.
+                if self.conn.total_changes != changes:
+                    return
+                tables, _ = self.query_cache.get_tables(self.conn, query, params)
+                self.query_cache.put(key, collected, tables)
+
+    def _read_batches(
+        self, query: str, params: Sequence[Any], batch_size: int, as_rows: bool
+    ) -> Generator[list[Any], None, None]:
+        """
+        Runs a read query on its own cursor and yields its result in fetchmany batches.
+        The time spent in SQLite and the number of rows are recorded once the cursor is closed.
+
+        Parameters:
+            query (str): SQL query with "?" placeholders.
+            params (Sequence): Values bound to the placeholders.
+            batch_size (int): Rows per batch.
+            as_rows (bool): Whether to return sqlite3.Row objects instead of tuples.
+
+        Yields:
+            list: A non-empty batch of rows.
+        """
+        rows_count = 0
+        elapsed: Optional[float] = None
+        cursor = self.conn.cursor()
+        if as_rows:
+            cursor.row_factory = sqlite3.Row  # type: ignore[assignment]
+        try:
+            with self.lock:
+                started = time.perf_counter()
+                cursor.execute(query, params)
+                elapsed = time.perf_counter() - started
+            while True:
+                with self.lock:
+                    started = time.perf_counter()
+                    batch = cursor.fetchmany(batch_size)
+                    elapsed += time.perf_counter() - started
+                if not batch:
+                    break
+                rows_count += len(batch)
+                yield batch
+        finally:
+            cursor.close()
+            if elapsed is not None:
+                self.stats.record(
+                    query, elapsed, rows_count, partial(self._get_query_plan, query, params)
+                )
+
+    def fetch(
+        self,
+        query: str,
+        params: Sequence[Any] = (),
+        batch_size: Optional[int] = None,
+        as_rows: bool = False,
+    ) -> Generator[Any, None, None]:
+        """
+        Lazily runs a read query and yields its rows one by one,
+        reading them from SQLite in fetchmany batches.
+
+        Parameters:
+            query (str): SQL query with "?" placeholders.
+            params (Sequence): Values bound to the placeholders.
+            batch_size (int, optional): Rows per fetchmany call, fetch_size if omitted.
+            as_rows (bool): Whether to return sqlite3.Row objects instead of tuples.
+
+        Yields:
+            tuple | sqlite3.Row: A row of the result.
+        """
+        for batch in self.fetch_batches(query, params, batch_size, as_rows):
+            yield from batch
+
+    def begin_batch(self) -> None:
+        """
+        Starts buffering writes so that they are committed together in a single transaction.
+        """
+        if not self.batch.active:
+            self.batch.start()
+
+    def flush(self) -> int:
+        """
+        Writes every buffered statement in one transaction, grouping consecutive
+        statements with the same SQL into a single executemany call.
+        The transaction is rolled back if any statement fails.
+
+        Returns:
+            int: Number of rows written.
+        """
+        groups, rows_count = self.batch.drain()
+        if not groups:
+            return 0
+        with self.lock:
+            try:
+                for query, rows in groups:
+                    if not rows:
+                        continue
+                    self._invalidate_cache(query, rows[0])
+                    if len(rows) == 1:
+                        self._run(query, rows[0])
+                    else:
+                        self._run(query, rows, many=True)
+                self._commit()
+            except sqlite3.Error as error:
+                self._rollback()
+                logging.error("Batch of %d rows rolled back: %s", rows_count, error)
+                raise
+        return rows_count
+
+    def end_batch(self) -> int:
+        """
+        Flushes the buffered writes and leaves batch mode.
+
+        Returns:
+            int: Number of rows written by the final flush.
+        """
+        try:
+            return self.flush()
+        finally:
+            self.batch.stop()
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Runs the writes of a block, buffered or not, in one transaction: the commits of
+        flush and of the write methods are deferred to the end of the block, where the
+        transaction is committed, or rolled back with the buffered writes if the block
+        raises. Reads on the handler's connection see the uncommitted writes.
+        The lock is held for the whole block, and a nested block joins the outer one.
+
+        Yields:
+            None
+        """
+        with self.lock:
+            if self._transaction_open:
+                yield
+                return
+            self.flush()
+            self._transaction_open = True
+            try:
+                yield
+                self.flush()
+            except BaseException:
+                self.batch.drain()
+                self._rollback()
+                raise
+            finally:
+                self._transaction_open = False
+            self._commit()
+
+    def _buffer(self, query: str, params: tuple) -> None:
+        """
+        Adds a statement to the batch buffer and flushes it when a threshold is reached.
+
+        Parameters:
+            query (str): SQL query.
+            params (tuple): Parameters bound to the query.
+        """
+        if self.batch.add(query, params):
+            self.flush()
+
+    def _run(self, query: str, params: Any, many: bool = False) -> None:
+        """
+        Executes a statement on the handler cursor and records its latency and written rows.
+        Must be called with the lock held.
+
+        Parameters:
+            query (str): SQL query with "?" placeholders.
+            params (Any): Values bound to the placeholders, or parameter rows if many is set.
+            many (bool): Whether to execute the statement once per parameter row.
+        """
+        started = time.perf_counter()
+        if many:
+            # The first row is kept to explain the statement if it is slow.
+            if isinstance(params, list):
+                first = params[0] if params else ()
+            else:
+                rows = iter(params)
+                first = next(rows, None)
+                params = rows if first is None else itertools.chain([first], rows)
+            self.cursor.executemany(query, params)
+        else:
+            first = params
+            self.cursor.execute(query, params)
+        self.stats.record(
+            query,
+            time.perf_counter() - started,
+            max(self.cursor.rowcount, 0),
+            partial(self._get_query_plan, query, first or ()),
+        )
+
+    def _commit(self) -> None:
+        """
+        Commits the open transaction and records the commit time.
+        Inside a transaction block, the commit is left to the end of the block.
+        """
+        if self._transaction_open:
+            return
+        started = time.perf_counter()
+        self.conn.commit()
+        self.stats.record_commit(time.perf_counter() - started)
+
+    def _rollback(self) -> None:
+        """
+        Rolls back the open transaction and drops the reserved IDs, whose reservation
+        may have been part of it.
+        """
+        self.conn.rollback()
+        self.id_allocator.discard()
+
+    def _get_query_plan(self, query: str, params: Sequence[Any] = ()) -> list[str]:
+        """
+        Returns the query plan of a statement for the slow-query log.
+
+        Parameters:
+            query (str): SQL query.
+            params (Sequence): Values bound to the placeholders.
+
+        Returns:
+            list[str]: One line per plan step, empty if the statement cannot be explained.
+        """
+        try:
+            with self.lock:
+                return format_query_plan(
+                    self.conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+                )
+        except sqlite3.Error:
+            return []
+
+    def _invalidate_cache(self, query: str, params: Sequence[Any]) -> None:
+        """
+        Evicts the cached results reading a table written by a statement.
+        The whole cache is cleared if the statement cannot be compiled.
+
+        Parameters:
+            query (str): SQL statement about to be executed.
+            params (Sequence): Values bound to the placeholders.
+        """
+        if len(self.query_cache) == 0:
+            return
+        try:
+            _, written = self.query_cache.get_tables(self.conn, query, params)
+        except sqlite3.Error:
+            self.query_cache.clear()
+            return
+        self.query_cache.invalidate(written)
+
+    def get_index_names(self) -> list[str]:
+        """
+        Returns the names of the indexes declared in the index file.
+
+        Returns:
+            list[str]: List of index names.
+        """
+        return [
+            match.group(1)
+            for command in self._load_index_commands()
+            if (match := INDEX_NAME_PATTERN.search(command))
+        ]
+
+    def get_existing_indexes(self) -> set[str]:
+        """
+        Returns the names of the indexes currently present in the database.
+
+        Returns:
+            set[str]: Set of index names.
+        """
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"
+        )
+        return {row[0] for row in rows}
+
+    def create_indexes(self) -> list[str]:
+        """
+        Creates every index of the index file that does not exist yet.
+
+        Returns:
+            list[str]: Names of the indexes in the index file.
+        """
+        self.flush()
+        self._execute_sql_commands_list(self._load_index_commands())
+        return self.get_index_names()
+
+    def drop_indexes(self) -> list[str]:
+        """
+        Drops every index of the index file, e.g. before a bulk load.
+
+        Returns:
+            list[str]: Names of the dropped indexes.
+        """
+        self.flush()
+        names = self.get_index_names()
+        self._execute_sql_commands_list([f"DROP INDEX IF EXISTS {name}" for name in names])
+        return names
+
+    def rebuild_indexes(self) -> list[str]:
+        """
+        Drops and creates again every index of the index file.
+
+        Returns:
+            list[str]: Names of the rebuilt indexes.
+        """
+        self.drop_indexes()
+        return self.create_indexes()
+
+    def explain(self, query: str, params: Sequence[Any] = ()) -> list[tuple]:
+        """
+        Returns the query plan chosen by SQLite for the given query.
+
+        Parameters:
+            query (str): SQL query.
+            params (Sequence): Values bound to the placeholders.
+
+        Returns:
+            list[tuple]: Rows of (id, parent, notused, detail).
+        """
+        self.flush()
+        return self.conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
 
     def close(self) -> None:
         """
-        Closes the database connection"
+        Flushes any pending batch, writes the last checkpoint of an in-memory database
+        and closes the database connections.
         """
+        if self.batch.active:
+            self.end_batch()
+        self._maintainer.stop()
+        self._checkpointer.stop()
+        self.pool.close()
+        if self._disk_conn is not None:
+            self.conn.commit()
+            self.checkpoint()
+            self._disk_conn.close()
+            self._disk_conn = None
         self.conn.close()
@@ -0,0 +1,382 @@
+"""
+This module exports the analysis tables as column-oriented NumPy files.
+
+Every column of a table is written to its own .npy file, so that analysis code can
+memory-map it with numpy.load(path, mmap_mode="r") and use it without copying or
+parsing. Text columns are dictionary-encoded: the column holds int32 codes into
+a separate array of the distinct values, and -1 for NULL. Integer columns hold -1
+for NULL or non-integer values.
+
+The rows are streamed in chunks into files mapped in memory, so the memory used
+does not grow with the table. A manifest records the row count and highest rowid of
+every exported table; a table whose count and highest rowid did not change since
+its last export is skipped. Rows updated in place are only exported again with force.
+"""
+
+import json
+import os
+import time
+from typing import Any, Iterable, Mapping, Optional
+
+import numpy as np
+
+from datapiece.scripts.db_query_handler import DBQueryHandler
+
+DEFAULT_EXPORT_DIR = "exports"
+DEFAULT_EXPORT_CHUNK_SIZE = 65536
+MANIFEST_NAME = "manifest.json"
+NULL_VALUE = -1
+
+CATEGORY = "category"
+
+# Exported columns and their NumPy type, CATEGORY for the dictionary-encoded text columns.
+EXPORT_TABLES: dict[str, dict[str, str]] = {
+    "Chapters": {
+        "ChapterID": "int32",
+        "VolumeNumber": "int32",
+        "ArcID": "int32",
+        "ChapterNumber": "int32",
+        "ChapterName": CATEGORY,
+    },
+    "Pages": {
+        "PageID": "int32",
+        "ChapterID": "int32",
+        "PageNumber": "int32",
+        "IsColorSpread": "bool",
+        "IsDoubleSpread": "bool",
+        "IsCoverPage": "bool",
+        "IsColorCover": "bool",
+        "IsCoverStory": "bool",
+        "IsFanRequest": "bool",
+        "IsAnimalTheater": "bool",
+        "IsOther": "bool",
+    },
+    "Panels": {
+        "PanelID": "int32",
+        "PageID": "int32",
+        "PanelNumber": "int32",
+        "IsFlashback": "bool",
+        "Location": CATEGORY,
+    },
+    "Characters": {
+        "CharacterID": "int32",
+        "Name": CATEGORY,
+        "Gender": CATEGORY,
+        "Race": CATEGORY,
+        "Height": "int32",
+        "HairColor": CATEGORY,
+    },
+    "CharacterAppearances": {
+        "AppearanceID": "int32",
+        "CharacterID": "int32",
+        "PanelID": "int32",
+    },
+    "CharacterEvents": {
+        "EventID": "int32",
+        "AppearanceID": "int32",
+        "PanelID": "int32",
+        "FruitID": "int32",
+        "AffiliationID": "int32",
+        "AbilityID": "int32",
+        "Bounty": "int64",
+        "Status": CATEGORY,
+    },
+}
+
+
+def get_column_expression(column: str, dtype: str) -> str:
+    """
+    Returns the SQL expression reading a column as the values of its NumPy type.
+
+    Parameters:
+        column (str): Name of the column.
+        dtype (str): NumPy type of the column, or CATEGORY.
+
+    Returns:
+        str: The SQL expression.
+    """
+    if dtype == CATEGORY:
+        return column
+    if dtype == "bool":
+        return f"COALESCE({column}, 0) <> 0"
+    return f"CASE WHEN typeof({column}) = 'integer' THEN {column} ELSE {NULL_VALUE} END"
+
+
+def get_column_paths(directory: str, table: str, column: str) -> tuple[str, str]:
+    """
+    Returns the paths of the files of an exported column.
+
+    Parameters:
+        directory (str): The export directory.
+        table (str): Name of the table.
+        column (str): Name of the column.
+
+    Returns:
+        tuple: Paths of the values, or codes, and of the distinct values of a text column.
+    """
+    base = os.path.join(directory, table, column)
+    return f"{base}.npy", f"{base}.categories.npy"
+
+
+def read_manifest(directory: str) -> dict[str, Any]:
+    """
+    Reads the manifest of an export directory.
+
+    Parameters:
+        directory (str): The export directory.
+
+    Returns:
+        dict: The fingerprint and columns of every exported table, empty if nothing was exported.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_manifest(directory: str, manifest: dict[str, Any]) -> None:
+    """
+    Replaces the manifest of an export directory.
+
+    Parameters:
+        directory (str): The export directory.
+        manifest (dict): The fingerprint and columns of every exported table.
+    """
+    path = os.path.join(directory, MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def get_fingerprint(handler: DBQueryHandler, table: str) -> dict[str, Any]:
+    """
+    Returns the values telling whether a table changed since its last export.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+        table (str): Name of the table.
+
+    Returns:
+        dict: The row count, the highest rowid and the exported columns.
+    """
+    count, max_rowid = handler.conn.execute(
+        f"SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM {table}"
+    ).fetchone()
+    return {"rows": count, "max_rowid": max_rowid, "columns": EXPORT_TABLES[table]}
+
+
+def is_exported(directory: str, table: str, entry: Optional[dict[str, Any]]) -> bool:
+    """
+    Checks if every file of an exported table is present.
+
+    Parameters:
+        directory (str): The export directory.
+        table (str): Name of the table.
+        entry (dict, optional): The manifest entry of the table.
+
+    Returns:
+        bool: True if the table was exported and its files are present, False otherwise.
+    """
+    if entry is None:
+        return False
+    for column, dtype in EXPORT_TABLES[table].items():
+        values_path, categories_path = get_column_paths(directory, table, column)
+        if not os.path.exists(values_path):
+            return False
+        if dtype == CATEGORY and not os.path.exists(categories_path):
+            return False
+    return True
+
+
+def write_chunk(
+    arrays: Mapping[str, np.ndarray],
+    categories: dict[str, dict[str, int]],
+    offset: int,
+    rows: list[tuple],
+) -> None:
+    """
+    Writes a chunk of rows into the column arrays, encoding the text values.
+
+    Parameters:
+        arrays (dict): The array of every column, in the order of the row values.
+        categories (dict): The code of every distinct value of the text columns,
+            extended with the new values.
+        offset (int): Index of the first row of the chunk in the arrays.
+        rows (list[tuple]): The rows of the chunk.
+    """
+    for (column, array), values in zip(arrays.items(), zip(*rows)):
+        index = categories.get(column)
+        if index is not None:
+            values = tuple(
+                NULL_VALUE if value is None else index.setdefault(str(value), len(index))
+                for value in values
+            )
+        array[offset:offset + len(rows)] = values
+
+
+def export_table(
+    handler: DBQueryHandler,
+    directory: str,
+    table: str,
+    rows_count: int,
+    chunk_size: int = DEFAULT_EXPORT_CHUNK_SIZE,
+) -> None:
+    """
+    Streams the rows of a table into one memory-mapped .npy file per column.
+    Must be called with the lock held, inside the transaction that counted the rows.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+        directory (str): The export directory.
+        table (str): Name of the table.
+        rows_count (int): Number of rows of the table.
+        chunk_size (int): Number of rows read and written at a time.
+    """
+    columns = EXPORT_TABLES[table]
+    os.makedirs(os.path.join(directory, table), exist_ok=True)
+    suffix = f".{os.getpid()}.tmp.npy"
+    arrays = {
+        column: np.lib.format.open_memmap(
+            get_column_paths(directory, table, column)[0] + suffix,
+            mode="w+",
+            dtype="int32" if dtype == CATEGORY else dtype,
+            shape=(rows_count,),
+        )
+        for column, dtype in columns.items()
+    }
+    categories: dict[str, dict[str, int]] = {
+        column: {} for column, dtype in columns.items() if dtype == CATEGORY
+    }
+    expressions = ", ".join(
+        get_column_expression(column, dtype) for column, dtype in columns.items()
+    )
+    cursor = handler.conn.execute(f"SELECT {expressions} FROM {table} ORDER BY rowid")
+    offset = 0
+    try:
+        while offset < rows_count:
+            rows = cursor.fetchmany(min(chunk_size, rows_count - offset))
+            if not rows:
+                break
+            write_chunk(arrays, categories, offset, rows)
+            offset += len(rows)
+    finally:
+        cursor.close()
+    for array in arrays.values():
+        array.flush()
+    # The files are closed with their last reference, before they are renamed.
+    arrays.clear()
+    publish_columns(directory, table, suffix, categories)
+
+
+def publish_columns(
+    directory: str, table: str, suffix: str, categories: dict[str, dict[str, int]]
+) -> None:
+    """
+    Writes the distinct values of the text columns of a table and replaces
+    the previously exported columns with the new ones.
+
+    Parameters:
+        directory (str): The export directory.
+        table (str): Name of the table.
+        suffix (str): Suffix of the temporary files of the new columns.
+        categories (dict): The code of every distinct value of the text columns.
+    """
+    for column in EXPORT_TABLES[table]:
+        values_path, categories_path = get_column_paths(directory, table, column)
+        if column in categories:
+            np.save(categories_path, np.array(list(categories[column]), dtype=str))
+        os.replace(values_path + suffix, values_path)
+
+
+def export_tables(
+    handler: DBQueryHandler,
+    directory: str = DEFAULT_EXPORT_DIR,
+    tables: Optional[Iterable[str]] = None,
+    force: bool = False,
+    chunk_size: int = DEFAULT_EXPORT_CHUNK_SIZE,
+) -> list[tuple[str, int, float, bool]]:
+    """
+    Exports tables as column-oriented .npy files, skipping the unchanged ones.
+    Every table is read in its own transaction, so that its columns are consistent.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+        directory (str): The export directory.
+        tables (Iterable, optional): Names of the tables, every table of EXPORT_TABLES if omitted.
+        force (bool): Whether to export the unchanged tables too.
+        chunk_size (int): Number of rows read and written at a time.
+
+    Returns:
+        list[tuple]: The (table, rows, seconds, skipped) of every table.
+
+    Raises:
+        ValueError: If a table cannot be exported.
+    """
+    names = list(EXPORT_TABLES) if tables is None else list(tables)
+    unknown = [name for name in names if name not in EXPORT_TABLES]
+    if unknown:
+        raise ValueError(f"Unknown export table: {', '.join(unknown)}")
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_manifest(directory)
+    report = []
+    handler.flush()
+    for table in names:
+        started = time.perf_counter()
+        with handler.lock:
+            handler.conn.execute("SAVEPOINT export")
+            try:
+                fingerprint = get_fingerprint(handler, table)
+                skipped = (
+                    not force
+                    and manifest.get(table) == fingerprint
+                    and is_exported(directory, table, manifest.get(table))
+                )
+                if not skipped:
+                    export_table(handler, directory, table, fingerprint["rows"], chunk_size)
+            finally:
+                handler.conn.execute("RELEASE export")
+        if not skipped:
+            manifest[table] = fingerprint
+            write_manifest(directory, manifest)
+        report.append((table, fingerprint["rows"], time.perf_counter() - started, skipped))
+    return report
+
+
+def load_table(directory: str, table: str) -> dict[str, np.ndarray]:
+    """
+    Maps the exported columns of a table in memory, without reading them.
+
+    Parameters:
+        directory (str): The export directory.
+        table (str): Name of the table.
+
+    Returns:
+        dict: The read-only array of every column, with the codes of the text columns.
+
+    Raises:
+        ValueError: If the table was not exported.
+    """
+    entry = read_manifest(directory).get(table)
+    if not is_exported(directory, table, entry):
+        raise ValueError(f"Table {table} was not exported to {directory}.")
+    return {
+        column: np.load(get_column_paths(directory, table, column)[0], mmap_mode="r")
+        for column in entry["columns"]  # type: ignore[index]
+    }
+
+
+def load_categories(directory: str, table: str, column: str) -> np.ndarray:
+    """
+    Loads the distinct values of a dictionary-encoded column, indexed by their codes.
+
+    Parameters:
+        directory (str): The export directory.
+        table (str): Name of the table.
+        column (str): Name of the text column.
+
+    Returns:
+        np.ndarray: The distinct values.
+    """
+    return np.load(get_column_paths(directory, table, column)[1])
@@ -0,0 +1,345 @@
+"""
+This module defines the InteractionGraph class, an in-memory graph of the character
+interactions held in a compact CSR adjacency structure.
+
+Every pair of characters taking part in an interaction is linked by an undirected
+edge whose weight sums the weights of their interactions, given by the interaction
+type and outcome. The CharacterIDs are remapped to consecutive node indices, so that
+the arrays of the graph only grow with the number of interacting characters. The
+traversals and centralities work on whole frontiers or rank vectors at once with
+NumPy instead of visiting the nodes one by one in Python.
+
+The graph remembers the highest InteractionCharacters rowid it includes and only
+reads the participants added since then; the pairs of an interaction that gained
+participants are replaced by its new pairs.
+"""
+
+from typing import Any, Optional
+
+import numpy as np
+
+from datapiece.scripts.csr import CSRMatrix, get_group_pair_positions
+from datapiece.scripts.db_query_handler import DBQueryHandler
+
+DEFAULT_DAMPING = 0.85
+DEFAULT_TOLERANCE = 1e-10
+DEFAULT_MAX_ITERATIONS = 100
+
+PARTICIPANTS_QUERY = (
+    "SELECT InteractionCharacters.rowid, InteractionCharacters.InteractionID, "
+    "InteractionCharacters.CharacterID, CharacterInteractions.InteractionType, "
+    "CharacterInteractions.Outcome "
+    "FROM InteractionCharacters LEFT JOIN CharacterInteractions "
+    "ON CharacterInteractions.InteractionID = InteractionCharacters.InteractionID "
+    "WHERE InteractionCharacters.InteractionID IS NOT NULL "
+    "AND InteractionCharacters.CharacterID IS NOT NULL AND {condition} "
+    "ORDER BY InteractionCharacters.InteractionID, InteractionCharacters.CharacterID"
+)
+
+
+def get_shortest_path(matrix: CSRMatrix, source: int, target: int) -> list[int]:
+    """
+    Finds a path with the fewest edges with a breadth-first search expanding
+    a whole frontier of nodes at a time.
+
+    Parameters:
+        matrix (CSRMatrix): The adjacency matrix.
+        source (int): The start node.
+        target (int): The end node.
+
+    Returns:
+        list[int]: The nodes of the path, from source to target, empty if there is none.
+    """
+    parents = np.full(matrix.size, -1, dtype=np.int64)
+    parents[source] = source
+    frontier = np.array([source], dtype=np.int64)
+    while parents[target] < 0 < len(frontier):
+        sources, targets, _ = matrix.get_edges(frontier)
+        unseen = parents[targets] < 0
+        targets, first = np.unique(targets[unseen], return_index=True)
+        parents[targets] = sources[unseen][first]
+        frontier = targets
+    if parents[target] < 0:
+        return []
+    path = [target]
+    while path[-1] != source:
+        path.append(int(parents[path[-1]]))
+    return path[::-1]
+
+
+def get_pagerank(
+    matrix: CSRMatrix,
+    damping: float = DEFAULT_DAMPING,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_iterations: int = DEFAULT_MAX_ITERATIONS,
+) -> np.ndarray:
+    """
+    Computes the weighted PageRank of every node by power iteration.
+    The rank of the nodes without edges is spread evenly over every node.
+
+    Parameters:
+        matrix (CSRMatrix): The adjacency matrix.
+        damping (float): Probability of following an edge rather than jumping to any node.
+        tolerance (float): Sum of the rank changes under which the iteration stops.
+        max_iterations (int): Maximum number of iterations.
+
+    Returns:
+        np.ndarray: The rank of every node, summing to 1.
+    """
+    size = matrix.size
+    if size == 0:
+        return np.zeros(0)
+    rows, cols, weights = matrix.to_coo()
+    strengths = np.bincount(rows, weights=weights, minlength=size)
+    shares = weights / strengths[rows]
+    isolated = strengths == 0
+    ranks = np.full(size, 1.0 / size)
+    for _ in range(max_iterations):
+        spread = np.bincount(cols, weights=ranks[rows] * shares, minlength=size)
+        updated = (1 - damping) / size + damping * (spread + ranks[isolated].sum() / size)
+        change = np.abs(updated - ranks).sum()
+        ranks = updated
+        if change < tolerance:
+            break
+    return ranks
+
+
+def get_components(matrix: CSRMatrix) -> np.ndarray:
+    """
+    Labels the connected components by propagating the smallest node index
+    along every edge at once, with pointer jumping to shorten the chains.
+
+    Parameters:
+        matrix (CSRMatrix): The symmetric adjacency matrix.
+
+    Returns:
+        np.ndarray: The smallest node index of the component of every node.
+    """
+    labels = np.arange(matrix.size, dtype=np.int64)
+    rows, cols, _ = matrix.to_coo()
+    while True:
+        updated = labels.copy()
+        np.minimum.at(updated, rows, labels[cols])
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+class InteractionGraph:  # pylint: disable=too-many-instance-attributes
+    """
+    The weighted graph of the characters interacting together.
+
+    Attributes:
+        handler (DBQueryHandler): The handler of the database to read from.
+        type_weights (dict): Weight of an interaction by InteractionType, 1 if missing.
+        outcome_weights (dict): Factor of the weight by Outcome, 1 if missing.
+        ids (np.ndarray): The CharacterID of every node, sorted.
+        matrix (CSRMatrix): The adjacency matrix of the nodes.
+        watermark (int): The highest InteractionCharacters rowid included in the graph.
+    """
+
+    def __init__(
+        self, handler: DBQueryHandler, weights: Optional[dict[str, dict[str, float]]] = None
+    ) -> None:
+        """
+        Constructs all the necessary attributes for the InteractionGraph object.
+        The edges are loaded on the first query.
+
+        Parameters:
+            handler (DBQueryHandler): The handler of the database to read from.
+            weights (dict, optional): The "type" and "outcome" weights.
+        """
+        self.handler = handler
+        self.type_weights = (weights or {}).get("type", {})
+        self.outcome_weights = (weights or {}).get("outcome", {})
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.matrix = CSRMatrix.empty()
+        self.watermark = 0
+        self._rows = 0
+        self._loaded_changes: Optional[int] = None
+        self._pagerank: Optional[np.ndarray] = None
+
+    def refresh(self, full: bool = False) -> int:
+        """
+        Adds the participants inserted since the last load. Everything is loaded again
+        if participants were deleted, or on request, e.g. after interactions were updated.
+        Nothing is read if the connection made no change since the last load.
+
+        Parameters:
+            full (bool): Whether to load every edge again.
+
+        Returns:
+            int: Number of participant rows read.
+        """
+        self.handler.flush()
+        with self.handler.lock:
+            conn = self.handler.conn
+            if not full and conn.total_changes == self._loaded_changes:
+                return 0
+            conn.execute("SAVEPOINT graph")
+            try:
+                max_rowid, total = conn.execute(
+                    "SELECT COALESCE(MAX(rowid), 0), COUNT(*) FROM InteractionCharacters"
+                ).fetchone()
+                kept = conn.execute(
+                    "SELECT COUNT(*) FROM InteractionCharacters WHERE rowid <= ?",
+                    (self.watermark,),
+                ).fetchone()[0]
+                if full or kept != self._rows:
+                    self.ids, self.matrix = np.zeros(0, dtype=np.int64), CSRMatrix.empty()
+                    self.watermark = 0
+                rows = self._add_participants(max_rowid) if max_rowid > self.watermark else 0
+                self._loaded_changes = conn.total_changes
+            finally:
+                conn.execute("RELEASE graph")
+        self.watermark, self._rows = max_rowid, total
+        if rows > 0:
+            self._pagerank = None
+        return rows
+
+    def _add_participants(self, max_rowid: int) -> int:
+        """
+        Reads the interactions with participants above the watermark and replaces their
+        edges. Must be called with the lock held.
+
+        Parameters:
+            max_rowid (int): The highest rowid of the participants.
+
+        Returns:
+            int: Number of participant rows read.
+        """
+        condition = (
+            "InteractionCharacters.InteractionID IN (SELECT InteractionID "
+            "FROM InteractionCharacters WHERE rowid > ? AND rowid <= ?)"
+        )
+        rows = self.handler.conn.execute(
+            PARTICIPANTS_QUERY.format(condition=condition), (self.watermark, max_rowid)
+        ).fetchall()
+        if not rows:
+            return 0
+        participants = np.array([row[:3] for row in rows], dtype=np.int64)
+        weights = np.array([self.get_weight(kind, outcome) for _, _, _, kind, outcome in rows])
+        # A character taking part twice in an interaction is linked once.
+        distinct = np.r_[True, np.any(participants[1:, 1:] != participants[:-1, 1:], axis=1)]
+        participants, weights = participants[distinct], weights[distinct]
+        left, right = get_group_pair_positions(participants[:, 1])
+        old = participants[:, 0] <= self.watermark
+        # The pairs of the interactions as they were are subtracted, their new pairs added.
+        old_pairs = old[left] & old[right]
+        sources = participants[np.r_[left, left[old_pairs]], 2]
+        targets = participants[np.r_[right, right[old_pairs]], 2]
+        values = np.r_[weights[left], -weights[left][old_pairs]]
+        self._merge(sources, targets, values)
+        return len(rows)
+
+    def get_weight(self, kind: Optional[str], outcome: Optional[str]) -> float:
+        """
+        Returns the weight of an interaction.
+
+        Parameters:
+            kind (str, optional): The InteractionType.
+            outcome (str, optional): The Outcome.
+
+        Returns:
+            float: The weight of the type times the factor of the outcome.
+        """
+        return float(self.type_weights.get(kind or "", 1.0)) * float(
+            self.outcome_weights.get(outcome or "", 1.0)
+        )
+
+    def _merge(self, sources: np.ndarray, targets: np.ndarray, values: np.ndarray) -> None:
+        """
+        Adds weighted edges between CharacterIDs, remapping the nodes if new characters appear.
+
+        Parameters:
+            sources (np.ndarray): CharacterIDs of the first ends of the edges.
+            targets (np.ndarray): CharacterIDs of the second ends of the edges.
+            values (np.ndarray): Weights of the edges, negative to remove weight.
+        """
+        ids = np.union1d(self.ids, np.r_[sources, targets])
+        rows, cols, weights = self.matrix.to_coo()
+        self.matrix = CSRMatrix.from_coo(
+            np.r_[np.searchsorted(ids, self.ids[rows]), np.searchsorted(ids, sources)],
+            np.r_[np.searchsorted(ids, self.ids[cols]), np.searchsorted(ids, targets)],
+            np.r_[weights.astype(np.float64), values],
+            len(ids),
+        )
+        self.ids = ids
+
+    def get_node(self, character_id: Any) -> int:
+        """
+        Returns the node of a character.
+
+        Parameters:
+            character_id (Any): The CharacterID.
+
+        Returns:
+            int: The node index.
+
+        Raises:
+            ValueError: If the character takes part in no interaction.
+        """
+        character_id = int(character_id)
+        node = int(np.searchsorted(self.ids, character_id))
+        if node >= len(self.ids) or self.ids[node] != character_id:
+            raise ValueError(f"Character {character_id} has no interactions.")
+        return node
+
+    def shortest_path(self, source_id: Any, target_id: Any) -> list[int]:
+        """
+        Returns a chain of interacting characters with the fewest links between two characters.
+
+        Parameters:
+            source_id (Any): The CharacterID of the start.
+            target_id (Any): The CharacterID of the end.
+
+        Returns:
+            list[int]: The CharacterIDs of the chain, empty if the characters are not connected.
+        """
+        self.refresh()
+        path = get_shortest_path(self.matrix, self.get_node(source_id), self.get_node(target_id))
+        return [int(self.ids[node]) for node in path]
+
+    def degree(self, character_id: Any) -> tuple[int, float]:
+        """
+        Returns the number of characters a character interacted with and the total weight.
+
+        Parameters:
+            character_id (Any): The CharacterID.
+
+        Returns:
+            tuple: The number of neighbors and the sum of the edge weights.
+        """
+        self.refresh()
+        _, weights = self.matrix.row(self.get_node(character_id))
+        return len(weights), float(weights.sum())
+
+    def central(self, count: int = 10) -> list[tuple[int, float]]:
+        """
+        Returns the characters with the highest PageRank.
+
+        Parameters:
+            count (int): Number of characters.
+
+        Returns:
+            list[tuple]: Pairs of CharacterID and rank, highest first.
+        """
+        self.refresh()
+        if self._pagerank is None:
+            self._pagerank = get_pagerank(self.matrix)
+        order = np.argsort(-self._pagerank, kind="stable")[:count]
+        return [(int(self.ids[node]), float(self._pagerank[node])) for node in order]
+
+    def components(self) -> list[np.ndarray]:
+        """
+        Returns the groups of characters connected by interactions, largest first.
+
+        Returns:
+            list[np.ndarray]: The CharacterIDs of every connected component.
+        """
+        self.refresh()
+        labels = get_components(self.matrix)
+        order = np.argsort(labels, kind="stable")
+        groups = np.split(self.ids[order], np.flatnonzero(np.diff(labels[order])) + 1)
+        return sorted((group for group in groups if len(group) > 0), key=len, reverse=True)
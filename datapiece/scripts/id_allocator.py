@@ -0,0 +1,189 @@
+"""
+This module defines the IdAllocator class which hands out the IDs of the tables
+whose INT PRIMARY KEY is not a rowid alias and has no AUTOINCREMENT.
+
+Instead of reading MAX(ID) before every insert, the allocator reserves a block of
+consecutive IDs per table in the Sequences table, in a short transaction of its
+own, and hands them out from memory. SQLite serializes the reservations of every
+writer of the database, so that concurrent handlers, in this process or others,
+never receive the same block. A reservation also starts above the largest ID of
+the table, so that rows inserted with explicit IDs are skipped. The IDs left in
+the block of a closed handler are never used.
+
+A reservation made while a transaction of the handler is open is part of that
+transaction. If it is rolled back, the handler drops the reserved blocks, so that
+IDs whose reservation was undone are never handed out.
+"""
+
+import sqlite3
+import threading
+from typing import Any, Callable, Optional
+
+DEFAULT_ID_BLOCK_SIZE = 100
+
+# The lowercase names of the tables written by a reservation.
+SEQUENCE_TABLES = frozenset({"sequences"})
+
+# The ID column of every table whose IDs can be allocated.
+SEQUENCE_COLUMNS: dict[str, str] = {
+    "Chapters": "ChapterID",
+    "Pages": "PageID",
+    "Panels": "PanelID",
+    "Characters": "CharacterID",
+    "Affiliations": "AffiliationID",
+    "CharacterAppearances": "AppearanceID",
+    "DevilFruits": "FruitID",
+    "Abilities": "AbilityID",
+    "CharacterInteractions": "InteractionID",
+    "FamilyRelationships": "RelationshipID",
+    "RomanticRelationships": "RelationshipID",
+    "CharacterEvents": "EventID",
+}
+
+
+class IdAllocator:
+    """
+    Hands out the IDs of the tables from blocks reserved in the Sequences table.
+
+    Attributes:
+        conn (sqlite3.Connection): The writer connection of the handler.
+        lock (threading.RLock): The lock of the handler, serializing the use of the connection.
+        block_size (int): Minimum number of IDs reserved at a time.
+        invalidate (Callable, optional): Called with the tables written by a reservation,
+            e.g. to evict the query results cached from them.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        lock: threading.RLock,
+        block_size: int = DEFAULT_ID_BLOCK_SIZE,
+        invalidate: Optional[Callable[[frozenset[str]], Any]] = None,
+    ) -> None:
+        """
+        Constructs all the necessary attributes for the IdAllocator object.
+
+        Parameters:
+            conn (sqlite3.Connection): The writer connection of the handler.
+            lock (threading.RLock): The lock of the handler.
+            block_size (int): Minimum number of IDs reserved at a time.
+            invalidate (Callable, optional): Called with the tables written by a reservation.
+        """
+        self.conn = conn
+        self.lock = lock
+        self.block_size = max(1, block_size)
+        self.invalidate = invalidate
+        self._blocks: dict[str, list[range]] = {}
+        self._blocks_lock = threading.Lock()
+        # Incremented by discard, so that a block reserved before a rollback is dropped.
+        self._generation = 0
+
+    def next_id(self, table: str) -> int:
+        """
+        Returns a new ID of a table.
+
+        Parameters:
+            table (str): Name of the table.
+
+        Returns:
+            int: The ID.
+
+        Raises:
+            ValueError: If the IDs of the table are not allocated.
+        """
+        return self.allocate(table, 1)[0]
+
+    def allocate(self, table: str, count: int) -> list[int]:
+        """
+        Returns new IDs of a table, reserving a block when the reserved IDs run out.
+
+        Parameters:
+            table (str): Name of the table.
+            count (int): Number of IDs.
+
+        Returns:
+            list[int]: The IDs, increasing.
+
+        Raises:
+            ValueError: If the IDs of the table are not allocated.
+        """
+        if table not in SEQUENCE_COLUMNS:
+            raise ValueError(f"No ID sequence for table {table}.")
+        ids: list[int] = []
+        while True:
+            with self._blocks_lock:
+                blocks = self._blocks.setdefault(table, [])
+                while blocks and len(ids) < count:
+                    taken = blocks[0][: count - len(ids)]
+                    ids.extend(taken)
+                    blocks[0] = blocks[0][len(taken):]
+                    if not blocks[0]:
+                        blocks.pop(0)
+            if len(ids) == count:
+                return ids
+            # The reservation runs without the allocator lock, so that the handler lock
+            # is never waited for while holding it.
+            block, generation = self._reserve(table, max(self.block_size, count - len(ids)))
+            with self._blocks_lock:
+                if generation == self._generation:
+                    self._blocks.setdefault(table, []).append(block)
+
+    def reserved(self, table: str) -> int:
+        """
+        Returns the number of IDs of a table reserved and not handed out yet.
+
+        Parameters:
+            table (str): Name of the table.
+
+        Returns:
+            int: The number of IDs.
+        """
+        with self._blocks_lock:
+            return sum(len(block) for block in self._blocks.get(table, []))
+
+    def discard(self) -> None:
+        """
+        Drops the reserved blocks, e.g. after a rollback of the handler's transaction
+        which may have undone their reservation. Their unused IDs are skipped.
+        """
+        with self._blocks_lock:
+            self._blocks.clear()
+            self._generation += 1
+
+    def _reserve(self, table: str, size: int) -> tuple[range, int]:
+        """
+        Reserves a block of IDs of a table in the Sequences table and commits it,
+        unless a transaction of the handler is open, which then includes the reservation.
+
+        Parameters:
+            table (str): Name of the table.
+            size (int): Number of IDs.
+
+        Returns:
+            tuple: The reserved IDs, and the generation of the blocks they belong to.
+        """
+        column = SEQUENCE_COLUMNS[table]
+        with self.lock:
+            generation = self._generation
+            started = not self.conn.in_transaction
+            try:
+                self.conn.execute(
+                    "INSERT INTO Sequences (Name, NextID) VALUES (?, 1) "
+                    "ON CONFLICT (Name) DO NOTHING",
+                    (table,),
+                )
+                start = self.conn.execute(
+                    "UPDATE Sequences SET NextID = MAX(NextID, "
+                    f"(SELECT COALESCE(MAX({column}), 0) + 1 FROM {table})) + ? "
+                    "WHERE Name = ? RETURNING NextID - ?",
+                    (size, table, size),
+                ).fetchall()[0][0]
+                if self.invalidate is not None:
+                    self.invalidate(SEQUENCE_TABLES)
+                if started:
+                    self.conn.commit()
+            except sqlite3.Error:
+                if started:
+                    self.conn.rollback()
+                raise
+        return range(start, start + size), generation
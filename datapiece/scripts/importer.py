@@ -0,0 +1,262 @@
+"""
+This module defines the Importer class which streams annotated data files into the database.
+
+Every record of a file is a flat mapping from schema column names to values, e.g.
+a CSV row with the header
+    VolumeNumber,ChapterID,ChapterNumber,PageID,PageNumber,PanelID,PanelNumber,...
+A record fills every table of the Volumes -> Chapters -> Pages -> Panels -> CharacterAppearances
+hierarchy whose primary key column it contains.
+"""
+
+import csv
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Iterator, Optional
+
+from datapiece.scripts.db_query_handler import DBQueryHandler
+
+IMPORT_TABLES: list[tuple[str, str, tuple[str, ...]]] = [
+    ("Volumes", "VolumeNumber", ("VolumeNumber",)),
+    (
+        "Chapters",
+        "ChapterID",
+        ("ChapterID", "VolumeNumber", "ArcID", "ChapterNumber", "ChapterName"),
+    ),
+    (
+        "Pages",
+        "PageID",
+        (
+            "PageID",
+            "ChapterID",
+            "PageNumber",
+            "IsColorSpread",
+            "IsDoubleSpread",
+            "IsCoverPage",
+            "IsColorCover",
+            "IsCoverStory",
+            "IsFanRequest",
+            "IsAnimalTheater",
+            "IsOther",
+        ),
+    ),
+    (
+        "Panels",
+        "PanelID",
+        ("PanelID", "PageID", "PanelNumber", "IsFlashback", "Location"),
+    ),
+    ("CharacterAppearances", "AppearanceID", ("AppearanceID", "CharacterID", "PanelID")),
+]
+
+LEAF_TABLE = IMPORT_TABLES[-1][0]
+
+TRUE_VALUES = ("1", "true", "yes", "y", "t")
+
+
+def read_csv_records(path: str) -> Iterator[dict[str, Any]]:
+    """
+    Lazily reads the rows of a CSV file with a header line.
+
+    Args:
+        path (str): Path to the CSV file.
+
+    Yields:
+        dict: One record per row.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def read_jsonl_records(path: str) -> Iterator[dict[str, Any]]:
+    """
+    Lazily reads a file with one JSON object per line, skipping blank lines.
+
+    Args:
+        path (str): Path to the JSONL file.
+
+    Yields:
+        dict: One record per line.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_records(path: str, file_format: Optional[str] = None) -> Iterator[dict[str, Any]]:
+    """
+    Lazily reads the records of a CSV or JSONL file.
+
+    Args:
+        path (str): Path to the file.
+        file_format (str, optional): "csv" or "jsonl", guessed from the extension if omitted.
+
+    Yields:
+        dict: One record per row or line.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+    if file_format == "csv":
+        return read_csv_records(path)
+    if file_format in ("jsonl", "ndjson", "json"):
+        return read_jsonl_records(path)
+    raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def normalize_value(column: str, value: Any) -> Any:
+    """
+    Converts a raw file value to the value stored in the given column.
+    Empty strings become None and boolean flags become 0 or 1.
+
+    Args:
+        column (str): Name of the column.
+        value (Any): Raw value.
+
+    Returns:
+        Any: The value to bind.
+    """
+    if value == "":
+        return None
+    if column.startswith("Is") and isinstance(value, str):
+        return int(value.strip().lower() in TRUE_VALUES)
+    return value
+
+
+class Importer:
+    """
+    A streaming bulk importer.
+
+    Records are mapped onto the import tables and collected in chunks.
+    Every chunk is written with one executemany call per statement, in one transaction,
+    so only a chunk of rows is ever held in memory.
+
+    Attributes:
+        handler (DBQueryHandler): Executes the inserts.
+        chunk_size (int): Number of rows written per transaction.
+    """
+
+    def __init__(self, handler: DBQueryHandler, chunk_size: Optional[int] = None) -> None:
+        """
+        Constructs all the necessary attributes for the Importer object.
+
+        Args:
+            handler (DBQueryHandler): An instance of DBQueryHandler to execute the inserts.
+            chunk_size (int, optional): Number of rows written per transaction,
+                the handler's batch size if omitted.
+        """
+        self.handler = handler
+        self.chunk_size = chunk_size or handler.batch.max_rows
+        self._queries: dict[tuple[str, tuple[str, ...]], str] = {}
+        self._last_keys: dict[str, Any] = {}
+
+    def import_records(self, records: Iterator[dict[str, Any]]) -> int:
+        """
+        Imports a stream of records.
+
+        Args:
+            records (Iterator): The records to import.
+
+        Returns:
+            int: Number of rows inserted or ignored as already present.
+        """
+        was_batching = self.handler.batch.active
+        self.handler.begin_batch()
+        self._last_keys = {}
+        total = 0
+        chunk: dict[tuple[int, str], list[tuple]] = {}
+        chunk_rows = 0
+        try:
+            for record in records:
+                for key, row in self._map_record(record):
+                    chunk.setdefault(key, []).append(row)
+                    chunk_rows += 1
+                if chunk_rows >= self.chunk_size:
+                    self._write_chunk(chunk)
+                    total += chunk_rows
+                    chunk, chunk_rows = {}, 0
+            self._write_chunk(chunk)
+            total += chunk_rows
+        finally:
+            if not was_batching:
+                self.handler.end_batch()
+        return total
+
+    def import_file(self, path: str, file_format: Optional[str] = None) -> tuple[int, float]:
+        """
+        Imports a CSV or JSONL file.
+
+        Args:
+            path (str): Path to the file.
+            file_format (str, optional): "csv" or "jsonl", guessed from the extension if omitted.
+
+        Returns:
+            tuple: Number of rows and elapsed seconds.
+        """
+        started = time.perf_counter()
+        rows = self.import_records(read_records(path, file_format))
+        return rows, time.perf_counter() - started
+
+    def _map_record(self, record: dict[str, Any]) -> Iterator[tuple[tuple[int, str], tuple]]:
+        """
+        Maps a record onto the rows of the import tables.
+        A parent row equal to the one of the previous record is skipped.
+
+        Args:
+            record (dict): The record.
+
+        Yields:
+            tuple: The (table rank, query) pair and the row to insert.
+        """
+        for rank, (table, key_column, columns) in enumerate(IMPORT_TABLES):
+            key = normalize_value(key_column, record.get(key_column, ""))
+            if key is None:
+                continue
+            present = tuple(c for c in columns if record.get(c, "") not in ("", None))
+            row = tuple(normalize_value(c, record[c]) for c in present)
+            if table != LEAF_TABLE:
+                if self._last_keys.get(table) == row:
+                    continue
+                self._last_keys[table] = row
+            yield (rank, self._get_query(table, present)), row
+
+    def _get_query(self, table: str, columns: tuple[str, ...]) -> str:
+        """
+        Returns the insert statement for the given table and columns.
+        Parent tables ignore rows whose primary key is already present.
+
+        Args:
+            table (str): Name of the table.
+            columns (tuple): Names of the columns to insert.
+
+        Returns:
+            str: The insert statement.
+        """
+        query = self._queries.get((table, columns))
+        if query is None:
+            verb = "INSERT" if table == LEAF_TABLE else "INSERT OR IGNORE"
+            names = ", ".join(f"`{c}`" for c in columns)
+            marks = ", ".join("?" for _ in columns)
+            query = f"{verb} INTO `{table}` ({names}) VALUES ({marks})"
+            self._queries[(table, columns)] = query
+        return query
+
+    def _write_chunk(self, chunk: dict[tuple[int, str], list[tuple]]) -> None:
+        """
+        Writes a chunk in one transaction, parent tables first.
+
+        Args:
+            chunk (dict): Rows to insert grouped by (table rank, query).
+        """
+        if not chunk:
+            return
+        for (_, query), rows in sorted(chunk.items(), key=lambda item: item[0][0]):
+            self.handler.executemany(query, rows)
+        try:
+            self.handler.flush()
+        except sqlite3.Error:
+            logging.error("Import stopped, the current chunk was rolled back.")
+            raise
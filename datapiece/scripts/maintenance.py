@@ -0,0 +1,169 @@
+"""
+This module defines the Maintenance class which keeps the planner statistics fresh
+and the database file compact.
+
+The write volume is read from the connection's total_changes counter, which SQLite
+maintains for free and which includes the rows written by triggers. Every step
+remembers the counter value of its last run, so that it runs again once enough
+rows were written since then.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+MAINTENANCE_STEPS: dict[str, str] = {
+    "analyze": "ANALYZE",
+    "optimize": "PRAGMA optimize",
+    "vacuum": "PRAGMA incremental_vacuum",
+    "checkpoint": "PRAGMA wal_checkpoint(TRUNCATE)",
+}
+
+DEFAULT_THRESHOLDS: dict[str, int] = {
+    "analyze": 100000,
+    "optimize": 10000,
+    "vacuum": 10000,
+    "checkpoint": 1000,
+}
+
+DEFAULT_MAINTENANCE_INTERVAL = 60.0
+
+
+def get_steps(names: Optional[Iterable[str]] = None) -> list[str]:
+    """
+    Validates step names and returns them in execution order.
+
+    Parameters:
+        names (Iterable, optional): Names of the steps, every step if omitted.
+
+    Returns:
+        list[str]: The step names in execution order.
+
+    Raises:
+        ValueError: If a step is unknown.
+    """
+    if names is None:
+        return list(MAINTENANCE_STEPS)
+    selected = set(names)
+    unknown = selected - MAINTENANCE_STEPS.keys()
+    if unknown:
+        raise ValueError(f"Unknown maintenance step: {', '.join(sorted(unknown))}")
+    return [step for step in MAINTENANCE_STEPS if step in selected]
+
+
+class Maintenance:
+    """
+    Runs the maintenance steps and tracks the writes since their last runs.
+
+    Attributes:
+        conn (sqlite3.Connection): The connection of the maintained database.
+        lock (threading.RLock): Serializes the use of the connection.
+        db_path (str): Path to the database file, empty for an in-memory database.
+        thresholds (dict): Rows written since the last run that make a step due,
+            0 to never run the step automatically.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        lock: threading.RLock,
+        db_path: str = "",
+        thresholds: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """
+        Constructs all the necessary attributes for the Maintenance object.
+
+        Parameters:
+            conn (sqlite3.Connection): The connection of the maintained database.
+            lock (threading.RLock): Serializes the use of the connection.
+            db_path (str): Path to the database file, empty for an in-memory database.
+            thresholds (dict, optional): Overrides of the default thresholds, by step.
+
+        Raises:
+            ValueError: If a threshold names an unknown step.
+        """
+        self.conn = conn
+        self.lock = lock
+        self.db_path = db_path
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        get_steps(self.thresholds)
+        self._last_changes = {step: conn.total_changes for step in MAINTENANCE_STEPS}
+
+    def writes_since(self, step: str) -> int:
+        """
+        Returns the number of rows written since the last run of a step.
+
+        Parameters:
+            step (str): Name of the step.
+
+        Returns:
+            int: Number of inserted, updated or deleted rows.
+        """
+        return self.conn.total_changes - self._last_changes[step]
+
+    def due_steps(self) -> list[str]:
+        """
+        Returns the steps whose threshold was crossed.
+
+        Returns:
+            list[str]: The step names in execution order.
+        """
+        return [
+            step
+            for step in MAINTENANCE_STEPS
+            if 0 < int(self.thresholds[step]) <= self.writes_since(step)
+        ]
+
+    def get_size(self) -> int:
+        """
+        Returns the size of the database plus its write-ahead log.
+
+        Returns:
+            int: Size in bytes.
+        """
+        page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        wal_path = f"{self.db_path}-wal"
+        wal_size = os.path.getsize(wal_path) if self.db_path and os.path.exists(wal_path) else 0
+        return page_count * page_size + wal_size
+
+    def run(self, steps: Optional[Iterable[str]] = None) -> list[tuple[str, float, int]]:
+        """
+        Runs maintenance steps. Nothing is run while a transaction is open.
+
+        Parameters:
+            steps (Iterable, optional): Names of the steps, every step if omitted.
+
+        Returns:
+            list[tuple]: The (step, seconds, freed bytes) of every step that ran.
+
+        Raises:
+            ValueError: If a step is unknown.
+        """
+        report = []
+        names = get_steps(steps)
+        with self.lock:
+            if self.conn.in_transaction:
+                return []
+            for step in names:
+                size = self.get_size()
+                started = time.perf_counter()
+                # incremental_vacuum frees one page per step and returns no rows,
+                # so execute() would stop after the first page.
+                self.conn.executescript(MAINTENANCE_STEPS[step])
+                elapsed = time.perf_counter() - started
+                report.append((step, elapsed, max(size - self.get_size(), 0)))
+                self._last_changes[step] = self.conn.total_changes
+        return report
+
+    def run_due(self) -> list[tuple[str, float, int]]:
+        """
+        Runs the steps whose threshold was crossed.
+
+        Returns:
+            list[tuple]: The (step, seconds, freed bytes) of every step that ran.
+        """
+        steps = self.due_steps()
+        return self.run(steps) if steps else []
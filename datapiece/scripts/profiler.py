@@ -0,0 +1,235 @@
+"""
+This module defines the SessionProfiler class which profiles console commands in place.
+
+cProfile only runs while a command is dispatched, so the time spent waiting at the
+prompt does not dilute the report. tracemalloc snapshots are compared with the
+previous one to find where memory grew between two points of a session. Every
+report is written to the configured directory, next to its raw pstats data.
+"""
+
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+DEFAULT_PROFILE_DIR = "profiles"
+DEFAULT_REPORT_TOP = 30
+DEFAULT_TRACE_FRAMES = 10
+
+# Allocations made by the tracing machinery itself are left out of the reports.
+TRACE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class SessionProfiler:
+    """
+    Collects CPU profiles of the dispatched commands and memory allocation snapshots.
+
+    Attributes:
+        output_dir (str): Directory of the written reports.
+        top (int): Number of functions or allocation sites in a report.
+        frames (int): Number of frames stored per traced allocation.
+        profile (cProfile.Profile): The collected profile, None before the first start.
+        running (bool): Whether dispatched commands are being profiled.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = DEFAULT_PROFILE_DIR,
+        top: int = DEFAULT_REPORT_TOP,
+        frames: int = DEFAULT_TRACE_FRAMES,
+    ) -> None:
+        """
+        Constructs all the necessary attributes for the SessionProfiler object.
+
+        Parameters:
+            output_dir (str): Directory of the written reports.
+            top (int): Number of functions or allocation sites in a report.
+            frames (int): Number of frames stored per traced allocation.
+        """
+        self.output_dir = output_dir
+        self.top = top
+        self.frames = frames
+        self.profile: Optional[cProfile.Profile] = None
+        self.running = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._sequence = itertools.count(1)
+
+    @contextmanager
+    def profiled(self) -> Iterator[None]:
+        """
+        Profiles the body of the with statement if profiling was started.
+        """
+        if not self.running or self.profile is None:
+            yield
+            return
+        self.profile.enable()
+        try:
+            yield
+        finally:
+            self.profile.disable()
+
+    def start(self) -> None:
+        """
+        Starts profiling the dispatched commands with a new, empty profile.
+
+        Raises:
+            ValueError: If profiling is already running.
+        """
+        if self.running:
+            raise ValueError("Profiling is already running.")
+        self.profile = cProfile.Profile()
+        self.running = True
+
+    def stop(self) -> None:
+        """
+        Stops profiling. The collected profile is kept until the next start.
+
+        Raises:
+            ValueError: If profiling is not running.
+        """
+        if not self.running:
+            raise ValueError("Profiling is not running.")
+        self.running = False
+
+    def dump(self) -> tuple[str, str]:
+        """
+        Writes the collected profile as pstats data and as a text report of the functions
+        with the highest cumulative time.
+
+        Returns:
+            tuple: Paths of the pstats file and of the text report.
+
+        Raises:
+            ValueError: If no profile was collected.
+        """
+        if self.profile is None:
+            raise ValueError("No profile collected: run profile start first.")
+        base = self._get_report_base("profile")
+        stats_path, report_path = f"{base}.pstats", f"{base}.txt"
+        self.profile.create_stats()
+        self.profile.dump_stats(stats_path)
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        self._write_report(report_path, stream.getvalue())
+        return stats_path, report_path
+
+    def start_trace(self) -> None:
+        """
+        Starts tracing the memory allocations.
+
+        Raises:
+            ValueError: If tracing is already running.
+        """
+        if tracemalloc.is_tracing():
+            raise ValueError("Memory tracing is already running.")
+        tracemalloc.start(self.frames)
+        self._snapshot = None
+
+    def stop_trace(self) -> None:
+        """
+        Stops tracing the memory allocations and forgets the last snapshot.
+        """
+        tracemalloc.stop()
+        self._snapshot = None
+
+    def snapshot(self) -> str:
+        """
+        Takes a snapshot of the traced allocations, kept as the reference of the next diff,
+        and writes a report of the largest allocation sites.
+
+        Returns:
+            str: Path of the report.
+
+        Raises:
+            ValueError: If tracing is not running.
+        """
+        snapshot = self._take_snapshot()
+        statistics = snapshot.statistics("lineno")
+        total = sum(stat.size for stat in statistics)
+        lines = [f"Traced memory: {total / 1024:.1f} KiB in {len(statistics)} sites"]
+        lines.extend(str(stat) for stat in statistics[: self.top])
+        path = f"{self._get_report_base('memtrace')}.txt"
+        self._write_report(path, "\n".join(lines) + "\n")
+        self._snapshot = snapshot
+        return path
+
+    def diff(self) -> str:
+        """
+        Takes a snapshot of the traced allocations and writes a report of the allocation
+        sites that grew the most since the previous snapshot, which it then replaces.
+
+        Returns:
+            str: Path of the report.
+
+        Raises:
+            ValueError: If tracing is not running or no snapshot was taken yet.
+        """
+        if self._snapshot is None:
+            raise ValueError("No snapshot to compare with: run memtrace snapshot first.")
+        snapshot = self._take_snapshot()
+        statistics = snapshot.compare_to(self._snapshot, "lineno")
+        growth = sum(stat.size_diff for stat in statistics)
+        lines = [f"Traced memory change: {growth / 1024:+.1f} KiB"]
+        lines.extend(str(stat) for stat in statistics[: self.top])
+        path = f"{self._get_report_base('memtrace-diff')}.txt"
+        self._write_report(path, "\n".join(lines) + "\n")
+        self._snapshot = snapshot
+        return path
+
+    def close(self) -> None:
+        """
+        Stops profiling and tracing.
+        """
+        self.running = False
+        if tracemalloc.is_tracing():
+            self.stop_trace()
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        """
+        Takes a snapshot of the traced allocations without those of the tracing machinery.
+
+        Returns:
+            tracemalloc.Snapshot: The filtered snapshot.
+
+        Raises:
+            ValueError: If tracing is not running.
+        """
+        if not tracemalloc.is_tracing():
+            raise ValueError("Memory tracing is not running: run memtrace start first.")
+        return tracemalloc.take_snapshot().filter_traces(TRACE_FILTERS)
+
+    def _get_report_base(self, prefix: str) -> str:
+        """
+        Returns a new report path without extension, creating the output directory.
+
+        Parameters:
+            prefix (str): The kind of report.
+
+        Returns:
+            str: The path, unique within the session.
+        """
+        os.makedirs(self.output_dir or ".", exist_ok=True)
+        name = f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}-{next(self._sequence)}"
+        return os.path.join(self.output_dir, name)
+
+    def _write_report(self, path: str, text: str) -> None:
+        """
+        Writes a text report.
+
+        Parameters:
+            path (str): Path of the report.
+            text (str): Content of the report.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
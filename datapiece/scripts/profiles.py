@@ -0,0 +1,86 @@
+"""
+This module defines the connection performance profiles of the database handler.
+
+A profile is a set of PRAGMA values. Every profile starts from BASE_PRAGMAS,
+so switching profiles never leaves a setting of the previous one behind.
+"""
+
+import re
+from typing import Any
+
+BASE_PRAGMAS: dict[str, Any] = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "cache_size": -2000,
+    "mmap_size": 0,
+    "temp_store": "DEFAULT",
+    "wal_autocheckpoint": 1000,
+    "query_only": "OFF",
+}
+
+DEFAULT_PROFILES: dict[str, dict[str, Any]] = {
+    "interactive": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,
+        "temp_store": "MEMORY",
+    },
+    # NORMAL only syncs at checkpoints in WAL mode: a power loss may lose the last
+    # transactions but never corrupts the database, unlike OFF.
+    "bulk_load": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -262144,
+        "mmap_size": 1073741824,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 10000,
+    },
+    "read_only": {
+        "journal_mode": "WAL",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "query_only": "ON",
+    },
+}
+
+PRAGMA_VALUE_PATTERN = re.compile(r"^-?\w+$")
+
+
+def merge_profiles(config_profiles: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """
+    Merges the configured profiles over the default ones.
+
+    Args:
+        config_profiles (dict): Profiles from the configuration, by name.
+
+    Returns:
+        dict: Every known profile, by name.
+    """
+    profiles = {name: dict(pragmas) for name, pragmas in DEFAULT_PROFILES.items()}
+    for name, pragmas in config_profiles.items():
+        profiles.setdefault(name, {}).update(pragmas)
+    return profiles
+
+
+def get_pragma_statements(pragmas: dict[str, Any]) -> list[str]:
+    """
+    Returns the PRAGMA statements applying a profile on top of the base values.
+
+    Args:
+        pragmas (dict): The PRAGMA values of the profile.
+
+    Returns:
+        list[str]: The PRAGMA statements.
+
+    Raises:
+        ValueError: If a PRAGMA is not supported or a value is not a plain word or number.
+    """
+    statements = []
+    for name, value in {**BASE_PRAGMAS, **pragmas}.items():
+        if name not in BASE_PRAGMAS:
+            raise ValueError(f"Unsupported profile setting: {name}")
+        if not PRAGMA_VALUE_PATTERN.match(str(value)):
+            raise ValueError(f"Invalid value for {name}: {value}")
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
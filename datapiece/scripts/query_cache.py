@@ -0,0 +1,320 @@
+"""
+This module defines the QueryCache class which keeps the results of read queries.
+
+Entries are keyed by the normalized SQL and the parameters of a query and tagged
+with the tables it reads. A write evicts only the entries reading one of the tables
+it writes, including the tables written by triggers. The tables of a statement are
+collected by SQLite's authorizer while the statement is compiled with EXPLAIN, once
+per distinct SQL, and kept for as many statements as there are entries.
+"""
+
+import re
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Sequence
+
+DEFAULT_CACHE_MAX_ENTRIES = 256
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+QUOTED_PATTERN = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\])")
+SPACE_PATTERN = re.compile(r"\s+")
+
+# Authorizer actions writing a table, with the index of the argument naming the table.
+WRITE_ACTIONS = {
+    sqlite3.SQLITE_INSERT: 0,
+    sqlite3.SQLITE_UPDATE: 0,
+    sqlite3.SQLITE_DELETE: 0,
+    sqlite3.SQLITE_DROP_TABLE: 0,
+    sqlite3.SQLITE_DROP_TEMP_TABLE: 0,
+    sqlite3.SQLITE_ALTER_TABLE: 1,
+}
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Collapses the whitespace of a query outside of its quoted strings and names,
+    and drops the trailing semicolon.
+
+    Parameters:
+        sql (str): SQL query.
+
+    Returns:
+        str: The normalized query.
+    """
+    parts = QUOTED_PATTERN.split(sql.strip().rstrip(";").strip())
+    return "".join(
+        part if index % 2 else SPACE_PATTERN.sub(" ", part) for index, part in enumerate(parts)
+    )
+
+
+def get_statement_tables(
+    conn: sqlite3.Connection, sql: str, params: Sequence[Any] = ()
+) -> tuple[frozenset[str], frozenset[str]]:
+    """
+    Compiles a statement without running it and returns the tables it reads and writes,
+    including the tables written by the triggers it fires.
+
+    Parameters:
+        conn (sqlite3.Connection): The connection compiling the statement.
+        sql (str): SQL statement.
+        params (Sequence): Values bound to the placeholders.
+
+    Returns:
+        tuple: The lowercase names of the read tables and of the written tables.
+    """
+    read: set[str] = set()
+    written: set[str] = set()
+
+    def authorizer(action: int, *args: Optional[str]) -> int:
+        if action == sqlite3.SQLITE_READ and args[0]:
+            read.add(args[0].lower())
+        elif action in WRITE_ACTIONS and args[WRITE_ACTIONS[action]]:
+            written.add(str(args[WRITE_ACTIONS[action]]).lower())
+        return sqlite3.SQLITE_OK
+
+    conn.set_authorizer(authorizer)
+    try:
+        conn.execute(f"EXPLAIN {sql}", params).fetchall()
+    finally:
+        conn.set_authorizer(None)
+    return frozenset(read), frozenset(written)
+
+
+def get_rows_size(rows: Sequence[Sequence[Any]]) -> int:
+    """
+    Estimates the memory used by result rows.
+
+    Parameters:
+        rows (Sequence): The rows.
+
+    Returns:
+        int: Size in bytes.
+    """
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+
+class QueryCache:  # pylint: disable=too-many-instance-attributes
+    """
+    A least recently used cache of query results.
+
+    Attributes:
+        max_entries (int): Maximum number of entries, 0 to disable the cache.
+        max_bytes (int): Maximum estimated size of the cached rows.
+        size (int): Estimated size of the cached rows.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    ) -> None:
+        """
+        Constructs all the necessary attributes for the QueryCache object.
+
+        Parameters:
+            max_entries (int): Maximum number of entries, 0 to disable the cache.
+            max_bytes (int): Maximum estimated size of the cached rows.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[Hashable, tuple[list[Any], frozenset[str], int]] = (
+            OrderedDict()
+        )
+        self._keys_by_table: dict[str, set[Hashable]] = {}
+        self._tables: OrderedDict[str, tuple[frozenset[str], frozenset[str]]] = OrderedDict()
+        self._data_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether results are cached.
+        """
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        """
+        Returns the number of entries.
+        """
+        return len(self._entries)
+
+    def get_key(self, sql: str, params: Sequence[Any], *extra: Hashable) -> Optional[Hashable]:
+        """
+        Returns the cache key of a query.
+
+        Parameters:
+            sql (str): SQL query.
+            params (Sequence): Values bound to the placeholders.
+            extra (Hashable): Other values the result depends on.
+
+        Returns:
+            Hashable: The key, or None if the parameters are not hashable.
+        """
+        key = (normalize_sql(sql), tuple(params), *extra)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get_tables(
+        self, conn: sqlite3.Connection, sql: str, params: Sequence[Any] = ()
+    ) -> tuple[frozenset[str], frozenset[str]]:
+        """
+        Returns the tables read and written by a statement, compiling it on the first call.
+        The tables of the least recently used statements are forgotten beyond max_entries.
+
+        Parameters:
+            conn (sqlite3.Connection): The connection compiling the statement.
+            sql (str): SQL statement.
+            params (Sequence): Values bound to the placeholders.
+
+        Returns:
+            tuple: The lowercase names of the read tables and of the written tables.
+        """
+        with self._lock:
+            tables = self._tables.get(sql)
+            if tables is not None:
+                self._tables.move_to_end(sql)
+                return tables
+        tables = get_statement_tables(conn, sql, params)
+        with self._lock:
+            self._tables[sql] = tables
+            while len(self._tables) > max(self.max_entries, 1):
+                self._tables.popitem(last=False)
+        return tables
+
+    def sync(self, conn: sqlite3.Connection) -> None:
+        """
+        Clears the cache if another connection, e.g. another process,
+        committed to the database since the last call.
+
+        Parameters:
+            conn (sqlite3.Connection): The connection the results were read with.
+        """
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._data_version is not None and version != self._data_version:
+            self.clear()
+        self._data_version = version
+
+    def get(self, key: Hashable) -> Optional[list[Any]]:
+        """
+        Returns the cached rows of a query and marks them as recently used.
+
+        Parameters:
+            key (Hashable): The cache key of the query.
+
+        Returns:
+            list: The rows, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key: Hashable, rows: list[Any], tables: frozenset[str]) -> bool:
+        """
+        Caches the rows of a query, evicting the least recently used entries if needed.
+
+        Parameters:
+            key (Hashable): The cache key of the query.
+            rows (list): The rows.
+            tables (frozenset): The tables read by the query.
+
+        Returns:
+            bool: True if the rows were cached, False if they are larger than the cache.
+        """
+        size = get_rows_size(rows)
+        if not self.enabled or size > self.max_bytes:
+            return False
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (rows, tables, size)
+            self.size += size
+            for table in tables:
+                self._keys_by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+        return True
+
+    def invalidate(self, tables: frozenset[str]) -> int:
+        """
+        Removes the entries reading any of the given tables.
+
+        Parameters:
+            tables (frozenset): The lowercase names of the written tables.
+
+        Returns:
+            int: Number of removed entries.
+        """
+        with self._lock:
+            keys: set[Hashable] = set()
+            for table in tables:
+                keys.update(self._keys_by_table.get(table, ()))
+            for key in keys:
+                self._remove(key)
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def clear(self) -> int:
+        """
+        Removes every entry and forgets the tables of the compiled statements.
+
+        Returns:
+            int: Number of removed entries.
+        """
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._keys_by_table.clear()
+            self._tables.clear()
+            self.size = 0
+            self._stats["invalidations"] += count
+            return count
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the usage statistics of the cache.
+
+        Returns:
+            dict: Counters of hits, misses, evictions and invalidations, and the current size.
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        """
+        Removes an entry, if present. Must be called with the lock held.
+
+        Parameters:
+            key (Hashable): The cache key of the query.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _, tables, size = entry
+        self.size -= size
+        for table in tables:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
@@ -0,0 +1,263 @@
+"""
+This module defines the QueryStats class which records where the query time goes.
+
+Statements are grouped by shape: the normalized SQL with its literals replaced by "?",
+so that the same query with other values is counted once. Every shape keeps its count,
+returned or written rows and a latency histogram with fixed buckets, so that recording
+a statement costs a dictionary lookup and a bisection. Statements slower than the
+configured threshold are kept in a bounded slow-query log together with their
+EXPLAIN QUERY PLAN.
+"""
+
+import bisect
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+from datapiece.scripts.query_cache import normalize_sql
+
+DEFAULT_SLOW_QUERY_MS = 100.0
+DEFAULT_SLOW_LOG_SIZE = 100
+MAX_SHAPES = 1024
+
+# Upper bounds of the latency buckets in milliseconds, the last bucket is unbounded.
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+PERCENTILES = (50, 95, 99)
+
+LITERAL_PATTERN = re.compile(r"\bX'[0-9A-F]*'|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b", re.IGNORECASE)
+VALUES_LIST_PATTERN = re.compile(r"\(\?(?:, ?\?)*\)(?:, ?\(\?(?:, ?\?)*\))*")
+
+
+def get_statement_shape(sql: str) -> str:
+    """
+    Returns the shape of a statement: its normalized SQL with the literals replaced
+    by "?" and the lists of placeholders collapsed.
+
+    Parameters:
+        sql (str): SQL statement.
+
+    Returns:
+        str: The shape of the statement.
+    """
+    shape = LITERAL_PATTERN.sub("?", normalize_sql(sql))
+    return VALUES_LIST_PATTERN.sub("(?, ...)", shape)
+
+
+def get_percentile(histogram: list[int], percentile: float) -> Optional[float]:
+    """
+    Estimates a latency percentile from a histogram as the upper bound of its bucket.
+
+    Parameters:
+        histogram (list[int]): Count of every bucket of LATENCY_BUCKETS_MS.
+        percentile (float): Percentile between 0 and 100.
+
+    Returns:
+        float: The latency in milliseconds, None if it falls in the unbounded bucket
+            or if the histogram is empty.
+    """
+    total = sum(histogram)
+    if total == 0:
+        return None
+    rank = total * percentile / 100
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank and count > 0:
+            return float(LATENCY_BUCKETS_MS[index]) if index < len(LATENCY_BUCKETS_MS) else None
+    return None
+
+
+class QueryStats:  # pylint: disable=too-many-instance-attributes
+    """
+    Latency, row and commit statistics of the statements run by a handler.
+
+    Attributes:
+        enabled (bool): Whether statements are recorded.
+        slow_query_ms (float): Latency from which a statement is logged as slow,
+            0 to disable the slow-query log.
+        slow_queries (deque): The most recent slow statements.
+        started (float): Time of the last reset, as a Unix timestamp.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        slow_query_ms: float = DEFAULT_SLOW_QUERY_MS,
+        slow_log_size: int = DEFAULT_SLOW_LOG_SIZE,
+    ) -> None:
+        """
+        Constructs all the necessary attributes for the QueryStats object.
+
+        Parameters:
+            enabled (bool): Whether statements are recorded.
+            slow_query_ms (float): Latency from which a statement is logged as slow,
+                0 to disable the slow-query log.
+            slow_log_size (int): Number of slow statements kept.
+        """
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.slow_queries: deque[dict[str, Any]] = deque(maxlen=slow_log_size)
+        self.started = time.time()
+        self._shapes: dict[str, str] = {}
+        self._statements: dict[str, dict[str, Any]] = {}
+        self._commits = {"count": 0, "seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def get_shape(self, sql: str) -> str:
+        """
+        Returns the shape of a statement, memoized per SQL text.
+
+        Parameters:
+            sql (str): SQL statement.
+
+        Returns:
+            str: The shape of the statement.
+        """
+        shape = self._shapes.get(sql)
+        if shape is None:
+            if len(self._shapes) >= MAX_SHAPES:
+                self._shapes.clear()
+            shape = self._shapes[sql] = get_statement_shape(sql)
+        return shape
+
+    def record(
+        self,
+        sql: str,
+        seconds: float,
+        rows: int = 0,
+        explain: Optional[Callable[[], list[str]]] = None,
+    ) -> None:
+        """
+        Records a statement, and logs it with its query plan if it is slow.
+
+        Parameters:
+            sql (str): SQL statement.
+            seconds (float): Time spent running the statement.
+            rows (int): Number of rows returned or written.
+            explain (Callable, optional): Returns the query plan, only called for slow statements.
+        """
+        if not self.enabled:
+            return
+        shape = self.get_shape(sql)
+        milliseconds = seconds * 1000
+        with self._lock:
+            entry = self._statements.get(shape)
+            if entry is None:
+                entry = self._statements[shape] = {
+                    "count": 0,
+                    "rows": 0,
+                    "seconds": 0.0,
+                    "max_ms": 0.0,
+                    "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                }
+            entry["count"] += 1
+            entry["rows"] += rows
+            entry["seconds"] += seconds
+            entry["max_ms"] = max(entry["max_ms"], milliseconds)
+            entry["histogram"][bisect.bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+        if 0 < self.slow_query_ms <= milliseconds:
+            self._log_slow_query(shape, milliseconds, rows, explain)
+
+    def record_commit(self, seconds: float) -> None:
+        """
+        Records a commit.
+
+        Parameters:
+            seconds (float): Time spent committing.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._commits["count"] += 1
+            self._commits["seconds"] += seconds
+
+    def _log_slow_query(
+        self,
+        shape: str,
+        milliseconds: float,
+        rows: int,
+        explain: Optional[Callable[[], list[str]]],
+    ) -> None:
+        """
+        Adds a statement to the slow-query log.
+
+        Parameters:
+            shape (str): The shape of the statement.
+            milliseconds (float): Time spent running the statement.
+            rows (int): Number of rows returned or written.
+            explain (Callable, optional): Returns the query plan.
+        """
+        plan = explain() if explain is not None else []
+        logging.warning("Slow query (%.1f ms, %d rows): %s", milliseconds, rows, shape)
+        with self._lock:
+            self.slow_queries.append(
+                {
+                    "time": time.time(),
+                    "sql": shape,
+                    "ms": milliseconds,
+                    "rows": rows,
+                    "plan": plan,
+                }
+            )
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Returns the statistics of every statement shape, the slowest in total first,
+        the commits and the slow-query log.
+
+        Returns:
+            dict: The statistics, serializable as JSON.
+        """
+        with self._lock:
+            statements = []
+            for shape, entry in self._statements.items():
+                histogram = list(entry["histogram"])
+                statements.append(
+                    {
+                        "sql": shape,
+                        "count": entry["count"],
+                        "rows": entry["rows"],
+                        "total_ms": entry["seconds"] * 1000,
+                        "mean_ms": entry["seconds"] * 1000 / entry["count"],
+                        "max_ms": entry["max_ms"],
+                        **{
+                            f"p{percentile}_ms": get_percentile(histogram, percentile)
+                            for percentile in PERCENTILES
+                        },
+                        "histogram": histogram,
+                    }
+                )
+            return {
+                "since": self.started,
+                "buckets_ms": list(LATENCY_BUCKETS_MS),
+                "statements": sorted(statements, key=lambda item: -item["total_ms"]),
+                "commits": {
+                    "count": self._commits["count"],
+                    "total_ms": self._commits["seconds"] * 1000,
+                },
+                "slow_query_ms": self.slow_query_ms,
+                "slow_queries": list(self.slow_queries),
+            }
+
+    def to_json(self) -> str:
+        """
+        Returns the summary as JSON.
+
+        Returns:
+            str: The indented JSON document.
+        """
+        return json.dumps(self.summary(), indent=2)
+
+    def reset(self) -> None:
+        """
+        Forgets every recorded statement, commit and slow query.
+        """
+        with self._lock:
+            self._statements.clear()
+            self._commits = {"count": 0, "seconds": 0.0}
+            self.slow_queries.clear()
+            self.started = time.time()
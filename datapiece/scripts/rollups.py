@@ -0,0 +1,97 @@
+"""
+This module reads and rebuilds the appearance rollup tables.
+
+The rollup tables count the appearances of every character per chapter, arc and volume.
+The triggers of the schema keep them current when CharacterAppearances changes;
+moving panels, pages or chapters around requires a rebuild.
+"""
+
+from typing import Any, Iterator, Optional
+
+from datapiece.scripts.db_query_handler import DBQueryHandler
+
+ROLLUP_LEVELS: dict[str, tuple[str, str, str]] = {
+    "chapter": ("CharacterChapterAppearances", "ChapterID", "Pages.ChapterID"),
+    "arc": ("CharacterArcAppearances", "ArcID", "Chapters.ArcID"),
+    "volume": ("CharacterVolumeAppearances", "VolumeNumber", "Chapters.VolumeNumber"),
+}
+
+APPEARANCES_JOIN = (
+    "FROM CharacterAppearances "
+    "JOIN Panels ON Panels.PanelID = CharacterAppearances.PanelID "
+    "JOIN Pages ON Pages.PageID = Panels.PageID "
+    "JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID"
+)
+
+
+def get_rebuild_statements() -> list[tuple[str, tuple]]:
+    """
+    Returns the statements that recompute every rollup table from CharacterAppearances.
+
+    Returns:
+        list[tuple]: Pairs of SQL query and bound parameters.
+    """
+    statements: list[tuple[str, tuple]] = []
+    for table, column, source in ROLLUP_LEVELS.values():
+        statements.append((f"DELETE FROM {table}", ()))
+        statements.append(
+            (
+                f"INSERT INTO {table} (CharacterID, {column}, AppearanceCount) "
+                f"SELECT CharacterAppearances.CharacterID, {source}, COUNT(*) "
+                f"{APPEARANCES_JOIN} "
+                f"WHERE CharacterAppearances.CharacterID IS NOT NULL AND {source} IS NOT NULL "
+                f"GROUP BY CharacterAppearances.CharacterID, {source}",
+                (),
+            )
+        )
+    return statements
+
+
+def rebuild_rollups(handler: DBQueryHandler) -> None:
+    """
+    Recomputes every rollup table in one transaction, e.g. after a backfill.
+
+    Args:
+        handler (DBQueryHandler): The handler of the database.
+    """
+    handler.execute_transaction(get_rebuild_statements())
+
+
+def get_appearance_counts(
+    handler: DBQueryHandler,
+    level: str,
+    character_id: Optional[Any] = None,
+    key: Optional[Any] = None,
+) -> Iterator[tuple]:
+    """
+    Streams the appearance counts of a rollup level.
+    Filtering by character or by chapter, arc or volume reads only the matching rows.
+
+    Args:
+        handler (DBQueryHandler): The handler of the database.
+        level (str): "chapter", "arc" or "volume".
+        character_id (Any, optional): Only return the counts of this character.
+        key (Any, optional): Only return the counts of this chapter, arc or volume.
+
+    Yields:
+        tuple: Rows of (CharacterID, ChapterID | ArcID | VolumeNumber, AppearanceCount).
+
+    Raises:
+        ValueError: If the level is unknown.
+    """
+    if level not in ROLLUP_LEVELS:
+        raise ValueError(f"Unknown rollup level: {level}")
+    table, column, _ = ROLLUP_LEVELS[level]
+    conditions, params = [], []
+    if character_id is not None:
+        conditions.append("CharacterID = ?")
+        params.append(character_id)
+    if key is not None:
+        conditions.append(f"{column} = ?")
+        params.append(key)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return handler.fetch(
+        f"SELECT CharacterID, {column}, AppearanceCount FROM {table}{where} "
+        f"ORDER BY CharacterID, {column}",
+        params,
+    )
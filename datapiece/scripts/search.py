@@ -0,0 +1,254 @@
+"""
+This module searches the names of the characters, chapters and locations.
+
+The names are kept in the SearchIndex FTS5 table by the triggers of the schema, with
+the trigram tokenizer, so that any substring of three characters or more is found
+through the index instead of a LIKE scan of every table. The hits of every kind of
+entity are ranked together by bm25.
+
+When nothing contains the searched text, e.g. because of a typo, the entries sharing
+the most trigrams with it are ranked by their edit distance to the text instead.
+"""
+
+from typing import Any, Optional
+
+from datapiece.scripts.db_query_handler import DBQueryHandler
+
+DEFAULT_SEARCH_LIMIT = 20
+FUZZY_CANDIDATES = 200
+MIN_TERM_LENGTH = 3
+
+# The rowid of a SearchIndex entry is the ID of its entity times SEARCH_KIND_COUNT plus its kind.
+SEARCH_KINDS: dict[str, int] = {"character": 1, "chapter": 2, "location": 3}
+SEARCH_KIND_COUNT = 4
+
+SEARCH_QUERY = "SELECT rowid, Text FROM SearchIndex WHERE {condition} ORDER BY {order} LIMIT ?"
+
+
+def quote_term(term: str) -> str:
+    """
+    Quotes a term as an FTS5 string, so that its characters are not read as operators.
+
+    Parameters:
+        term (str): The term.
+
+    Returns:
+        str: The quoted term.
+    """
+    return '"' + term.replace('"', '""') + '"'
+
+
+def get_trigrams(text: str) -> list[str]:
+    """
+    Returns the distinct sequences of three characters of a text, in order.
+
+    Parameters:
+        text (str): The text, matched case-insensitively.
+
+    Returns:
+        list[str]: The trigrams.
+    """
+    text = text.lower()
+    return list(dict.fromkeys(text[i:i + 3] for i in range(len(text) - 2)))
+
+
+def get_substring_distance(pattern: str, text: str) -> int:
+    """
+    Returns the smallest edit distance between a pattern and any substring of a text,
+    so that a short pattern is close to a long name containing a variant of it.
+
+    Parameters:
+        pattern (str): The searched text.
+        text (str): The name.
+
+    Returns:
+        int: The number of inserted, deleted or replaced characters, case-insensitively.
+    """
+    pattern, text = pattern.lower(), text.lower()
+    # Starting anywhere in the text is free: the first row is all zeros.
+    previous = [0] * (len(text) + 1)
+    for i, char in enumerate(pattern, 1):
+        current = [i]
+        for j, other in enumerate(text, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other))
+            )
+        previous = current
+    return min(previous)
+
+
+def get_max_distance(text: str) -> int:
+    """
+    Returns the largest edit distance of a fuzzy hit, one edit per four characters.
+
+    Parameters:
+        text (str): The searched text.
+
+    Returns:
+        int: The largest distance.
+    """
+    return max(1, len(text) // 4)
+
+
+def get_search_condition(text: str, kind: Optional[str]) -> tuple[str, list[Any]]:
+    """
+    Returns the condition of the entries containing every word of a text.
+    The words shorter than a trigram cannot be matched by the index and are
+    matched with LIKE on the entries of the other words.
+
+    Parameters:
+        text (str): The searched text.
+        kind (str, optional): The kind of entity, every kind if omitted.
+
+    Returns:
+        tuple: The condition and its parameters.
+    """
+    terms = text.split()
+    long_terms = [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+    conditions: list[str] = []
+    params: list[Any] = []
+    if long_terms:
+        conditions.append("SearchIndex MATCH ?")
+        params.append(" AND ".join(quote_term(term) for term in long_terms))
+    for term in terms:
+        if len(term) < MIN_TERM_LENGTH:
+            conditions.append("Text LIKE ? ESCAPE '\\'")
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+    if kind is not None:
+        conditions.append("(rowid & 3) = ?")
+        params.append(SEARCH_KINDS[kind])
+    return " AND ".join(conditions) or "1", params
+
+
+def get_hit(rowid: int, text: str, distance: int = 0) -> tuple[str, int, str, int]:
+    """
+    Decodes a SearchIndex entry.
+
+    Parameters:
+        rowid (int): The rowid of the entry.
+        text (str): The name.
+        distance (int): The edit distance to the searched text.
+
+    Returns:
+        tuple: The kind of entity, its ID, the name and the distance.
+    """
+    entity_id, code = divmod(rowid, SEARCH_KIND_COUNT)
+    kind = next(name for name, value in SEARCH_KINDS.items() if value == code)
+    return kind, entity_id, text, distance
+
+
+def search(
+    handler: DBQueryHandler,
+    text: str,
+    kind: Optional[str] = None,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+    fuzzy: bool = True,
+) -> list[tuple[str, int, str, int]]:
+    """
+    Finds the characters, chapters and locations whose name contains every word of a text,
+    best match first. Without such a name, the names closest to the text are returned.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+        text (str): The searched text, matched case-insensitively.
+        kind (str, optional): "character", "chapter" or "location", every kind if omitted.
+        limit (int): Maximum number of hits.
+        fuzzy (bool): Whether to fall back on the closest names.
+
+    Returns:
+        list[tuple]: The (kind, ID, name, edit distance) of every hit, 0 for an exact match.
+
+    Raises:
+        ValueError: If the kind is unknown or the text is empty.
+    """
+    if kind is not None and kind not in SEARCH_KINDS:
+        raise ValueError(f"Unknown search kind: {kind}")
+    if not text.strip():
+        raise ValueError("The searched text is empty.")
+    condition, params = get_search_condition(text, kind)
+    order = "rank" if "MATCH" in condition else "length(Text)"
+    rows = handler.fetch(SEARCH_QUERY.format(condition=condition, order=order), [*params, limit])
+    hits = [get_hit(rowid, name) for rowid, name in rows]
+    if hits or not fuzzy:
+        return hits
+    return search_fuzzy(handler, text, kind, limit)
+
+
+def search_fuzzy(
+    handler: DBQueryHandler,
+    text: str,
+    kind: Optional[str] = None,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+) -> list[tuple[str, int, str, int]]:
+    """
+    Finds the names containing a variant of a text within a few edits.
+    The candidates are the entries sharing the most trigrams with the text.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+        text (str): The searched text, matched case-insensitively.
+        kind (str, optional): "character", "chapter" or "location", every kind if omitted.
+        limit (int): Maximum number of hits.
+
+    Returns:
+        list[tuple]: The (kind, ID, name, edit distance) of every hit, closest first.
+    """
+    trigrams = get_trigrams(" ".join(text.split()))
+    if not trigrams:
+        return []
+    condition = "SearchIndex MATCH ?"
+    params: list[Any] = [" OR ".join(quote_term(trigram) for trigram in trigrams)]
+    if kind is not None:
+        condition += " AND (rowid & 3) = ?"
+        params.append(SEARCH_KINDS[kind])
+    rows = handler.fetch(
+        SEARCH_QUERY.format(condition=condition, order="rank"), [*params, FUZZY_CANDIDATES]
+    )
+    max_distance = get_max_distance(text)
+    hits = []
+    for position, (rowid, name) in enumerate(rows):
+        distance = get_substring_distance(text, name)
+        if distance <= max_distance:
+            hits.append((distance, position, get_hit(rowid, name, distance)))
+    return [hit for _, _, hit in sorted(hits)[:limit]]
+
+
+def get_rebuild_statements() -> list[tuple[str, tuple]]:
+    """
+    Returns the statements that recompute the Locations table and the search index,
+    e.g. for a database created before they were added to the schema.
+
+    Returns:
+        list[tuple]: Pairs of SQL query and bound parameters.
+    """
+    return [
+        ("DELETE FROM SearchIndex", ()),
+        ("DELETE FROM Locations", ()),
+        (
+            "INSERT INTO Locations (Name, PanelCount) SELECT Location, COUNT(*) FROM Panels "
+            "WHERE Location IS NOT NULL GROUP BY Location",
+            (),
+        ),
+        (
+            "INSERT INTO SearchIndex (rowid, Text) SELECT CharacterID * 4 + 1, Name "
+            "FROM Characters WHERE CharacterID IS NOT NULL",
+            (),
+        ),
+        (
+            "INSERT INTO SearchIndex (rowid, Text) SELECT ChapterID * 4 + 2, ChapterName "
+            "FROM Chapters WHERE ChapterID IS NOT NULL AND ChapterName IS NOT NULL",
+            (),
+        ),
+        ("INSERT INTO SearchIndex (SearchIndex) VALUES ('optimize')", ()),
+    ]
+
+
+def rebuild_search(handler: DBQueryHandler) -> None:
+    """
+    Recomputes the Locations table and the search index in one transaction.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+    """
+    handler.execute_transaction(get_rebuild_statements())
@@ -0,0 +1,320 @@
+"""
+This module provides a local JSON-over-HTTP service exposing the commands and read queries.
+
+Endpoints:
+    GET  /health              liveness check
+    GET  /commands            names of the available commands
+    POST /commands/<name>     runs a command, body {"args": [...]}, returns its printed output
+    POST /query               runs a read query, body {"sql": "...", "params": [...]},
+                              streams {"columns": [...], "rows": [[...], ...]}
+
+Connections are kept alive (HTTP/1.1) and every request runs in its own thread.
+Every connection has its own position (volume, chapter, page and panel) for the
+commands adding to the hierarchy.
+Read queries use the handler's read-only connection pool, so they run in parallel
+with each other and with the commands; query results are streamed in chunks.
+"""
+
+import contextlib
+import io
+import json
+import logging
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator, Optional
+
+from datapiece.scripts.commands import COMMAND_ALIASES, Commands
+from datapiece.scripts.db_query_handler import DBQueryHandler
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Commands that are exposed: the ones working on the database only. The commands
+# reading or writing files named by their arguments or the config (import, export,
+# stats json, profiling) and the ones prompting for input are not.
+HTTP_COMMANDS = (
+    "start_volume",
+    "start_chapter",
+    "add_page",
+    "add_panel",
+    "add_appearance",
+    "rollups",
+    "timeline",
+    "search",
+    "graph",
+    "coappearances",
+    "pool",
+    "cache",
+)
+
+
+class QueryServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server sharing a handler and its commands between requests.
+
+    Attributes:
+        handler (DBQueryHandler): The handler of the database.
+        commands (Commands): The commands exposed by the server.
+        command_names (set): Names of the commands that can be run.
+        command_lock (threading.Lock): Runs one command at a time.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, address: tuple[str, int], handler: DBQueryHandler, commands: Commands
+    ) -> None:
+        """
+        Constructs all the necessary attributes for the QueryServer object.
+
+        Parameters:
+            address (tuple): Host and port to listen on.
+            handler (DBQueryHandler): The handler of the database.
+            commands (Commands): The commands exposed by the server.
+        """
+        super().__init__(address, QueryRequestHandler)
+        self.handler = handler
+        self.commands = commands
+        self.command_names = set(commands.get_command_names()).intersection(HTTP_COMMANDS)
+        self.command_lock = threading.Lock()
+
+    def run_command(self, name: str, args: list[Any], position: dict[str, Any]) -> str:
+        """
+        Runs a command at the position of a client and returns what it printed.
+        The position is swapped into the shared commands for the duration of the
+        command, so that every client adds to its own volume, chapter, page and panel.
+
+        Parameters:
+            name (str): Name of the command.
+            args (list): Arguments of the command.
+            position (dict): The position of the client, updated by the command.
+
+        Returns:
+            str: The printed output of the command.
+        """
+        method = getattr(self.commands, COMMAND_ALIASES.get(name, name))
+        output = io.StringIO()
+        with self.command_lock, contextlib.redirect_stdout(output):
+            shared_position = self.commands.position
+            self.commands.position = position
+            try:
+                method(*[str(arg) for arg in args])
+            finally:
+                self.commands.position = shared_position
+        return output.getvalue()
+
+    @contextlib.contextmanager
+    def read_batches(
+        self, sql: str, params: list[Any]
+    ) -> Iterator[tuple[list[str], Iterator[list[Any]]]]:
+        """
+        Runs a read query on a pooled read-only connection.
+        An in-memory database has no readers, so the query runs on the handler's
+        connection: it is executed under the handler's lock with query_only switched on,
+        then every batch is fetched under the lock, which is released between the
+        batches so that the commands are not blocked while the result is sent.
+
+        Parameters:
+            sql (str): SQL query with "?" placeholders.
+            params (list): Values bound to the placeholders.
+
+        Yields:
+            tuple: The column names and an iterator over the batches of rows.
+        """
+        size = self.handler.fetch_size
+        if self.handler.in_memory:
+            lock = self.handler.lock
+            with lock:
+                cursor = self.handler.conn.cursor()
+                cursor.execute("PRAGMA query_only = ON")
+                try:
+                    # The statement does all of its writes, if any, in its first step.
+                    cursor.execute(sql, params)
+                    first = cursor.fetchmany(size)
+                except sqlite3.Error:
+                    cursor.close()
+                    raise
+                finally:
+                    self.handler.conn.execute("PRAGMA query_only = OFF")
+
+            def fetch_batches() -> Iterator[list[Any]]:
+                batch = first
+                while batch:
+                    yield batch
+                    with lock:
+                        batch = cursor.fetchmany(size)
+
+            try:
+                yield [column[0] for column in cursor.description or []], fetch_batches()
+            finally:
+                with lock:
+                    cursor.close()
+            return
+        with self.handler.pool.reader() as conn:
+            cursor = conn.execute(sql, params)
+            try:
+                yield (
+                    [column[0] for column in cursor.description or []],
+                    iter(lambda: cursor.fetchmany(size), []),
+                )
+            finally:
+                cursor.close()
+
+
+class QueryRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles the requests of a QueryServer.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and chunks are small separate writes: without TCP_NODELAY each of them
+    # would wait for the delayed ACK of the previous one on a kept-alive connection.
+    disable_nagle_algorithm = True
+    server: QueryServer
+
+    def setup(self) -> None:
+        """
+        Sets up the connection with an empty position for the commands of the client.
+        """
+        super().setup()
+        # pylint: disable-next=attribute-defined-outside-init
+        self.position: dict[str, Any] = dict.fromkeys(self.server.commands.position)
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """
+        Handles the GET endpoints.
+        """
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/commands":
+            self._send_json(200, {"commands": sorted(self.server.command_names)})
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self) -> None:  # pylint: disable=invalid-name
+        """
+        Handles the POST endpoints.
+        """
+        body = self._read_json()
+        if body is None:
+            return
+        if self.path == "/query":
+            self._handle_query(body)
+        elif self.path.startswith("/commands/"):
+            self._handle_command(self.path[len("/commands/"):], body)
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=W0622
+        """
+        Logs the requests at debug level instead of printing them.
+        """
+        logging.debug(format, *args)
+
+    def _handle_command(self, name: str, body: dict[str, Any]) -> None:
+        """
+        Runs a command and sends its output.
+
+        Parameters:
+            name (str): Name of the command.
+            body (dict): The request body with the optional "args" list.
+        """
+        if name not in self.server.command_names:
+            self._send_json(404, {"error": f"Unknown command: {name}"})
+            return
+        try:
+            output = self.server.run_command(name, list(body.get("args", [])), self.position)
+        except (sqlite3.Error, OSError, ValueError, TypeError) as error:
+            self._send_json(400, {"error": str(error)})
+            return
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logging.exception("Command %s failed.", name)
+            self._send_json(500, {"error": f"{type(error).__name__}: {error}"})
+            return
+        self._send_json(200, {"status": "ok", "output": output})
+
+    def _handle_query(self, body: dict[str, Any]) -> None:
+        """
+        Runs a read query and streams its result with chunked transfer encoding.
+        An error after the headers were sent cannot be answered any more: the response
+        is left without its last chunk and the connection is closed, so that the client
+        sees an incomplete body.
+
+        Parameters:
+            body (dict): The request body with "sql" and the optional "params" list.
+        """
+        sql = body.get("sql")
+        if not isinstance(sql, str):
+            self._send_json(400, {"error": "Missing sql."})
+            return
+        headers_sent = False
+        try:
+            with self.server.read_batches(sql, list(body.get("params", []))) as (
+                columns,
+                batches,
+            ):
+                batch = next(batches, [])
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                headers_sent = True
+                self._write_chunk(f'{{"columns": {json.dumps(columns)}, "rows": [')
+                separator = ""
+                while batch:
+                    rows = ", ".join(json.dumps(list(row), default=str) for row in batch)
+                    self._write_chunk(separator + rows)
+                    separator = ", "
+                    batch = next(batches, [])
+                self._write_chunk("]}")
+                self.wfile.write(b"0\r\n\r\n")
+        except (sqlite3.Error, RuntimeError) as error:
+            if not headers_sent:
+                self._send_json(400, {"error": str(error)})
+                return
+            logging.error("Query failed while streaming its result: %s", error)
+            self.close_connection = True  # pylint: disable=attribute-defined-outside-init
+
+    def _read_json(self) -> Optional[dict[str, Any]]:
+        """
+        Reads the JSON body of the request, answering 400 if it is invalid.
+
+        Returns:
+            dict: The request body, or None if it is invalid.
+        """
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as error:
+            self._send_json(400, {"error": f"Invalid JSON: {error}"})
+            return None
+        if not isinstance(body, dict):
+            self._send_json(400, {"error": "The body must be a JSON object."})
+            return None
+        return body
+
+    def _send_json(self, status: int, payload: dict[str, Any]) -> None:
+        """
+        Sends a complete JSON response.
+
+        Parameters:
+            status (int): The HTTP status code.
+            payload (dict): The response body.
+        """
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, text: str) -> None:
+        """
+        Writes a chunk of a chunked response.
+
+        Parameters:
+            text (str): The content of the chunk.
+        """
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
@@ -0,0 +1,90 @@
+"""
+This module provides a cache of template databases built from the schema files.
+
+A template is an empty database with the schema already applied. It is named after
+a hash of the schema files, so it is built once and rebuilt only when they change.
+New databases are created by copying the template instead of replaying the schema.
+"""
+
+import glob
+import hashlib
+import os
+import shutil
+import sqlite3
+
+from datapiece.scripts.utils.files import is_readable_existing_file
+
+TEMPLATE_PREFIX = "template-"
+
+
+def get_schema_hash(sql_files: list[str]) -> str:
+    """
+    Returns a hash of the content of the given SQL files.
+
+    Args:
+        sql_files (list[str]): Paths of the SQL files, missing ones are skipped.
+
+    Returns:
+        str: A short hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    for sql_file in sql_files:
+        if sql_file and is_readable_existing_file(sql_file):
+            with open(sql_file, "rb") as f:
+                digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def get_template_path(template_dir: str, sql_files: list[str]) -> str:
+    """
+    Returns the path of the template database for the given SQL files.
+
+    Args:
+        template_dir (str): Directory of the template databases.
+        sql_files (list[str]): Paths of the SQL files.
+
+    Returns:
+        str: The path of the template database.
+    """
+    return os.path.join(template_dir, f"{TEMPLATE_PREFIX}{get_schema_hash(sql_files)}.db")
+
+
+def build_template(template_path: str, sql_commands: list[str]) -> None:
+    """
+    Builds a template database and removes the templates of older schemas.
+    The template is written to a temporary file first, so that concurrent
+    processes never clone a half-built template.
+
+    Args:
+        template_path (str): Path of the template database.
+        sql_commands (list[str]): The SQL commands creating the schema.
+    """
+    template_dir = os.path.dirname(template_path)
+    os.makedirs(template_dir or ".", exist_ok=True)
+    tmp_path = f"{template_path}.{os.getpid()}.tmp"
+    conn = sqlite3.connect(tmp_path)
+    try:
+        for command in sql_commands:
+            conn.execute(command)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, template_path)
+    for old_template in glob.glob(os.path.join(template_dir, f"{TEMPLATE_PREFIX}*.db")):
+        if os.path.abspath(old_template) != os.path.abspath(template_path):
+            os.remove(old_template)
+
+
+def clone_template(template_path: str, db_path: str) -> None:
+    """
+    Creates a database as a copy of a template database.
+
+    Args:
+        template_path (str): Path of the template database.
+        db_path (str): Path of the database to create.
+    """
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    shutil.copyfile(template_path, db_path)
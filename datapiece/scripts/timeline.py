@@ -0,0 +1,234 @@
+"""
+This module reads the timeline of the character events in reading order.
+
+The triggers of the schema keep the reading-order ordinal of every panel in
+PanelOrdinals, ChapterNumber << 32 | PageNumber << 16 | PanelNumber, and the known
+values of every event in CharacterTimeline, keyed by character, attribute and ordinal.
+The value of an attribute as of a point of the story is then the last entry before
+its ordinal, found with one seek of the primary key, and a history is one range scan.
+
+Keeping both tables current row by row costs several writes per event and lookups by
+PageID, ChapterID and PanelID, which scan whole tables once the indexes are dropped
+for a bulk load. A bulk load therefore defers the triggers and rebuilds both tables
+in one pass afterwards.
+"""
+
+from typing import Any, Optional
+
+from datapiece.scripts.db_query_handler import DBQueryHandler
+
+CHAPTER_SHIFT = 32
+PAGE_SHIFT = 16
+PANEL_MASK = (1 << PAGE_SHIFT) - 1
+PAGE_MASK = (1 << (CHAPTER_SHIFT - PAGE_SHIFT)) - 1
+CHAPTER_END = (1 << CHAPTER_SHIFT) - 1
+
+TIMELINE_ATTRIBUTES = ("Bounty", "Status", "FruitID", "AffiliationID", "AbilityID")
+
+# The name of the timeline in DeferredMaintenance, suspending its triggers.
+DEFERRED_NAME = "timeline"
+
+AS_OF_QUERY = (
+    "SELECT Value, Ordinal, EventID FROM CharacterTimeline "
+    "WHERE CharacterID = ? AND Attribute = ? AND Ordinal <= ? "
+    "ORDER BY Ordinal DESC, EventID DESC LIMIT 1"
+)
+
+HISTORY_QUERY = (
+    "SELECT Ordinal, EventID, Attribute, Value FROM CharacterTimeline "
+    "WHERE CharacterID = ? AND Attribute IN ({attributes}) AND Ordinal BETWEEN ? AND ? "
+    "ORDER BY Ordinal, EventID, Attribute"
+)
+
+
+def get_ordinal(chapter: int, page: int = 0, panel: int = 0) -> int:
+    """
+    Returns the reading-order ordinal of a position of the story.
+
+    Parameters:
+        chapter (int): The ChapterNumber.
+        page (int): The PageNumber, below 65536.
+        panel (int): The PanelNumber, below 65536.
+
+    Returns:
+        int: The ordinal.
+    """
+    return (int(chapter) << CHAPTER_SHIFT) | (int(page) << PAGE_SHIFT) | int(panel)
+
+
+def get_chapter_end(chapter: int) -> int:
+    """
+    Returns the ordinal after which every panel belongs to a later chapter.
+
+    Parameters:
+        chapter (int): The ChapterNumber.
+
+    Returns:
+        int: The largest ordinal of the chapter.
+    """
+    return get_ordinal(chapter) | CHAPTER_END
+
+
+def split_ordinal(ordinal: int) -> tuple[int, int, int]:
+    """
+    Returns the position of the story of an ordinal.
+
+    Parameters:
+        ordinal (int): The ordinal.
+
+    Returns:
+        tuple: The ChapterNumber, PageNumber and PanelNumber.
+    """
+    return ordinal >> CHAPTER_SHIFT, (ordinal >> PAGE_SHIFT) & PAGE_MASK, ordinal & PANEL_MASK
+
+
+def get_attributes(attribute: Optional[str] = None) -> tuple[str, ...]:
+    """
+    Validates an attribute of the timeline.
+
+    Parameters:
+        attribute (str, optional): The attribute, every attribute if omitted.
+
+    Returns:
+        tuple: The selected attributes.
+
+    Raises:
+        ValueError: If the attribute is unknown.
+    """
+    if attribute is None:
+        return TIMELINE_ATTRIBUTES
+    if attribute not in TIMELINE_ATTRIBUTES:
+        raise ValueError(f"Unknown timeline attribute: {attribute}")
+    return (attribute,)
+
+
+def get_snapshot(
+    handler: DBQueryHandler, character_id: Any, chapter: Optional[int] = None
+) -> dict[str, tuple[Any, int, int]]:
+    """
+    Returns the last known value of every attribute of a character at the end of a chapter.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+        character_id (Any): The CharacterID.
+        chapter (int, optional): The ChapterNumber, the end of the story if omitted.
+
+    Returns:
+        dict: The (value, ordinal, EventID) of every attribute with a known value.
+    """
+    end = get_chapter_end(chapter) if chapter is not None else (1 << 63) - 1
+    snapshot = {}
+    for attribute in TIMELINE_ATTRIBUTES:
+        for value, ordinal, event_id in handler.fetch(
+            AS_OF_QUERY, (character_id, attribute, end)
+        ):
+            snapshot[attribute] = (value, ordinal, event_id)
+    return snapshot
+
+
+def get_history(
+    handler: DBQueryHandler,
+    character_id: Any,
+    first_chapter: int,
+    last_chapter: int,
+    attribute: Optional[str] = None,
+) -> list[tuple[int, int, str, Any]]:
+    """
+    Returns the known values of the events of a character within a range of chapters.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+        character_id (Any): The CharacterID.
+        first_chapter (int): The first ChapterNumber of the range.
+        last_chapter (int): The last ChapterNumber of the range.
+        attribute (str, optional): The attribute, every attribute if omitted.
+
+    Returns:
+        list[tuple]: The (ordinal, EventID, attribute, value) entries in reading order.
+
+    Raises:
+        ValueError: If the attribute is unknown.
+    """
+    attributes = get_attributes(attribute)
+    query = HISTORY_QUERY.format(attributes=", ".join("?" for _ in attributes))
+    return list(
+        handler.fetch(
+            query,
+            (character_id, *attributes, get_ordinal(first_chapter), get_chapter_end(last_chapter)),
+        )
+    )
+
+
+def defer_timeline(handler: DBQueryHandler) -> None:
+    """
+    Suspends the triggers maintaining the panel ordinals and the timeline, e.g. before
+    a bulk load, until the next rebuild.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+    """
+    handler.execute(
+        "INSERT INTO DeferredMaintenance (Name) VALUES (?) ON CONFLICT (Name) DO NOTHING",
+        (DEFERRED_NAME,),
+    )
+
+
+def is_timeline_deferred(handler: DBQueryHandler) -> bool:
+    """
+    Checks if the triggers maintaining the timeline are suspended.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+
+    Returns:
+        bool: True if the timeline waits for a rebuild, False otherwise.
+    """
+    return bool(
+        list(handler.fetch("SELECT 1 FROM DeferredMaintenance WHERE Name = ?", (DEFERRED_NAME,)))
+    )
+
+
+def get_rebuild_statements() -> list[tuple[str, tuple]]:
+    """
+    Returns the statements that recompute the panel ordinals and the timeline in one pass
+    each, with the triggers suspended, and resume the triggers.
+
+    Returns:
+        list[tuple]: Pairs of SQL query and bound parameters.
+    """
+    return [
+        (
+            "INSERT INTO DeferredMaintenance (Name) VALUES (?) ON CONFLICT (Name) DO NOTHING",
+            (DEFERRED_NAME,),
+        ),
+        ("DELETE FROM CharacterTimeline", ()),
+        ("DELETE FROM PanelOrdinals", ()),
+        (
+            "INSERT INTO PanelOrdinals (PanelID, Ordinal) "
+            f"SELECT Panels.PanelID, (Chapters.ChapterNumber << {CHAPTER_SHIFT}) "
+            f"| (Pages.PageNumber << {PAGE_SHIFT}) | Panels.PanelNumber "
+            "FROM Panels "
+            "JOIN Pages ON Pages.PageID = Panels.PageID "
+            "JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID "
+            "WHERE Panels.PanelID IS NOT NULL",
+            (),
+        ),
+        (
+            "INSERT INTO CharacterTimeline (CharacterID, Attribute, Ordinal, EventID, Value) "
+            "SELECT CharacterID, Attribute, Ordinal, EventID, Value "
+            "FROM CharacterTimelineEntries ORDER BY CharacterID, Attribute, Ordinal, EventID",
+            (),
+        ),
+        ("DELETE FROM DeferredMaintenance WHERE Name = ?", (DEFERRED_NAME,)),
+    ]
+
+
+def rebuild_timeline(handler: DBQueryHandler) -> None:
+    """
+    Recomputes the panel ordinals and the timeline in one transaction, e.g. after a bulk
+    load, and resumes their triggers.
+
+    Parameters:
+        handler (DBQueryHandler): The handler of the database.
+    """
+    handler.execute_transaction(get_rebuild_statements())
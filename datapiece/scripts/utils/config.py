@@ -44,3 +44,17 @@ def get_key_list(d: dict[str, Any], key: str) -> list[str]:
     Returns the value of a key from a dictionary as a list.
     """
     return d.get(key, [])
+
+
+def get_key_int(d: dict[str, Any], key: str, default: int = 0) -> int:
+    """
+    Returns the value of a key from a dictionary as an int.
+    """
+    return int(d.get(key, default))
+
+
+def get_key_float(d: dict[str, Any], key: str, default: float = 0.0) -> float:
+    """
+    Returns the value of a key from a dictionary as a float.
+    """
+    return float(d.get(key, default))
@@ -2,11 +2,14 @@
 This module provides utility functions for the setup of the application.
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
+from datapiece.scripts.commands import Commands
 from datapiece.scripts.console import Console
 from datapiece.scripts.db_query_handler import DBQueryHandler
-from datapiece.scripts.utils.config import get_key_dict
+from datapiece.scripts.server import DEFAULT_HOST, DEFAULT_PORT, QueryServer
+from datapiece.scripts.utils.config import (get_key_dict, get_key_int,
+                                            get_key_str)
 
 
 def create_handler(config: Dict[str, Any]) -> DBQueryHandler:
@@ -34,3 +37,30 @@ def create_console(handler: DBQueryHandler, config: Dict[str, Any]) -> Console:
         Console: The created Console instance.
     """
     return Console(handler, get_key_dict(config, "console"))
+
+
+def create_server(
+    handler: DBQueryHandler,
+    config: Dict[str, Any],
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+) -> QueryServer:
+    """
+    Creates a QueryServer instance listening on the configured address.
+
+    Args:
+        handler (DBQueryHandler): The DBQueryHandler instance.
+        config (Dict[str, Any]): The configuration dictionary.
+        host (str, optional): Overrides the configured host.
+        port (int, optional): Overrides the configured port.
+
+    Returns:
+        QueryServer: The created QueryServer instance.
+    """
+    server_config = get_key_dict(config, "server")
+    commands = Commands(handler, get_key_dict(server_config, "commands"))
+    address = (
+        host or get_key_str(server_config, "host") or DEFAULT_HOST,
+        port if port is not None else get_key_int(server_config, "port", DEFAULT_PORT),
+    )
+    return QueryServer(address, handler, commands)
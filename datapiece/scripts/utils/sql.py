@@ -0,0 +1,50 @@
+"""
+A module with helpers for SQL scripts.
+"""
+
+import sqlite3
+
+
+def split_sql_statements(script: str) -> list[str]:
+    """
+    Splits an SQL script into its statements.
+    Unlike a plain split on ";", the semicolons inside trigger bodies
+    and string literals do not end a statement.
+
+    Args:
+        script (str): The SQL script.
+
+    Returns:
+        list[str]: The non-empty statements without their final semicolon.
+    """
+    statements = []
+    buffer = ""
+    parts = script.split(";")
+    for position, part in enumerate(parts):
+        buffer += part if position == len(parts) - 1 else part + ";"
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip().rstrip(";").strip()
+            if statement:
+                statements.append(statement)
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+def format_query_plan(rows: list[tuple]) -> list[str]:
+    """
+    Formats the rows of EXPLAIN QUERY PLAN as an indented tree.
+
+    Args:
+        rows (list[tuple]): Rows of (id, parent, notused, detail).
+
+    Returns:
+        list[str]: One line per plan step.
+    """
+    depths: dict[int, int] = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depths[node_id] = depths.get(parent, -1) + 1
+        lines.append(f"{'  ' * depths[node_id]}{detail}")
+    return lines
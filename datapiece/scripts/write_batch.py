@@ -0,0 +1,118 @@
+"""
+This module defines the WriteBatch class which buffers writes to be committed together.
+"""
+
+import time
+
+DEFAULT_BATCH_MAX_ROWS = 1000
+DEFAULT_BATCH_MAX_SECONDS = 5.0
+
+
+class WriteBatch:
+    """
+    A buffer of pending write statements.
+
+    Consecutive statements with the same SQL are stored in the same group,
+    so that each group can be written with a single executemany call.
+
+    Attributes:
+        max_rows (int): Number of buffered rows that makes the batch full.
+        max_seconds (float): Age of the batch that makes it full.
+        active (bool): Flag indicating whether writes are being buffered.
+        groups (list): List of (query, rows) pairs in insertion order.
+        rows (int): Number of buffered rows.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = DEFAULT_BATCH_MAX_ROWS,
+        max_seconds: float = DEFAULT_BATCH_MAX_SECONDS,
+    ) -> None:
+        """
+        Initializes an empty, inactive batch.
+
+        Parameters:
+            max_rows (int): Row count threshold.
+            max_seconds (float): Time threshold in seconds.
+        """
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.active = False
+        self.groups: list[tuple[str, list[tuple]]] = []
+        self.rows = 0
+        self.started = 0.0
+
+    def start(self) -> None:
+        """
+        Starts buffering writes.
+        """
+        self.active = True
+        self.started = time.monotonic()
+
+    def stop(self) -> None:
+        """
+        Stops buffering writes.
+        """
+        self.active = False
+
+    def add(self, query: str, params: tuple) -> bool:
+        """
+        Adds a statement to the buffer.
+
+        Parameters:
+            query (str): SQL query.
+            params (tuple): Parameters bound to the query.
+
+        Returns:
+            bool: True if the batch is full and should be flushed, False otherwise.
+        """
+        if self.groups and self.groups[-1][0] == query:
+            self.groups[-1][1].append(params)
+        else:
+            self.groups.append((query, [params]))
+        self.rows += 1
+        return self.is_full()
+
+    def add_many(self, query: str, rows: list[tuple]) -> bool:
+        """
+        Adds a statement with several parameter rows to the buffer.
+
+        Parameters:
+            query (str): SQL query.
+            rows (list[tuple]): Parameter rows bound to the query.
+
+        Returns:
+            bool: True if the batch is full and should be flushed, False otherwise.
+        """
+        if not rows:
+            return self.is_full()
+        if self.groups and self.groups[-1][0] == query:
+            self.groups[-1][1].extend(rows)
+        else:
+            self.groups.append((query, list(rows)))
+        self.rows += len(rows)
+        return self.is_full()
+
+    def is_full(self) -> bool:
+        """
+        Checks if the buffer reached the row count or the time threshold.
+
+        Returns:
+            bool: True if the buffer should be flushed, False otherwise.
+        """
+        return (
+            self.rows >= self.max_rows
+            or time.monotonic() - self.started >= self.max_seconds
+        )
+
+    def drain(self) -> tuple[list[tuple[str, list[tuple]]], int]:
+        """
+        Empties the buffer and restarts the time threshold.
+
+        Returns:
+            tuple: The buffered groups and the number of buffered rows.
+        """
+        groups, rows = self.groups, self.rows
+        self.groups, self.rows = [], 0
+        self.started = time.monotonic()
+        return groups, rows
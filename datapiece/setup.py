@@ -3,13 +3,18 @@ This module provides a console application that interacts with a database.
 
 The application uses a configuration file to set up a console and a database query handler.
 The console takes user input and uses the database query handler to interact with the database.
+With --serve, the commands and read queries are served as JSON over HTTP instead,
+and with --script, the commands of a file or of the standard input are run without prompting.
 """
 
 import argparse
 import logging
+import sys
+from typing import Optional
 
 from datapiece.scripts.utils.config import load_config
-from datapiece.scripts.utils.setup import create_console, create_handler
+from datapiece.scripts.utils.setup import (create_console, create_handler,
+                                           create_server)
 
 
 def main(config_path: str) -> None:
@@ -34,6 +39,58 @@ def main(config_path: str) -> None:
         logging.error("An error occurred while starting the console: %s", error)
 
 
+def serve(config_path: str, host: Optional[str] = None, port: Optional[int] = None) -> None:
+    """
+    Serves the commands and read queries over HTTP until interrupted.
+
+    1. Loads the configuration file.
+    2. Creates an instance of the DBQueryHandler class.
+    3. Creates an instance of the QueryServer class.
+    4. Serves requests until Ctrl+C, then closes the server and the handler.
+    """
+    config = load_config(config_path)
+    handler = create_handler(config)
+    server = create_server(handler, config, host, port)
+    address, port = server.socket.getsockname()[:2]
+    print(f"Serving on http://{address}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Exit")
+    finally:
+        server.server_close()
+        handler.close()
+
+
+def run_script(
+    config_path: str, script: str, transaction_size: int = 0, stop_on_error: bool = True
+) -> int:
+    """
+    Runs a file of console commands, one per line, then closes the handler.
+
+    Parameters:
+        config_path (str): The path to the config file.
+        script (str): The path to the script, "-" for the standard input.
+        transaction_size (int): Number of commands per transaction, 0 for the whole script.
+        stop_on_error (bool): Whether to stop at the first failing command.
+
+    Returns:
+        int: Number of failed commands.
+    """
+    config = load_config(config_path)
+    handler = create_handler(config)
+    console = create_console(handler, config)
+    try:
+        if script == "-":
+            _, errors = console.run_script(sys.stdin, transaction_size, stop_on_error)
+        else:
+            with open(script, "r", encoding="utf-8") as f:
+                _, errors = console.run_script(f, transaction_size, stop_on_error)
+    finally:
+        handler.close()
+    return errors
+
+
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(
@@ -45,6 +102,43 @@ if __name__ == "__main__":
         default="config/config.json",
         help="The path to the config file.",
     )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve the commands and read queries over HTTP instead of starting the console.",
+    )
+    parser.add_argument("--host", type=str, default=None, help="The host to serve on.")
+    parser.add_argument("--port", type=int, default=None, help="The port to serve on.")
+    parser.add_argument(
+        "--script",
+        type=str,
+        default=None,
+        help='Run the commands of a file, or of the standard input with "-", without prompting.',
+    )
+    parser.add_argument(
+        "--transaction-size",
+        type=int,
+        default=0,
+        help="Commit the script every N commands instead of once at the end.",
+    )
+    parser.add_argument(
+        "--continue-on-error",
+        action="store_true",
+        help="Log failing script commands and go on instead of stopping.",
+    )
     args = parser.parse_args()
 
-    main(args.config)
+    if args.serve:
+        serve(args.config, args.host, args.port)
+    elif args.script:
+        # Exit with status 1 if any command failed.
+        sys.exit(
+            min(
+                run_script(
+                    args.config, args.script, args.transaction_size, not args.continue_on_error
+                ),
+                1,
+            )
+        )
+    else:
+        main(args.config)
@@ -0,0 +1,43 @@
+CREATE INDEX IF NOT EXISTS idx_chapters_volume ON Chapters (VolumeNumber);
+
+CREATE INDEX IF NOT EXISTS idx_chapters_arc ON Chapters (ArcID);
+
+CREATE INDEX IF NOT EXISTS idx_pages_chapter ON Pages (ChapterID);
+
+CREATE INDEX IF NOT EXISTS idx_panels_page ON Panels (PageID);
+
+CREATE INDEX IF NOT EXISTS idx_appearances_panel ON CharacterAppearances (PanelID);
+
+CREATE INDEX IF NOT EXISTS idx_appearances_character ON CharacterAppearances (CharacterID, PanelID);
+
+CREATE INDEX IF NOT EXISTS idx_character_affiliations_appearance ON CharacterAffiliations (AppearanceID);
+
+CREATE INDEX IF NOT EXISTS idx_character_affiliations_affiliation ON CharacterAffiliations (AffiliationID);
+
+CREATE INDEX IF NOT EXISTS idx_interactions_panel ON CharacterInteractions (PanelID);
+
+CREATE INDEX IF NOT EXISTS idx_interaction_characters_interaction ON InteractionCharacters (InteractionID);
+
+CREATE INDEX IF NOT EXISTS idx_interaction_characters_character ON InteractionCharacters (CharacterID);
+
+CREATE INDEX IF NOT EXISTS idx_family_relationships_character1 ON FamilyRelationships (Character1ID);
+
+CREATE INDEX IF NOT EXISTS idx_family_relationships_character2 ON FamilyRelationships (Character2ID);
+
+CREATE INDEX IF NOT EXISTS idx_romantic_relationships_character1 ON RomanticRelationships (Character1ID);
+
+CREATE INDEX IF NOT EXISTS idx_romantic_relationships_character2 ON RomanticRelationships (Character2ID);
+
+CREATE INDEX IF NOT EXISTS idx_character_relationship_appearance ON CharacterRelationship (AppearanceID);
+
+CREATE INDEX IF NOT EXISTS idx_character_events_appearance ON CharacterEvents (AppearanceID);
+
+CREATE INDEX IF NOT EXISTS idx_character_events_panel ON CharacterEvents (PanelID);
+
+CREATE INDEX IF NOT EXISTS idx_character_chapter_appearances_chapter ON CharacterChapterAppearances (ChapterID);
+
+CREATE INDEX IF NOT EXISTS idx_character_arc_appearances_arc ON CharacterArcAppearances (ArcID);
+
+CREATE INDEX IF NOT EXISTS idx_character_volume_appearances_volume ON CharacterVolumeAppearances (VolumeNumber);
+
+CREATE INDEX IF NOT EXISTS idx_character_timeline_event ON CharacterTimeline (EventID);
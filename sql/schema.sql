@@ -1,3 +1,5 @@
+PRAGMA auto_vacuum = INCREMENTAL;
+
 CREATE TABLE Volumes (
     VolumeNumber INT PRIMARY KEY
 );
@@ -81,6 +83,12 @@ CREATE TABLE Abilities (
     AbilityName VARCHAR(255)
 );
 
+-- The next ID to reserve of every table, see datapiece.scripts.id_allocator.
+CREATE TABLE Sequences (
+    Name TEXT PRIMARY KEY,
+    NextID INT NOT NULL
+) WITHOUT ROWID;
+
 CREATE TABLE CharacterInteractions (
     InteractionID INT PRIMARY KEY,
     PanelID INT,
@@ -135,3 +143,473 @@ CREATE TABLE CharacterEvents (
     FOREIGN KEY (AffiliationID) REFERENCES Affiliations(AffiliationID),
     FOREIGN KEY (AbilityID) REFERENCES Abilities(AbilityID)
 );
+
+CREATE TABLE CharacterChapterAppearances (
+    CharacterID INT NOT NULL,
+    ChapterID INT NOT NULL,
+    AppearanceCount INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (CharacterID, ChapterID),
+    FOREIGN KEY (CharacterID) REFERENCES Characters(CharacterID),
+    FOREIGN KEY (ChapterID) REFERENCES Chapters(ChapterID)
+) WITHOUT ROWID;
+
+CREATE TABLE CharacterArcAppearances (
+    CharacterID INT NOT NULL,
+    ArcID INT NOT NULL,
+    AppearanceCount INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (CharacterID, ArcID),
+    FOREIGN KEY (CharacterID) REFERENCES Characters(CharacterID),
+    FOREIGN KEY (ArcID) REFERENCES Arcs(ArcID)
+) WITHOUT ROWID;
+
+CREATE TABLE CharacterVolumeAppearances (
+    CharacterID INT NOT NULL,
+    VolumeNumber INT NOT NULL,
+    AppearanceCount INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (CharacterID, VolumeNumber),
+    FOREIGN KEY (CharacterID) REFERENCES Characters(CharacterID),
+    FOREIGN KEY (VolumeNumber) REFERENCES Volumes(VolumeNumber)
+) WITHOUT ROWID;
+
+CREATE TRIGGER CharacterAppearancesRollupInsert AFTER INSERT ON CharacterAppearances
+WHEN NEW.CharacterID IS NOT NULL
+BEGIN
+    INSERT INTO CharacterChapterAppearances (CharacterID, ChapterID, AppearanceCount)
+    SELECT NEW.CharacterID, Pages.ChapterID, 1
+    FROM Panels JOIN Pages ON Pages.PageID = Panels.PageID
+    WHERE Panels.PanelID = NEW.PanelID AND Pages.ChapterID IS NOT NULL
+    ON CONFLICT (CharacterID, ChapterID) DO UPDATE SET AppearanceCount = AppearanceCount + 1;
+
+    INSERT INTO CharacterArcAppearances (CharacterID, ArcID, AppearanceCount)
+    SELECT NEW.CharacterID, Chapters.ArcID, 1
+    FROM Panels
+    JOIN Pages ON Pages.PageID = Panels.PageID
+    JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID
+    WHERE Panels.PanelID = NEW.PanelID AND Chapters.ArcID IS NOT NULL
+    ON CONFLICT (CharacterID, ArcID) DO UPDATE SET AppearanceCount = AppearanceCount + 1;
+
+    INSERT INTO CharacterVolumeAppearances (CharacterID, VolumeNumber, AppearanceCount)
+    SELECT NEW.CharacterID, Chapters.VolumeNumber, 1
+    FROM Panels
+    JOIN Pages ON Pages.PageID = Panels.PageID
+    JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID
+    WHERE Panels.PanelID = NEW.PanelID AND Chapters.VolumeNumber IS NOT NULL
+    ON CONFLICT (CharacterID, VolumeNumber) DO UPDATE SET AppearanceCount = AppearanceCount + 1;
+END;
+
+CREATE TRIGGER CharacterAppearancesRollupDelete AFTER DELETE ON CharacterAppearances
+WHEN OLD.CharacterID IS NOT NULL
+BEGIN
+    UPDATE CharacterChapterAppearances SET AppearanceCount = AppearanceCount - 1
+    WHERE CharacterID = OLD.CharacterID AND ChapterID = (
+        SELECT Pages.ChapterID
+        FROM Panels JOIN Pages ON Pages.PageID = Panels.PageID
+        WHERE Panels.PanelID = OLD.PanelID
+    );
+
+    UPDATE CharacterArcAppearances SET AppearanceCount = AppearanceCount - 1
+    WHERE CharacterID = OLD.CharacterID AND ArcID = (
+        SELECT Chapters.ArcID
+        FROM Panels
+        JOIN Pages ON Pages.PageID = Panels.PageID
+        JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID
+        WHERE Panels.PanelID = OLD.PanelID
+    );
+
+    UPDATE CharacterVolumeAppearances SET AppearanceCount = AppearanceCount - 1
+    WHERE CharacterID = OLD.CharacterID AND VolumeNumber = (
+        SELECT Chapters.VolumeNumber
+        FROM Panels
+        JOIN Pages ON Pages.PageID = Panels.PageID
+        JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID
+        WHERE Panels.PanelID = OLD.PanelID
+    );
+
+    DELETE FROM CharacterChapterAppearances
+    WHERE CharacterID = OLD.CharacterID AND AppearanceCount <= 0;
+
+    DELETE FROM CharacterArcAppearances
+    WHERE CharacterID = OLD.CharacterID AND AppearanceCount <= 0;
+
+    DELETE FROM CharacterVolumeAppearances
+    WHERE CharacterID = OLD.CharacterID AND AppearanceCount <= 0;
+END;
+
+CREATE TRIGGER CharacterAppearancesRollupUpdate
+AFTER UPDATE OF CharacterID, PanelID ON CharacterAppearances
+BEGIN
+    UPDATE CharacterChapterAppearances SET AppearanceCount = AppearanceCount - 1
+    WHERE CharacterID = OLD.CharacterID AND ChapterID = (
+        SELECT Pages.ChapterID
+        FROM Panels JOIN Pages ON Pages.PageID = Panels.PageID
+        WHERE Panels.PanelID = OLD.PanelID
+    );
+
+    UPDATE CharacterArcAppearances SET AppearanceCount = AppearanceCount - 1
+    WHERE CharacterID = OLD.CharacterID AND ArcID = (
+        SELECT Chapters.ArcID
+        FROM Panels
+        JOIN Pages ON Pages.PageID = Panels.PageID
+        JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID
+        WHERE Panels.PanelID = OLD.PanelID
+    );
+
+    UPDATE CharacterVolumeAppearances SET AppearanceCount = AppearanceCount - 1
+    WHERE CharacterID = OLD.CharacterID AND VolumeNumber = (
+        SELECT Chapters.VolumeNumber
+        FROM Panels
+        JOIN Pages ON Pages.PageID = Panels.PageID
+        JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID
+        WHERE Panels.PanelID = OLD.PanelID
+    );
+
+    DELETE FROM CharacterChapterAppearances
+    WHERE CharacterID = OLD.CharacterID AND AppearanceCount <= 0;
+
+    DELETE FROM CharacterArcAppearances
+    WHERE CharacterID = OLD.CharacterID AND AppearanceCount <= 0;
+
+    DELETE FROM CharacterVolumeAppearances
+    WHERE CharacterID = OLD.CharacterID AND AppearanceCount <= 0;
+
+    INSERT INTO CharacterChapterAppearances (CharacterID, ChapterID, AppearanceCount)
+    SELECT NEW.CharacterID, Pages.ChapterID, 1
+    FROM Panels JOIN Pages ON Pages.PageID = Panels.PageID
+    WHERE Panels.PanelID = NEW.PanelID
+        AND NEW.CharacterID IS NOT NULL AND Pages.ChapterID IS NOT NULL
+    ON CONFLICT (CharacterID, ChapterID) DO UPDATE SET AppearanceCount = AppearanceCount + 1;
+
+    INSERT INTO CharacterArcAppearances (CharacterID, ArcID, AppearanceCount)
+    SELECT NEW.CharacterID, Chapters.ArcID, 1
+    FROM Panels
+    JOIN Pages ON Pages.PageID = Panels.PageID
+    JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID
+    WHERE Panels.PanelID = NEW.PanelID
+        AND NEW.CharacterID IS NOT NULL AND Chapters.ArcID IS NOT NULL
+    ON CONFLICT (CharacterID, ArcID) DO UPDATE SET AppearanceCount = AppearanceCount + 1;
+
+    INSERT INTO CharacterVolumeAppearances (CharacterID, VolumeNumber, AppearanceCount)
+    SELECT NEW.CharacterID, Chapters.VolumeNumber, 1
+    FROM Panels
+    JOIN Pages ON Pages.PageID = Panels.PageID
+    JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID
+    WHERE Panels.PanelID = NEW.PanelID
+        AND NEW.CharacterID IS NOT NULL AND Chapters.VolumeNumber IS NOT NULL
+    ON CONFLICT (CharacterID, VolumeNumber) DO UPDATE SET AppearanceCount = AppearanceCount + 1;
+END;
+
+CREATE TABLE Locations (
+    LocationID INTEGER PRIMARY KEY,
+    Name VARCHAR(255) NOT NULL UNIQUE,
+    PanelCount INT NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER PanelsLocationInsert AFTER INSERT ON Panels
+WHEN NEW.Location IS NOT NULL
+BEGIN
+    INSERT INTO Locations (Name, PanelCount) VALUES (NEW.Location, 1)
+    ON CONFLICT (Name) DO UPDATE SET PanelCount = PanelCount + 1;
+END;
+
+CREATE TRIGGER PanelsLocationDelete AFTER DELETE ON Panels
+WHEN OLD.Location IS NOT NULL
+BEGIN
+    UPDATE Locations SET PanelCount = PanelCount - 1 WHERE Name = OLD.Location;
+
+    DELETE FROM Locations WHERE Name = OLD.Location AND PanelCount <= 0;
+END;
+
+CREATE TRIGGER PanelsLocationUpdate AFTER UPDATE OF Location ON Panels
+WHEN OLD.Location IS NOT NEW.Location
+BEGIN
+    UPDATE Locations SET PanelCount = PanelCount - 1 WHERE Name = OLD.Location;
+
+    DELETE FROM Locations WHERE Name = OLD.Location AND PanelCount <= 0;
+
+    INSERT INTO Locations (Name, PanelCount) SELECT NEW.Location, 1
+    WHERE NEW.Location IS NOT NULL
+    ON CONFLICT (Name) DO UPDATE SET PanelCount = PanelCount + 1;
+END;
+
+-- Names of characters, chapters and locations searched by substring. The rowid of an entry
+-- is the ID of its entity times 4 plus its kind: 1 for Characters, 2 for Chapters and
+-- 3 for Locations.
+CREATE VIRTUAL TABLE SearchIndex USING fts5(Text, tokenize = 'trigram');
+
+CREATE TRIGGER CharactersSearchInsert AFTER INSERT ON Characters
+WHEN NEW.CharacterID IS NOT NULL
+BEGIN
+    INSERT INTO SearchIndex (rowid, Text) VALUES (NEW.CharacterID * 4 + 1, NEW.Name);
+END;
+
+CREATE TRIGGER CharactersSearchDelete AFTER DELETE ON Characters
+WHEN OLD.CharacterID IS NOT NULL
+BEGIN
+    DELETE FROM SearchIndex WHERE rowid = OLD.CharacterID * 4 + 1;
+END;
+
+CREATE TRIGGER CharactersSearchUpdate AFTER UPDATE OF CharacterID, Name ON Characters
+BEGIN
+    DELETE FROM SearchIndex WHERE rowid = OLD.CharacterID * 4 + 1;
+
+    INSERT INTO SearchIndex (rowid, Text) SELECT NEW.CharacterID * 4 + 1, NEW.Name
+    WHERE NEW.CharacterID IS NOT NULL;
+END;
+
+CREATE TRIGGER ChaptersSearchInsert AFTER INSERT ON Chapters
+WHEN NEW.ChapterID IS NOT NULL AND NEW.ChapterName IS NOT NULL
+BEGIN
+    INSERT INTO SearchIndex (rowid, Text) VALUES (NEW.ChapterID * 4 + 2, NEW.ChapterName);
+END;
+
+CREATE TRIGGER ChaptersSearchDelete AFTER DELETE ON Chapters
+WHEN OLD.ChapterID IS NOT NULL
+BEGIN
+    DELETE FROM SearchIndex WHERE rowid = OLD.ChapterID * 4 + 2;
+END;
+
+CREATE TRIGGER ChaptersSearchUpdate AFTER UPDATE OF ChapterID, ChapterName ON Chapters
+BEGIN
+    DELETE FROM SearchIndex WHERE rowid = OLD.ChapterID * 4 + 2;
+
+    INSERT INTO SearchIndex (rowid, Text) SELECT NEW.ChapterID * 4 + 2, NEW.ChapterName
+    WHERE NEW.ChapterID IS NOT NULL AND NEW.ChapterName IS NOT NULL;
+END;
+
+CREATE TRIGGER LocationsSearchInsert AFTER INSERT ON Locations
+BEGIN
+    INSERT INTO SearchIndex (rowid, Text) VALUES (NEW.LocationID * 4 + 3, NEW.Name);
+END;
+
+CREATE TRIGGER LocationsSearchDelete AFTER DELETE ON Locations
+BEGIN
+    DELETE FROM SearchIndex WHERE rowid = OLD.LocationID * 4 + 3;
+END;
+
+-- Reading order of every panel: ChapterNumber << 32 | PageNumber << 16 | PanelNumber.
+-- The ordinal only depends on the numbers of the panel, its page and its chapter, so
+-- inserting a page or a panel in the middle of a chapter leaves the others unchanged.
+CREATE TABLE PanelOrdinals (
+    PanelID INT PRIMARY KEY,
+    Ordinal INT NOT NULL
+) WITHOUT ROWID;
+
+-- The known values of the events of every character, in reading order. Bounty 0 and
+-- Status 'Unknown' are the defaults of CharacterEvents and are not known values.
+CREATE TABLE CharacterTimeline (
+    CharacterID INT NOT NULL,
+    Attribute TEXT NOT NULL,
+    Ordinal INT NOT NULL,
+    EventID INT NOT NULL,
+    Value,
+    PRIMARY KEY (CharacterID, Attribute, Ordinal, EventID)
+) WITHOUT ROWID;
+
+-- Names of the trigger-maintained tables whose triggers are suspended, e.g. 'timeline'
+-- during a bulk load, until they are rebuilt in one pass (see datapiece.scripts.timeline).
+CREATE TABLE DeferredMaintenance (
+    Name TEXT PRIMARY KEY
+) WITHOUT ROWID;
+
+CREATE VIEW CharacterTimelineEntries AS
+SELECT
+    CharacterAppearances.CharacterID,
+    Attributes.column1 AS Attribute,
+    PanelOrdinals.Ordinal,
+    CharacterEvents.EventID,
+    CharacterEvents.PanelID,
+    CASE Attributes.column1
+        WHEN 'Bounty' THEN NULLIF(CharacterEvents.Bounty, 0)
+        WHEN 'Status' THEN NULLIF(CharacterEvents.Status, 'Unknown')
+        WHEN 'FruitID' THEN CharacterEvents.FruitID
+        WHEN 'AffiliationID' THEN CharacterEvents.AffiliationID
+        WHEN 'AbilityID' THEN CharacterEvents.AbilityID
+    END AS Value
+FROM CharacterEvents
+JOIN CharacterAppearances ON CharacterAppearances.AppearanceID = CharacterEvents.AppearanceID
+JOIN PanelOrdinals ON PanelOrdinals.PanelID = CharacterEvents.PanelID
+CROSS JOIN (VALUES ('Bounty'), ('Status'), ('FruitID'), ('AffiliationID'), ('AbilityID'))
+    AS Attributes
+WHERE CharacterEvents.EventID IS NOT NULL
+    AND CharacterAppearances.CharacterID IS NOT NULL
+    AND Value IS NOT NULL;
+
+CREATE TRIGGER PanelsOrdinalInsert AFTER INSERT ON Panels
+WHEN NEW.PanelID IS NOT NULL
+    AND NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    INSERT INTO PanelOrdinals (PanelID, Ordinal)
+    SELECT NEW.PanelID,
+        (Chapters.ChapterNumber << 32) | (Pages.PageNumber << 16) | NEW.PanelNumber
+    FROM Pages JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID
+    WHERE Pages.PageID = NEW.PageID;
+END;
+
+CREATE TRIGGER PanelsOrdinalDelete AFTER DELETE ON Panels
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM PanelOrdinals WHERE PanelID = OLD.PanelID;
+END;
+
+CREATE TRIGGER PanelsOrdinalUpdate AFTER UPDATE OF PanelID, PageID, PanelNumber ON Panels
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM PanelOrdinals WHERE PanelID = OLD.PanelID;
+
+    INSERT INTO PanelOrdinals (PanelID, Ordinal)
+    SELECT NEW.PanelID,
+        (Chapters.ChapterNumber << 32) | (Pages.PageNumber << 16) | NEW.PanelNumber
+    FROM Pages JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID
+    WHERE Pages.PageID = NEW.PageID AND NEW.PanelID IS NOT NULL;
+END;
+
+CREATE TRIGGER PagesOrdinalInsert AFTER INSERT ON Pages
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM PanelOrdinals WHERE PanelID IN (
+        SELECT PanelID FROM Panels WHERE PageID = NEW.PageID
+    );
+
+    INSERT INTO PanelOrdinals (PanelID, Ordinal)
+    SELECT Panels.PanelID,
+        (Chapters.ChapterNumber << 32) | (NEW.PageNumber << 16) | Panels.PanelNumber
+    FROM Panels JOIN Chapters ON Chapters.ChapterID = NEW.ChapterID
+    WHERE Panels.PageID = NEW.PageID AND Panels.PanelID IS NOT NULL;
+END;
+
+CREATE TRIGGER PagesOrdinalDelete AFTER DELETE ON Pages
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM PanelOrdinals WHERE PanelID IN (
+        SELECT PanelID FROM Panels WHERE PageID = OLD.PageID
+    );
+END;
+
+CREATE TRIGGER PagesOrdinalUpdate AFTER UPDATE OF PageID, ChapterID, PageNumber ON Pages
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM PanelOrdinals WHERE PanelID IN (
+        SELECT PanelID FROM Panels WHERE PageID IN (OLD.PageID, NEW.PageID)
+    );
+
+    INSERT INTO PanelOrdinals (PanelID, Ordinal)
+    SELECT Panels.PanelID,
+        (Chapters.ChapterNumber << 32) | (NEW.PageNumber << 16) | Panels.PanelNumber
+    FROM Panels JOIN Chapters ON Chapters.ChapterID = NEW.ChapterID
+    WHERE Panels.PageID = NEW.PageID AND Panels.PanelID IS NOT NULL;
+END;
+
+CREATE TRIGGER ChaptersOrdinalInsert AFTER INSERT ON Chapters
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM PanelOrdinals WHERE PanelID IN (
+        SELECT Panels.PanelID
+        FROM Panels JOIN Pages ON Pages.PageID = Panels.PageID
+        WHERE Pages.ChapterID = NEW.ChapterID
+    );
+
+    INSERT INTO PanelOrdinals (PanelID, Ordinal)
+    SELECT Panels.PanelID,
+        (NEW.ChapterNumber << 32) | (Pages.PageNumber << 16) | Panels.PanelNumber
+    FROM Pages JOIN Panels ON Panels.PageID = Pages.PageID
+    WHERE Pages.ChapterID = NEW.ChapterID AND Panels.PanelID IS NOT NULL;
+END;
+
+CREATE TRIGGER ChaptersOrdinalDelete AFTER DELETE ON Chapters
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM PanelOrdinals WHERE PanelID IN (
+        SELECT Panels.PanelID
+        FROM Panels JOIN Pages ON Pages.PageID = Panels.PageID
+        WHERE Pages.ChapterID = OLD.ChapterID
+    );
+END;
+
+CREATE TRIGGER ChaptersOrdinalUpdate AFTER UPDATE OF ChapterID, ChapterNumber ON Chapters
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM PanelOrdinals WHERE PanelID IN (
+        SELECT Panels.PanelID
+        FROM Panels JOIN Pages ON Pages.PageID = Panels.PageID
+        WHERE Pages.ChapterID IN (OLD.ChapterID, NEW.ChapterID)
+    );
+
+    INSERT INTO PanelOrdinals (PanelID, Ordinal)
+    SELECT Panels.PanelID,
+        (NEW.ChapterNumber << 32) | (Pages.PageNumber << 16) | Panels.PanelNumber
+    FROM Pages JOIN Panels ON Panels.PageID = Pages.PageID
+    WHERE Pages.ChapterID = NEW.ChapterID AND Panels.PanelID IS NOT NULL;
+END;
+
+CREATE TRIGGER PanelOrdinalsTimelineInsert AFTER INSERT ON PanelOrdinals
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    INSERT INTO CharacterTimeline (CharacterID, Attribute, Ordinal, EventID, Value)
+    SELECT CharacterID, Attribute, Ordinal, EventID, Value
+    FROM CharacterTimelineEntries WHERE PanelID = NEW.PanelID;
+END;
+
+CREATE TRIGGER PanelOrdinalsTimelineDelete AFTER DELETE ON PanelOrdinals
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM CharacterTimeline WHERE EventID IN (
+        SELECT EventID FROM CharacterEvents WHERE PanelID = OLD.PanelID
+    );
+END;
+
+CREATE TRIGGER CharacterEventsTimelineInsert AFTER INSERT ON CharacterEvents
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    INSERT INTO CharacterTimeline (CharacterID, Attribute, Ordinal, EventID, Value)
+    SELECT CharacterID, Attribute, Ordinal, EventID, Value
+    FROM CharacterTimelineEntries WHERE EventID = NEW.EventID;
+END;
+
+CREATE TRIGGER CharacterEventsTimelineDelete AFTER DELETE ON CharacterEvents
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM CharacterTimeline WHERE EventID = OLD.EventID;
+END;
+
+CREATE TRIGGER CharacterEventsTimelineUpdate AFTER UPDATE ON CharacterEvents
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM CharacterTimeline WHERE EventID IN (OLD.EventID, NEW.EventID);
+
+    INSERT INTO CharacterTimeline (CharacterID, Attribute, Ordinal, EventID, Value)
+    SELECT CharacterID, Attribute, Ordinal, EventID, Value
+    FROM CharacterTimelineEntries WHERE EventID = NEW.EventID;
+END;
+
+CREATE TRIGGER CharacterAppearancesTimelineInsert AFTER INSERT ON CharacterAppearances
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    INSERT INTO CharacterTimeline (CharacterID, Attribute, Ordinal, EventID, Value)
+    SELECT CharacterID, Attribute, Ordinal, EventID, Value
+    FROM CharacterTimelineEntries WHERE EventID IN (
+        SELECT EventID FROM CharacterEvents WHERE AppearanceID = NEW.AppearanceID
+    );
+END;
+
+CREATE TRIGGER CharacterAppearancesTimelineDelete AFTER DELETE ON CharacterAppearances
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM CharacterTimeline WHERE EventID IN (
+        SELECT EventID FROM CharacterEvents WHERE AppearanceID = OLD.AppearanceID
+    );
+END;
+
+CREATE TRIGGER CharacterAppearancesTimelineUpdate
+AFTER UPDATE OF AppearanceID, CharacterID ON CharacterAppearances
+WHEN NOT EXISTS (SELECT 1 FROM DeferredMaintenance WHERE Name = 'timeline')
+BEGIN
+    DELETE FROM CharacterTimeline WHERE EventID IN (
+        SELECT EventID FROM CharacterEvents WHERE AppearanceID IN (OLD.AppearanceID, NEW.AppearanceID)
+    );
+
+    INSERT INTO CharacterTimeline (CharacterID, Attribute, Ordinal, EventID, Value)
+    SELECT CharacterID, Attribute, Ordinal, EventID, Value
+    FROM CharacterTimelineEntries WHERE EventID IN (
+        SELECT EventID FROM CharacterEvents WHERE AppearanceID = NEW.AppearanceID
+    );
+END;
@@ -0,0 +1,73 @@
+"""
+A base test case for tests running against a real database built from the schema.
+"""
+
+import os
+import tempfile
+import unittest
+
+from datapiece.scripts.db_query_handler import DBQueryHandler
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "sql")
+SCHEMA_PATH = os.path.join(SQL_DIR, "schema.sql")
+INDEXES_PATH = os.path.join(SQL_DIR, "indexes.sql")
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """
+    Test case creating a fresh database in a temporary directory for every test.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with a fresh database.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        self.db_path = os.path.join(self.tmp_dir.name, "test.db")
+        self.handler = self.create_handler()
+
+    def tearDown(self) -> None:
+        """
+        Clean up after the test case.
+        """
+        self.handler.close()
+        self.tmp_dir.cleanup()
+
+    def create_handler(self, **config) -> DBQueryHandler:
+        """
+        Creates a handler on the test database with the schema and the index set.
+        """
+        return DBQueryHandler(
+            {"schema": SCHEMA_PATH, "indexes": INDEXES_PATH, "db": self.db_path, **config}
+        )
+
+    def count(self, table: str) -> int:
+        """
+        Returns the number of rows of a table.
+        """
+        return self.handler.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def insert_hierarchy(self) -> None:
+        """
+        Inserts two volumes, each with one chapter of one page with two panels.
+        """
+        self.handler.execute_transaction(
+            [
+                ("INSERT INTO Arcs (ArcID, ArcName) VALUES (1, 'Romance Dawn')", ()),
+                ("INSERT INTO Volumes VALUES (1), (2)", ()),
+                (
+                    "INSERT INTO Chapters (ChapterID, VolumeNumber, ArcID, ChapterNumber) "
+                    "VALUES (1, 1, 1, 1), (2, 2, 1, 2)",
+                    (),
+                ),
+                (
+                    "INSERT INTO Pages (PageID, ChapterID, PageNumber) VALUES (1, 1, 1), (2, 2, 1)",
+                    (),
+                ),
+                (
+                    "INSERT INTO Panels (PanelID, PageID, PanelNumber) "
+                    "VALUES (1, 1, 1), (2, 1, 2), (3, 2, 1), (4, 2, 2)",
+                    (),
+                ),
+            ]
+        )
@@ -0,0 +1,59 @@
+"""
+Unit tests for the AsyncCommands class.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from datapiece.scripts.async_commands import AsyncCommands
+from datapiece.scripts.async_handler import AsyncDBQueryHandler
+from datapiece.scripts.commands import Commands
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestAsyncCommands(DatabaseTestCase, unittest.IsolatedAsyncioTestCase):
+    """
+    Test case for the AsyncCommands class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with async commands.
+        """
+        super().setUp()
+        self.async_handler = AsyncDBQueryHandler(self.handler)
+        self.async_commands = AsyncCommands(
+            Commands(self.handler, {"exclude_list": ["__init__"]}), self.async_handler
+        )
+
+    def tearDown(self) -> None:
+        """
+        Clean up after the test case.
+        """
+        self.async_handler.executor.shutdown(wait=True)
+        super().tearDown()
+
+    async def test_command(self) -> None:
+        """
+        Test that a command runs as a coroutine.
+        """
+        await self.async_commands.start_volume(7)
+        self.assertEqual(self.count("Volumes"), 1)
+        with patch("builtins.print") as mock_print:
+            await self.async_commands.rollups("volume")
+        mock_print.assert_called_once_with("CharacterID | VolumeNumber | AppearanceCount")
+
+    async def test_alias_and_unknown_command(self) -> None:
+        """
+        Test that aliases are resolved and unknown names are rejected.
+        """
+        self.assertEqual(self.async_commands.import_file.__name__, "import_file")
+        self.assertIn("start_volume", self.async_commands.get_command_names())
+        with self.assertRaises(AttributeError):
+            _ = self.async_commands.unknown
+        with self.assertRaises(AttributeError):
+            _ = self.async_commands.__deepcopy__
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit tests for the AsyncDBQueryHandler class.
+"""
+
+import asyncio
+import threading
+import unittest
+
+from datapiece.scripts.async_handler import AsyncDBQueryHandler
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestAsyncDBQueryHandler(DatabaseTestCase, unittest.IsolatedAsyncioTestCase):
+    """
+    Test case for the AsyncDBQueryHandler class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with an async handler.
+        """
+        super().setUp()
+        self.async_handler = AsyncDBQueryHandler(self.handler)
+
+    def tearDown(self) -> None:
+        """
+        Clean up after the test case.
+        """
+        self.async_handler.executor.shutdown(wait=True)
+        super().tearDown()
+
+    async def test_execute_and_fetch(self) -> None:
+        """
+        Test that queries run on the executor thread.
+        """
+        await self.async_handler.executemany(
+            "INSERT INTO Volumes VALUES (?)", [(number,) for number in range(5)]
+        )
+        await self.async_handler.execute("DELETE FROM Volumes WHERE VolumeNumber = ?", (0,))
+        rows = await self.async_handler.fetch("SELECT VolumeNumber FROM Volumes")
+        self.assertEqual(rows, [(1,), (2,), (3,), (4,)])
+        thread_name = await self.async_handler.run(lambda: threading.current_thread().name)
+        self.assertTrue(thread_name.startswith("sqlite"))
+
+    async def test_concurrent_coroutines(self) -> None:
+        """
+        Test that many concurrent coroutines are queued without losing writes.
+        """
+        await asyncio.gather(
+            *(
+                self.async_handler.execute("INSERT INTO Volumes VALUES (?)", (number,))
+                for number in range(50)
+            )
+        )
+        rows = await self.async_handler.fetch("SELECT COUNT(*) FROM Volumes")
+        self.assertEqual(rows, [(50,)])
+
+    async def test_stream(self) -> None:
+        """
+        Test async iteration over the result batches.
+        """
+        await self.async_handler.begin_batch()
+        await self.async_handler.executemany(
+            "INSERT INTO Volumes VALUES (?)", [(number,) for number in range(5)]
+        )
+        self.assertEqual(await self.async_handler.end_batch(), 5)
+        batches = [
+            batch
+            async for batch in self.async_handler.stream(
+                "SELECT VolumeNumber FROM Volumes ORDER BY VolumeNumber", batch_size=2
+            )
+        ]
+        self.assertEqual(batches, [[(0,), (1,)], [(2,), (3,)], [(4,)]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Unit tests for the benchmark suite.
+"""
+
+import itertools
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from benchmarks.dataset import PANELS_PER_PAGE, SyntheticDataset, get_counts
+from benchmarks.run import CANONICAL_QUERIES, compare, main
+
+
+class TestSyntheticDataset(unittest.TestCase):
+    """
+    Test case for the SyntheticDataset class.
+    """
+
+    def test_full_size(self) -> None:
+        """
+        Test that the full scale matches the size of the series.
+        """
+        counts = get_counts(1.0)
+        self.assertEqual((counts["volumes"], counts["chapters"]), (110, 1110))
+
+    def test_deterministic(self) -> None:
+        """
+        Test that the same seed generates the same records and another seed different ones.
+        """
+        records = list(itertools.islice(SyntheticDataset(0.01, 7).records(), 500))
+        self.assertEqual(records, list(itertools.islice(SyntheticDataset(0.01, 7).records(), 500)))
+        self.assertNotEqual(
+            records, list(itertools.islice(SyntheticDataset(0.01, 8).records(), 500))
+        )
+        panel_ids = {record["PanelID"] for record in records}
+        self.assertGreater(len(panel_ids), PANELS_PER_PAGE)
+
+    def test_events_reference_appearances(self) -> None:
+        """
+        Test that the events belong to generated appearances.
+        """
+        dataset = SyntheticDataset(0.002)
+        appearances = {
+            record["AppearanceID"]: record["PanelID"]
+            for record in dataset.records()
+            if "AppearanceID" in record
+        }
+        events = list(dataset.events())
+        self.assertGreater(len(events), len(appearances) // 2)
+        for _, appearance_id, panel_id, *_ in events:
+            self.assertEqual(appearances[appearance_id], panel_id)
+
+
+class TestBenchmarkRun(unittest.TestCase):
+    """
+    Test case for the benchmark runner.
+    """
+
+    def test_main(self) -> None:
+        """
+        Test a tiny run writing its results and comparing them with a baseline.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "results.json")
+            with patch("builtins.print"):
+                results = main(["--scale", "0.002", "--repeats", "1", "--output", output])
+            with open(output, "r", encoding="utf-8") as f:
+                self.assertEqual(json.load(f), results)
+        self.assertEqual(set(results["queries"]), set(CANONICAL_QUERIES))
+        self.assertGreater(results["inserts"]["importer"]["rows"], 0)
+        self.assertGreater(results["bootstrap"]["schema_seconds"], 0)
+        lines = compare(results, results)
+        self.assertIn("queries.co_appearances.cold_ms", "".join(lines))
+        self.assertTrue(all(line.endswith("(+0.0%)") for line in lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Unit tests for the Checkpointer class and the in-memory mode of the handler.
+"""
+
+import sqlite3
+import threading
+import unittest
+from unittest.mock import Mock, patch
+
+from datapiece.scripts.checkpointer import Checkpointer
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestCheckpointer(unittest.TestCase):
+    """
+    Test case for the Checkpointer class.
+    """
+
+    def test_periodic_checkpoint(self) -> None:
+        """
+        Test that the checkpoint function runs periodically until stopped.
+        """
+        called = threading.Event()
+        checkpoint = Mock(side_effect=called.set)
+        checkpointer = Checkpointer(checkpoint, 0.01)
+        checkpointer.start()
+        self.assertTrue(called.wait(1))
+        self.assertTrue(checkpointer.is_running())
+        checkpointer.stop()
+        self.assertFalse(checkpointer.is_running())
+        self.assertGreaterEqual(checkpoint.call_count, 1)
+
+    def test_failing_checkpoint(self) -> None:
+        """
+        Test that a failing checkpoint is logged and does not stop the thread.
+        """
+        called = threading.Event()
+
+        def checkpoint() -> None:
+            if called.is_set():
+                return
+            called.set()
+            raise sqlite3.OperationalError("disk I/O error")
+
+        checkpointer = Checkpointer(checkpoint, 0.01, "maintenance")
+        with patch("logging.error") as mock_error:
+            checkpointer.start()
+            self.assertTrue(called.wait(1))
+            checkpointer.stop()
+        mock_error.assert_called_once()
+        self.assertEqual(mock_error.call_args[0][1], "maintenance")
+
+
+class TestInMemoryHandler(DatabaseTestCase):
+    """
+    Test case for the in-memory mode of the handler.
+    """
+
+    def _disk_count(self) -> int:
+        """
+        Helper method counting the volumes stored on disk.
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM Volumes").fetchone()[0]
+        conn.close()
+        return count
+
+    def test_in_memory_checkpoints(self) -> None:
+        """
+        Test that writes reach the disk only on checkpoints and on close.
+        """
+        self.handler.execute("INSERT INTO Volumes VALUES (1)")
+        self.handler.close()
+        self.handler = self.create_handler(in_memory=True, checkpoint_interval=3600)
+
+        self.assertEqual(self.count("Volumes"), 1)
+        self.handler.execute("INSERT INTO Volumes VALUES (2)")
+        self.assertEqual(self._disk_count(), 1)
+
+        self.assertTrue(self.handler.checkpoint())
+        self.assertEqual(self._disk_count(), 2)
+
+        self.handler.execute("INSERT INTO Volumes VALUES (3)", commit=False)
+        self.assertFalse(self.handler.checkpoint())
+        self.handler.close()
+        self.assertEqual(self._disk_count(), 3)
+        self.handler = self.create_handler()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Unit tests for the CoAppearanceIndex class.
+"""
+
+import os
+import random
+import unittest
+from unittest.mock import patch
+
+from datapiece.scripts.coappearances import CoAppearanceIndex
+from datapiece.scripts.csr import CSRMatrix
+from tests.unit_tests.database import DatabaseTestCase
+
+SELF_JOIN = (
+    "SELECT a.CharacterID, b.CharacterID, COUNT(DISTINCT a.PanelID) "
+    "FROM CharacterAppearances a JOIN CharacterAppearances b "
+    "ON a.PanelID = b.PanelID AND a.CharacterID <> b.CharacterID "
+    "{join} GROUP BY a.CharacterID, b.CharacterID"
+)
+
+
+class TestCoAppearanceIndex(DatabaseTestCase):
+    """
+    Test case for the CoAppearanceIndex class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with the hierarchy and an index with small chunks.
+        """
+        super().setUp()
+        self.insert_hierarchy()
+        self.index = CoAppearanceIndex(
+            self.handler, os.path.join(self.tmp_dir.name, "coappearances"), chunk_rows=5
+        )
+        self.rng = random.Random(7)
+        self.next_id = 1
+
+    def add_appearances(self, count: int, panels: tuple = (1, 2, 3, 4)) -> None:
+        """
+        Inserts random appearances of six characters.
+        """
+        rows = []
+        for _ in range(count):
+            rows.append((self.next_id, self.rng.randint(1, 6), self.rng.choice(panels)))
+            self.next_id += 1
+        self.handler.executemany("INSERT INTO CharacterAppearances VALUES (?, ?, ?)", rows)
+
+    def assert_matches_self_join(self, scope=None, key=None, join="") -> None:
+        """
+        Asserts that the matrix of a scope holds the counts of a SQL self-join.
+        """
+        matrix = self.index.get_matrix(scope, key)
+        rows, cols, values = matrix.to_coo()
+        expected = sorted(self.handler.conn.execute(SELF_JOIN.format(join=join)).fetchall())
+        self.assertEqual(sorted(zip(rows.tolist(), cols.tolist(), values.tolist())), expected)
+
+    def test_build_and_incremental_update(self) -> None:
+        """
+        Test that incremental updates match a full computation, also in existing panels.
+        """
+        self.add_appearances(12)
+        self.assert_matches_self_join()
+        self.add_appearances(6)
+        self.assertEqual(self.index.update(), self.count("CharacterAppearances"))
+        self.assertEqual(self.index.update(), 0)
+        self.assert_matches_self_join()
+        self.add_appearances(4, panels=(5,))
+        self.assert_matches_self_join()
+        self.handler.execute("DELETE FROM CharacterAppearances WHERE AppearanceID = 3")
+        self.assert_matches_self_join()
+
+    def test_current_matrix_is_not_read(self) -> None:
+        """
+        Test that checking a current matrix reads neither its arrays nor flushes.
+        """
+        self.add_appearances(8)
+        self.index.update()
+        with patch.object(CSRMatrix, "load") as mock_load, patch.object(
+            self.handler, "flush"
+        ) as mock_flush:
+            self.assertEqual(self.index.update(), 0)
+        mock_load.assert_not_called()
+        mock_flush.assert_not_called()
+
+    def test_scopes(self) -> None:
+        """
+        Test the matrices of a volume and the partners of a character.
+        """
+        self.add_appearances(10)
+        self.assert_matches_self_join(
+            "volume",
+            2,
+            "JOIN Panels ON Panels.PanelID = a.PanelID "
+            "JOIN Pages ON Pages.PageID = Panels.PageID "
+            "JOIN Chapters ON Chapters.ChapterID = Pages.ChapterID "
+            "WHERE Chapters.VolumeNumber = 2",
+        )
+        partners = self.index.get_partners(1)
+        counts = [shared for _, shared in partners]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        with self.assertRaises(ValueError):
+            self.index.get_matrix("chapter", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
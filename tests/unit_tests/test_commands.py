@@ -2,14 +2,19 @@
 Unit tests for the Commands class.
 """
 
+import json
+import os
+import tempfile
 import unittest
-from unittest.mock import Mock, create_autospec
+from unittest.mock import Mock, create_autospec, patch
 
 from datapiece.scripts.commands import Commands
 from datapiece.scripts.db_query_handler import DBQueryHandler
+from datapiece.scripts.maintenance import MAINTENANCE_STEPS
+from datapiece.scripts.query_stats import QueryStats
 
 
-class TestCommands(unittest.TestCase):
+class TestCommands(unittest.TestCase):  # pylint: disable=too-many-public-methods
     """
     Test case for the Commands class.
     """
@@ -30,6 +35,7 @@ class TestCommands(unittest.TestCase):
         command_names = self.commands.get_command_names()
         self.assertIsInstance(command_names, list)
         self.assertNotIn("__init__", command_names)
+        self.assertIn("import", command_names)
 
     def test_is_valid_command(self):
         """
@@ -45,10 +51,307 @@ class TestCommands(unittest.TestCase):
         """
         volume_number = 1
         self.commands.start_volume(volume_number)
-        self.handler.execute_query.assert_called_once_with(
-            f"INSERT INTO `Volumes` (`VolumeNumber`) VALUES ({volume_number})"
+        self.handler.execute.assert_called_once_with(
+            "INSERT INTO `Volumes` (`VolumeNumber`) VALUES (?)", (volume_number,)
         )
-        self.handler.conn.commit.assert_called_once()
+        self.handler.conn.commit.assert_not_called()
+
+    def test_hierarchical_inserts(self):
+        """
+        Test that the chapter, page, panel and appearance commands insert allocated IDs
+        attached to the current rows, without reading the tables.
+        """
+        self.handler.id_allocator = Mock()
+        self.handler.id_allocator.next_id.side_effect = [7, 70, 700, 701, 7000, 8]
+        with patch("builtins.print"):
+            self.commands.start_volume(3)
+            self.commands.start_chapter("25")
+            self.commands.add_page()
+            self.commands.add_panel()
+            self.commands.add_panel("4", "Orange", "Town")
+            self.commands.add_appearance("1")
+        calls = [args for args, _ in self.handler.execute.call_args_list[1:]]
+        self.assertEqual(
+            [params for _, params in calls],
+            [(7, 3, None, 25), (70, 7, 1), (700, 70, 1, None), (701, 70, 4, "Orange Town"),
+             (7000, 1, 701)],
+        )
+        self.assertEqual(
+            [args[0] for args, _ in self.handler.id_allocator.next_id.call_args_list],
+            ["Chapters", "Pages", "Panels", "Panels", "CharacterAppearances"],
+        )
+        self.handler.fetch.assert_not_called()
+        with patch("builtins.print"):
+            self.commands.start_chapter(26)
+        with self.assertRaises(ValueError):
+            self.commands.add_panel()
+
+    def test_batch_commands(self):
+        """
+        Test the begin_batch, flush and end_batch methods.
+        """
+        self.handler.flush.return_value = 3
+        self.handler.end_batch.return_value = 2
+        with patch("builtins.print") as mock_print:
+            self.commands.begin_batch()
+            self.commands.flush()
+            self.commands.end_batch()
+        self.handler.begin_batch.assert_called_once()
+        self.handler.flush.assert_called_once()
+        self.handler.end_batch.assert_called_once()
+        mock_print.assert_called_with("Batch mode off, flushed 2 rows.")
+
+    @patch("datapiece.scripts.commands.Importer")
+    def test_import_file(self, mock_importer):
+        """
+        Test the import_file method.
+        """
+        mock_importer.return_value.import_file.return_value = (100, 0.5)
+        with patch("builtins.print") as mock_print:
+            self.commands.import_file("data.csv", None, "10")
+        mock_importer.assert_called_once_with(self.handler, 10)
+        mock_importer.return_value.import_file.assert_called_once_with("data.csv", None)
+        mock_print.assert_called_once_with("Imported 100 rows in 0.50s (200 rows/s).")
+
+    def test_indexes(self):
+        """
+        Test the indexes method actions.
+        """
+        self.handler.get_index_names.return_value = ["idx_a", "idx_b"]
+        self.handler.get_existing_indexes.return_value = {"idx_a"}
+        self.handler.rebuild_indexes.return_value = ["idx_a", "idx_b"]
+        self.handler.explain.return_value = [(2, 0, 0, "SCAN A")]
+        with patch("builtins.print") as mock_print:
+            self.commands.indexes()
+            mock_print.assert_called_with("idx_b: missing")
+            self.commands.indexes("rebuild")
+            mock_print.assert_called_with("Rebuild: 2 indexes.")
+            self.commands.indexes("explain", "SELECT", "*", "FROM", "A")
+            mock_print.assert_called_with("SCAN A")
+        self.handler.explain.assert_called_once_with("SELECT * FROM A")
+
+    def test_query(self):
+        """
+        Test that the query method pages the result and stops on "q".
+        """
+        header_row = Mock()
+        header_row.keys.return_value = ["Name"]
+        header_row.__iter__ = Mock(return_value=iter(["Luffy"]))
+        batches = Mock()
+        batches.__next__ = Mock(side_effect=[[header_row], [("Zoro",)], [("Nami",)]])
+        self.handler.fetch_batches.return_value = batches
+        with patch("builtins.print") as mock_print, patch(
+            "builtins.input", side_effect=["", "q"]
+        ):
+            self.commands.query("SELECT", "Name", "FROM", "Characters")
+        self.handler.fetch_batches.assert_called_once_with(
+            "SELECT Name FROM Characters", as_rows=True
+        )
+        mock_print.assert_any_call("Name")
+        mock_print.assert_any_call("Luffy")
+        mock_print.assert_called_with("Zoro")
+        batches.close.assert_called_once()
+
+    def test_query_not_interactive(self):
+        """
+        Test that the query method prints every row without prompting when not interactive.
+        """
+        batches = Mock()
+        batches.__next__ = Mock(side_effect=[[{"Name": "Luffy"}], [("Zoro",)], [("Nami",)]])
+        self.handler.fetch_batches.return_value = batches
+        self.commands.interactive = False
+        with patch("builtins.print") as mock_print, patch("builtins.input") as mock_input:
+            self.commands.query("SELECT", "Name", "FROM", "Characters")
+        mock_input.assert_not_called()
+        mock_print.assert_called_with("Nami")
+
+    def test_query_rejects_writes(self):
+        """
+        Test that the query method refuses statements that are not reads.
+        """
+        with patch("builtins.print"):
+            self.commands.query("DELETE", "FROM", "Characters")
+        self.handler.fetch_batches.assert_not_called()
+
+    @patch("datapiece.scripts.commands.get_appearance_counts")
+    @patch("datapiece.scripts.commands.rebuild_rollups")
+    def test_rollups(self, mock_rebuild, mock_counts):
+        """
+        Test the rollups method actions.
+        """
+        mock_counts.return_value = iter([(1, 3, 12)])
+        with patch("builtins.print") as mock_print:
+            self.commands.rollups("rebuild")
+            mock_rebuild.assert_called_once_with(self.handler)
+            self.commands.rollups("arc", "1")
+            mock_counts.assert_called_once_with(self.handler, "arc", "1")
+            mock_print.assert_called_with("1 | 3 | 12")
+
+    def test_profile(self):
+        """
+        Test listing and switching the connection profiles.
+        """
+        self.handler.profiles = {"interactive": {}, "bulk_load": {}}
+        self.handler.profile = "interactive"
+        with patch("builtins.print") as mock_print:
+            self.commands.profile()
+            mock_print.assert_any_call("* interactive")
+            mock_print.assert_called_with("  bulk_load")
+            self.commands.profile("bulk_load")
+            mock_print.assert_called_with("Profile bulk_load active.")
+        self.handler.apply_profile.assert_called_once_with("bulk_load")
+
+    def test_checkpoint(self):
+        """
+        Test the checkpoint method.
+        """
+        self.handler.checkpoint.return_value = True
+        with patch("builtins.print") as mock_print:
+            self.commands.checkpoint()
+        mock_print.assert_called_once_with("Checkpoint written.")
+
+    def test_pool(self):
+        """
+        Test the pool method.
+        """
+        self.handler.pool = Mock()
+        self.handler.pool.stats.return_value = {"reader_leases": 2, "reader_wait_seconds": 0.5}
+        with patch("builtins.print") as mock_print:
+            self.commands.pool()
+        mock_print.assert_any_call("reader_leases: 2")
+        mock_print.assert_called_with("reader_wait_seconds: 0.5000")
+
+    def test_maintenance(self):
+        """
+        Test the maintenance method running steps and printing the status.
+        """
+        self.handler.maintain.return_value = [("analyze", 0.25, 0), ("vacuum", 0.5, 4096)]
+        with patch("builtins.print") as mock_print:
+            self.commands.maintenance("analyze", "vacuum")
+        self.handler.maintain.assert_called_once_with(("analyze", "vacuum"))
+        mock_print.assert_called_with("vacuum: 0.5000s, 4096 bytes freed")
+
+        self.handler.maintenance = Mock()
+        self.handler.maintenance.writes_since.return_value = 12
+        self.handler.maintenance.thresholds = {step: 100 for step in MAINTENANCE_STEPS}
+        with patch("builtins.print") as mock_print:
+            self.commands.maintenance("status")
+        mock_print.assert_any_call("analyze: 12 writes, threshold 100")
+        self.handler.maintain.assert_called_once()
+
+    def test_cache(self):
+        """
+        Test the cache method printing the statistics and clearing the cache.
+        """
+        self.handler.query_cache = Mock()
+        self.handler.query_cache.stats.return_value = {"hits": 3, "misses": 1}
+        self.handler.query_cache.clear.return_value = 2
+        with patch("builtins.print") as mock_print:
+            self.commands.cache()
+            mock_print.assert_called_with("misses: 1")
+            self.commands.cache("clear")
+            mock_print.assert_called_with("Cleared 2 entries.")
+
+    def test_stats(self):
+        """
+        Test the stats method printing, dumping and resetting the statistics.
+        """
+        self.handler.stats = QueryStats(slow_query_ms=1)
+        self.handler.stats.record("SELECT * FROM Arcs WHERE ArcID = 3", 0.002, 1, lambda: ["SCAN"])
+        with patch("builtins.print") as mock_print:
+            self.commands.stats()
+            lines = [args[0] for args, _ in mock_print.call_args_list]
+        self.assertIn("Commits: 0, 0.0 ms total", lines)
+        self.assertIn("    SCAN", lines)
+        self.assertTrue(any("SELECT * FROM Arcs WHERE ArcID = ?" in line for line in lines))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "stats.json")
+            with patch("builtins.print"):
+                self.commands.stats("json", path)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["statements"][0]["count"], 1)
+        with patch("builtins.print") as mock_print:
+            self.commands.stats("reset")
+        self.assertEqual(self.handler.stats.summary()["statements"], [])
+
+    @patch("datapiece.scripts.commands.export_tables")
+    def test_export(self, mock_export):
+        """
+        Test the export method passing the tables and the force flag.
+        """
+        mock_export.return_value = [("Panels", 4, 0.5, False), ("Pages", 2, 0.0, True)]
+        self.commands.config["export_dir"] = "out"
+        with patch("builtins.print") as mock_print:
+            self.commands.export("force", "Panels")
+        mock_export.assert_called_once_with(self.handler, "out", ["Panels"], True)
+        mock_print.assert_any_call("Panels: 4 rows exported in 0.50s.")
+        mock_print.assert_called_with("Pages: unchanged, 2 rows.")
+
+    def test_coappearances(self):
+        """
+        Test the coappearances method printing the partners with their names.
+        """
+        self.commands.coappearance_index = Mock()
+        self.commands.coappearance_index.get_partners.return_value = [(2, 5), (3, 1)]
+        self.handler.fetch.return_value = iter([(2, "Zoro"), (3, "Nami")])
+        with patch("builtins.print") as mock_print:
+            self.commands.coappearances("1", "arc", "4")
+        self.commands.coappearance_index.get_partners.assert_called_once_with(1, "arc", 4)
+        mock_print.assert_any_call("2 | Zoro | 5")
+        mock_print.assert_called_with("3 | Nami | 1")
+
+    def test_graph(self):
+        """
+        Test the graph method dispatching the actions to the interaction graph.
+        """
+        self.commands.interaction_graph = Mock()
+        self.commands.interaction_graph.shortest_path.return_value = [1, 2, 3]
+        self.commands.interaction_graph.central.return_value = [(2, 0.5)]
+        self.commands.interaction_graph.refresh.return_value = 4
+        self.commands.interaction_graph.ids = [1, 2, 3]
+        with patch("builtins.print") as mock_print:
+            self.commands.graph("path", "1", "3")
+            mock_print.assert_called_with("1 -> 2 -> 3")
+            self.commands.graph("central", "1")
+            mock_print.assert_called_with("2 | 0.500000")
+            self.commands.graph("reload", "full")
+            mock_print.assert_called_with("Read 4 participants, 3 characters.")
+            self.commands.graph("path", "1")
+            mock_print.assert_called_with("Unknown graph action: path 1")
+        self.commands.interaction_graph.shortest_path.assert_called_once_with("1", "3")
+        self.commands.interaction_graph.central.assert_called_once_with(1)
+        self.commands.interaction_graph.refresh.assert_called_once_with(full=True)
+
+    @patch("datapiece.scripts.commands.search")
+    def test_search(self, mock_search):
+        """
+        Test the search method passing the kind and printing the fuzzy distances.
+        """
+        mock_search.return_value = [("character", 1, "Monkey D. Luffy", 1)]
+        with patch("builtins.print") as mock_print:
+            self.commands.search("character", "lufy")
+        mock_search.assert_called_once_with(self.handler, "lufy", "character")
+        mock_print.assert_called_with("character | 1 | Monkey D. Luffy (~1)")
+
+    @patch("datapiece.scripts.commands.defer_timeline")
+    @patch("datapiece.scripts.commands.get_snapshot")
+    @patch("datapiece.scripts.commands.get_history")
+    def test_timeline(self, mock_history, mock_snapshot, mock_defer):
+        """
+        Test the timeline method choosing a snapshot or a history by the number of arguments.
+        """
+        mock_snapshot.return_value = {"Bounty": (300, (900 << 32) | (4 << 16) | 2, 12)}
+        mock_history.return_value = [((5 << 32) | (1 << 16) | 3, 8, "Status", "Alive")]
+        with patch("builtins.print") as mock_print:
+            self.commands.timeline("7", "900")
+            mock_print.assert_called_with("Bounty | 300 | 900 | 4 | 2")
+            self.commands.timeline("7", "1", "10", "Status")
+            mock_print.assert_called_with("5 | 1 | 3 | 8 | Status | Alive")
+        mock_snapshot.assert_called_once_with(self.handler, 7, 900)
+        mock_history.assert_called_once_with(self.handler, 7, 1, 10, "Status")
+        with patch("builtins.print"):
+            self.commands.timeline("defer")
+        mock_defer.assert_called_once_with(self.handler)
 
 
 if __name__ == "__main__":
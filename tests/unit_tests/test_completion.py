@@ -0,0 +1,86 @@
+"""
+Unit tests for the PrefixTrie and EntityIndex classes.
+"""
+
+import unittest
+
+from datapiece.scripts.completion import EntityIndex, PrefixTrie
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestPrefixTrie(unittest.TestCase):
+    """
+    Test case for the PrefixTrie class.
+    """
+
+    def test_complete(self) -> None:
+        """
+        Test that completions are case-insensitive, alphabetical and limited.
+        """
+        trie = PrefixTrie(["import", "indexes", "Impel Down", "flush", "import"])
+        self.assertEqual(trie.size, 4)
+        self.assertEqual(trie.complete("im"), ["Impel Down", "import"])
+        self.assertEqual(trie.complete("I", limit=2), ["Impel Down", "import"])
+        self.assertEqual(trie.complete(""), ["flush", "Impel Down", "import", "indexes"])
+        self.assertEqual(trie.complete("x"), [])
+
+    def test_large_trie(self) -> None:
+        """
+        Test that only the requested number of completions is collected.
+        """
+        trie = PrefixTrie(f"name{number:05d}" for number in range(20000))
+        self.assertEqual(trie.complete("name1", limit=3), ["name10000", "name10001", "name10002"])
+        self.assertEqual(len(trie.complete("name")), 100)
+
+
+class TestEntityIndex(DatabaseTestCase):
+    """
+    Test case for the EntityIndex class.
+    """
+
+    def test_complete_and_refresh(self) -> None:
+        """
+        Test that entity values are completed and loaded again after writes only.
+        """
+        self.insert_hierarchy()
+        self.handler.executemany(
+            "INSERT INTO Characters (CharacterID, Name) VALUES (?, ?)",
+            [(1, "Monkey D. Luffy"), (2, "Roronoa Zoro")],
+        )
+        self.handler.execute("INSERT INTO Affiliations VALUES (1, 'Straw Hat Pirates')")
+        self.handler.execute("UPDATE Panels SET Location = 'Shells Town' WHERE PanelID = 1")
+        index = EntityIndex(self.handler)
+        self.assertEqual(index.complete("s"), ["Shells Town", "Straw Hat Pirates"])
+        self.assertEqual(index.complete("ro"), ["Romance Dawn", "Roronoa Zoro"])
+        self.assertEqual(index.complete("ro", "character"), ["Roronoa Zoro"])
+        self.assertFalse(index.refresh())
+
+        self.handler.execute("INSERT INTO Characters (CharacterID, Name) VALUES (3, 'Nami')")
+        self.assertEqual(index.complete("Na"), ["Nami"])
+        with self.assertRaises(ValueError):
+            index.complete("a", "ship")
+
+    def test_refresh_rebuilds_changed_kinds(self) -> None:
+        """
+        Test that a write rebuilds only the tries of the entity kinds it changed.
+        """
+        self.handler.execute("INSERT INTO Arcs (ArcID, ArcName) VALUES (1, 'Romance Dawn')")
+        index = EntityIndex(self.handler)
+        self.assertTrue(index.refresh())
+        tries = dict(index.tries)
+
+        self.handler.execute("INSERT INTO Volumes VALUES (1)")
+        self.assertFalse(index.refresh())
+        self.assertEqual(index.tries, tries)
+
+        self.handler.execute("INSERT INTO Characters (CharacterID, Name) VALUES (1, 'Nami')")
+        self.assertTrue(index.refresh())
+        self.assertIsNot(index.tries["character"], tries["character"])
+        self.assertIs(index.tries["arc"], tries["arc"])
+        self.assertEqual(index.complete("n"), ["Nami"])
+        self.assertTrue(index.refresh(force=True))
+        self.assertIsNot(index.tries["arc"], tries["arc"])
+
+
+if __name__ == "__main__":
+    unittest.main()
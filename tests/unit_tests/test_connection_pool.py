@@ -0,0 +1,119 @@
+"""
+Unit tests for the ConnectionPool class.
+"""
+
+import sqlite3
+import threading
+import unittest
+
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestConnectionPool(DatabaseTestCase):
+    """
+    Test case for the ConnectionPool class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with a pool of one reader.
+        """
+        super().setUp()
+        self.handler.execute("INSERT INTO Volumes VALUES (1)")
+        self.pool = self.handler.pool
+        self.pool.size = 1
+
+    def test_reader(self) -> None:
+        """
+        Test that readers are read-only and reused by the same thread.
+        """
+        with self.pool.reader() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM Volumes").fetchone(), (1,))
+            with self.pool.reader() as nested_conn:
+                self.assertIs(nested_conn, conn)
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO Volumes VALUES (2)")
+        journal_mode = self.handler.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(journal_mode, "wal")
+        stats = self.pool.stats()
+        self.assertEqual(stats["reader_leases"], 1)
+        self.assertEqual(stats["readers_open"], 1)
+        self.assertEqual(stats["readers_in_use"], 0)
+
+    def test_reader_waits_when_pool_is_full(self) -> None:
+        """
+        Test that a thread waits for a reader when all of them are leased.
+        """
+        leased = threading.Event()
+        release = threading.Event()
+
+        def hold_reader() -> None:
+            with self.pool.reader():
+                leased.set()
+                release.wait(1)
+
+        thread = threading.Thread(target=hold_reader)
+        thread.start()
+        self.assertTrue(leased.wait(1))
+        threading.Timer(0.05, release.set).start()
+        with self.pool.reader() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM Volumes").fetchone(), (1,))
+        thread.join()
+        stats = self.pool.stats()
+        self.assertEqual(stats["reader_waits"], 1)
+        self.assertGreater(stats["reader_wait_seconds"], 0)
+
+    def test_readers_see_committed_writes(self) -> None:
+        """
+        Test that readers run while the writer holds an open transaction.
+        """
+        self.pool.size = 2
+        with self.pool.reader():
+            pass
+        with self.pool.writer() as conn:
+            conn.execute("INSERT INTO Volumes VALUES (2)")
+            with self.pool.reader() as reader:
+                count = reader.execute("SELECT COUNT(*) FROM Volumes").fetchone()[0]
+            self.assertEqual(count, 1)
+        with self.pool.reader() as reader:
+            self.assertEqual(reader.execute("SELECT COUNT(*) FROM Volumes").fetchone(), (2,))
+        self.assertEqual(self.pool.stats()["writer_leases"], 1)
+
+    def test_writer_rollback(self) -> None:
+        """
+        Test that the writer rolls back when the block fails.
+        """
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.pool.writer() as conn:
+                conn.execute("INSERT INTO Volumes VALUES (3)")
+                conn.execute("INSERT INTO Volumes VALUES (3)")
+        self.assertEqual(self.count("Volumes"), 1)
+
+    def test_close_with_leased_reader(self) -> None:
+        """
+        Test that a reader leased while the pool is closed is closed on release.
+        """
+        with self.pool.reader() as conn:
+            self.pool.close()
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM Volumes").fetchone(), (1,))
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        stats = self.pool.stats()
+        self.assertEqual((stats["readers_open"], stats["readers_idle"]), (0, 0))
+        with self.assertRaises(RuntimeError):
+            with self.pool.reader():
+                pass
+
+    def test_in_memory_has_no_readers(self) -> None:
+        """
+        Test that an in-memory handler refuses to lease readers.
+        """
+        self.handler.close()
+        self.handler = self.create_handler(in_memory=True)
+        with self.assertRaises(RuntimeError):
+            with self.handler.pool.reader():
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
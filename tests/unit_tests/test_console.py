@@ -2,12 +2,15 @@
 Unit tests for the Console class.
 """
 
+import sqlite3
 import unittest
 from typing import List, Tuple, Union
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
+from datapiece.scripts.completion import PrefixTrie
 from datapiece.scripts.console import Console
 from datapiece.scripts.db_query_handler import DBQueryHandler
+from tests.unit_tests.database import DatabaseTestCase
 
 
 class TestConsole(unittest.TestCase):
@@ -86,15 +89,147 @@ class TestConsole(unittest.TestCase):
             self.console.start()
             mock_output.assert_called_with("Exit")
 
+    def test_start_sqlite_error(self) -> None:
+        """
+        Test that a failing command does not stop the console and the handler is closed.
+        """
+        self.mock_readline_instance.readline.side_effect = ["flush", "exit"]
+        with patch(
+            "datapiece.scripts.commands.Commands.flush",
+            side_effect=sqlite3.IntegrityError("duplicate"),
+        ), patch("logging.error") as mock_error, patch("builtins.print"):
+            self.console.start()
+            mock_error.assert_called_once()
+        self.mock_handler.close.assert_called_once()
+
     def test_completer(self) -> None:
         """
         Test the completer method.
         """
-        self.console.commands = ["command1", "command2"]
+        self.console.command_trie = PrefixTrie(["command2", "command1"])
         self.assertEqual(self.console.completer("comm", 0), "command1")
         self.assertEqual(self.console.completer("comm", 1), "command2")
+        self.assertIsNone(self.console.completer("comm", 2))
         self.assertIsNone(self.console.completer("xyz", 0))
 
+    def test_completer_entities(self) -> None:
+        """
+        Test that the words after the command are completed from the entity values.
+        """
+        self.console.readline = Mock()
+        self.console.readline.get_line_buffer.return_value = "rollups Lu"
+        self.console.readline.get_begidx.return_value = 8
+        self.console.entities = Mock()
+        self.console.entities.complete.return_value = ["Luffy", "Lucci"]
+        self.assertEqual(self.console.completer("Lu", 0), "Luffy")
+        self.assertEqual(self.console.completer("Lu", 1), "Lucci")
+        self.console.entities.complete.assert_called_once_with("Lu")
+
+    def test_dispatch_profiler(self) -> None:
+        """
+        Test that profile start|stop|dump go to the profiler and other profiles to the command.
+        """
+        self.console.profiler = MagicMock()
+        with patch("builtins.print"), patch(
+            "datapiece.scripts.commands.Commands.profile"
+        ) as mock_profile:
+            self.assertTrue(self.console.dispatch("profile start"))
+            self.assertTrue(self.console.dispatch("memtrace snapshot"))
+            self.assertTrue(self.console.dispatch("profile bulk_load"))
+        self.console.profiler.start.assert_called_once_with()
+        self.console.profiler.snapshot.assert_called_once_with()
+        mock_profile.assert_called_once_with("bulk_load")
+        self.console.profiler.profiled.assert_called_once_with()
+        with self.assertRaises(ValueError):
+            self.console.dispatch("memtrace")
+
+
+class TestConsoleScript(DatabaseTestCase):
+    """
+    Test case for the script mode of the Console class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with a console on a real database.
+        """
+        super().setUp()
+        self.console = Console(self.handler, {})
+
+    def run_script(self, lines: List[str], **kwargs) -> Tuple[int, int]:
+        """
+        Helper method running a script with the output silenced.
+        """
+        with patch("builtins.print"), patch("logging.error"):
+            return self.console.run_script(lines, **kwargs)
+
+    def commits(self) -> int:
+        """
+        Returns the number of commits of the handler.
+        """
+        return self.handler.stats.summary()["commits"]["count"]
+
+    def test_run_script(self) -> None:
+        """
+        Test that the commands of a script are committed together at the end.
+        """
+        lines = ["# volumes", ""] + [f"start_volume {n}\n" for n in range(100)]
+        commits = self.commits()
+        self.assertEqual(self.run_script(lines), (100, 0))
+        self.assertEqual(self.commits(), commits + 1)
+        self.assertEqual(self.count("Volumes"), 100)
+        self.assertFalse(self.handler.batch.active)
+        self.assertEqual(self.handler.batch.max_rows, 1000)
+
+    def test_transaction_size(self) -> None:
+        """
+        Test that the script is committed every transaction_size commands.
+        """
+        lines = [f"start_volume {n}" for n in range(10)] + ["exit", "start_volume 99"]
+        commits = self.commits()
+        self.assertEqual(self.run_script(lines, transaction_size=4), (10, 0))
+        self.assertEqual(self.commits(), commits + 3)
+        self.assertEqual(self.count("Volumes"), 10)
+
+    def test_stop_on_error(self) -> None:
+        """
+        Test that the first failing command stops the script and rolls back its transaction,
+        including the writes flushed before it.
+        """
+        lines = ["start_volume 1", "flush", "start_volume 2", "unknown", "start_volume 3"]
+        self.assertEqual(self.run_script(lines), (4, 1))
+        self.assertEqual(self.count("Volumes"), 0)
+        self.assertEqual(self.run_script(lines, transaction_size=2), (4, 1))
+        self.assertEqual(self.count("Volumes"), 1)
+
+    def test_read_then_error(self) -> None:
+        """
+        Test that a read sees the uncommitted writes of the script, without paging,
+        and that a later failure rolls them back.
+        """
+        self.handler.fetch_size = 1
+        lines = [
+            "start_volume 1",
+            "start_volume 2",
+            "query SELECT * FROM Volumes",
+            "start_volume 3",
+            "unknown",
+        ]
+        with patch("builtins.print") as mock_print, patch("builtins.input") as mock_input:
+            self.assertEqual(self.console.run_script(lines), (5, 1))
+        mock_input.assert_not_called()
+        mock_print.assert_any_call("2")
+        self.assertEqual(self.count("Volumes"), 0)
+        self.assertTrue(self.console.commands_instance.interactive)
+
+    def test_continue_on_error(self) -> None:
+        """
+        Test that failing commands are skipped when continuing on errors.
+        """
+        lines = ["start_volume 1", "unknown", "start_volume", "start_volume 2"]
+        self.assertEqual(self.run_script(lines, stop_on_error=False), (4, 2))
+        self.assertEqual(self.count("Volumes"), 2)
+
 
 if __name__ == "__main__":
     unittest.main()
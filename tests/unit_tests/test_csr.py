@@ -0,0 +1,98 @@
+"""
+Unit tests for the CSRMatrix class.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from datapiece.scripts.csr import (CSR_META_NAME, CSRMatrix, get_group_pairs,
+                                   load_meta)
+
+
+class TestCSRMatrix(unittest.TestCase):
+    """
+    Test case for the CSRMatrix class.
+    """
+
+    def test_get_group_pairs(self) -> None:
+        """
+        Test that every ordered pair of distinct values of a group is returned.
+        """
+        left, right = get_group_pairs(np.array([1, 1, 1, 2, 3, 3]), np.array([5, 6, 7, 8, 5, 6]))
+        self.assertEqual(
+            sorted(zip(left.tolist(), right.tolist())),
+            [(5, 6), (5, 6), (5, 7), (6, 5), (6, 5), (6, 7), (7, 5), (7, 6)],
+        )
+        self.assertEqual(len(get_group_pairs(np.array([]), np.array([]))[0]), 0)
+
+    def test_from_coo(self) -> None:
+        """
+        Test that repeated coordinates are summed and zero sums dropped.
+        """
+        matrix = CSRMatrix.from_coo(
+            np.array([2, 0, 2, 1]), np.array([1, 3, 1, 1]), np.array([1, 4, 2, -5]), size=5
+        )
+        self.assertEqual(matrix.size, 5)
+        self.assertEqual(matrix.indptr.tolist(), [0, 1, 2, 3, 3, 3])
+        self.assertEqual((matrix.get(2, 1), matrix.get(0, 3), matrix.get(1, 1)), (3, 4, -5))
+        self.assertEqual(matrix.get(4, 4), 0)
+        self.assertEqual(matrix.get(9, 0), 0)
+        total = matrix.add(CSRMatrix.from_coo(np.array([1]), np.array([1]), np.array([5])))
+        self.assertEqual(total.nnz, 2)
+        self.assertEqual(total.size, 5)
+
+    def test_save_and_load(self) -> None:
+        """
+        Test that a saved matrix is mapped in memory with its metadata.
+        """
+        matrix = CSRMatrix.from_coo(np.array([0, 1]), np.array([1, 0]))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            directory = os.path.join(tmp_dir, "matrix")
+            matrix.save(directory, {"watermark": 3})
+            loaded, meta = CSRMatrix.load(directory)
+            self.assertIsInstance(loaded.data, np.memmap)
+            self.assertEqual(meta, {"watermark": 3})
+            self.assertEqual(loaded.row(1)[0].tolist(), [0])
+            del loaded
+
+    def test_save_while_mapped(self) -> None:
+        """
+        Test that saving again leaves a mapped matrix intact and removes the old version.
+        """
+        matrix = CSRMatrix.from_coo(np.array([0, 1]), np.array([1, 0]))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            directory = os.path.join(tmp_dir, "matrix")
+            matrix.save(directory, {"watermark": 3})
+            mapped, _ = CSRMatrix.load(directory)
+            matrix.add(matrix).save(directory, {"watermark": 5})
+            self.assertEqual(mapped.get(0, 1), 1)
+            loaded, meta = CSRMatrix.load(directory)
+            self.assertEqual((loaded.get(0, 1), meta), (2, {"watermark": 5}))
+            self.assertEqual(load_meta(directory), {"watermark": 5})
+            versions = [name for name in os.listdir(directory) if name != CSR_META_NAME]
+            self.assertEqual(len(versions), 1)
+            del mapped, loaded
+
+    def test_float_values_and_get_edges(self) -> None:
+        """
+        Test that float weights cancelling out are dropped and that several rows are read at once.
+        """
+        matrix = CSRMatrix.from_coo(
+            np.array([0, 0, 1, 2, 2]),
+            np.array([1, 2, 0, 0, 1]),
+            np.array([0.1, 0.5, 2.0, 1.5, 1.0]),
+        )
+        matrix = matrix.add(CSRMatrix.from_coo(np.array([0]), np.array([1]), np.array([-0.1])))
+        self.assertEqual(matrix.nnz, 4)
+        self.assertEqual(matrix.get(2, 0), 1.5)
+        rows, cols, values = matrix.get_edges(np.array([2, 0]))
+        self.assertEqual(rows.tolist(), [2, 2, 0])
+        self.assertEqual(cols.tolist(), [0, 1, 2])
+        self.assertEqual(values.tolist(), [1.5, 1.0, 0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,13 +2,14 @@
 Unit tests for the DBQueryHandler class.
 """
 
+import sqlite3
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 from datapiece.scripts.db_query_handler import DBQueryHandler
 
 
-# pylint: disable=W0212
+# pylint: disable=W0212,R0904
 class TestDBQueryHandler(unittest.TestCase):
     """
     Test case for the DBQueryHandler class.
@@ -28,10 +29,12 @@ class TestDBQueryHandler(unittest.TestCase):
 
         self.mock_conn = MagicMock()
         self.mock_cursor = MagicMock()
+        self.mock_cursor.rowcount = 1
         self.mock_conn.cursor.return_value = self.mock_cursor
 
-        with patch("sqlite3.connect", return_value=self.mock_conn):
+        with patch("sqlite3.connect", return_value=self.mock_conn) as mock_connect:
             self.handler = DBQueryHandler(self.mock_config)
+        self.mock_connect = mock_connect
 
     def test_is_needed_to_delete(self) -> None:
         """
@@ -139,9 +142,45 @@ class TestDBQueryHandler(unittest.TestCase):
         """
         query = "SELECT * FROM DummyTable"
         self.handler.execute_query(query)
-        self.mock_cursor.execute.assert_called_once_with(query)
+        self.mock_cursor.execute.assert_called_once_with(query, ())
         self.mock_conn.commit.assert_called_once()
 
+    def test_statement_cache_size(self) -> None:
+        """
+        Test that the statement cache size is passed to the connection.
+        """
+        self.mock_connect.assert_called_once_with(
+            self.db_name, cached_statements=256, check_same_thread=False
+        )
+        with patch("sqlite3.connect", return_value=self.mock_conn) as mock_connect:
+            DBQueryHandler({**self.mock_config, "statement_cache_size": 16})
+        mock_connect.assert_called_once_with(
+            self.db_name, cached_statements=16, check_same_thread=False
+        )
+
+    def test_execute(self) -> None:
+        """
+        Test the execute method with bound parameters.
+        """
+        query = "INSERT INTO DummyTable VALUES (?)"
+        self.handler.execute(query, ("a",), commit=False)
+        self.mock_cursor.execute.assert_called_once_with(query, ("a",))
+        self.mock_conn.commit.assert_not_called()
+
+    def test_executemany(self) -> None:
+        """
+        Test the executemany method outside and inside a batch.
+        """
+        query = "INSERT INTO DummyTable VALUES (?)"
+        self.handler.executemany(query, [("a",), ("b",)])
+        self.mock_cursor.executemany.assert_called_once_with(query, [("a",), ("b",)])
+        self.mock_conn.commit.assert_called_once()
+
+        self.handler.begin_batch()
+        self.handler.executemany(query, [("c",)])
+        self.handler.execute(query, ("d",))
+        self.assertEqual(self.handler.batch.groups, [(query, [("c",), ("d",)])])
+
     def test_close(self) -> None:
         """
         Test the _close method.
@@ -149,6 +188,212 @@ class TestDBQueryHandler(unittest.TestCase):
         self.handler.close()
         self.mock_conn.close.assert_called_once()
 
+    def test_execute_query_in_batch(self) -> None:
+        """
+        Test that execute_query buffers the query while a batch is open.
+        """
+        self.handler.begin_batch()
+        self.handler.execute_query("INSERT INTO DummyTable VALUES ('a')")
+        self.mock_cursor.execute.assert_not_called()
+        self.mock_conn.commit.assert_not_called()
+
+    def test_flush(self) -> None:
+        """
+        Test that flush groups consecutive statements and commits once.
+        """
+        self.handler.begin_batch()
+        self.handler._buffer("INSERT INTO DummyTable VALUES (?)", ("a",))
+        self.handler._buffer("INSERT INTO DummyTable VALUES (?)", ("b",))
+        self.handler._buffer("DELETE FROM DummyTable", ())
+
+        self.assertEqual(self.handler.flush(), 3)
+
+        self.mock_cursor.executemany.assert_called_once_with(
+            "INSERT INTO DummyTable VALUES (?)", [("a",), ("b",)]
+        )
+        self.mock_cursor.execute.assert_called_once_with("DELETE FROM DummyTable", ())
+        self.mock_conn.commit.assert_called_once()
+        self.assertEqual(self.handler.flush(), 0)
+
+    def test_flush_rollback(self) -> None:
+        """
+        Test that a failing flush rolls back and empties the buffer.
+        """
+        self.mock_cursor.execute.side_effect = sqlite3.IntegrityError("duplicate")
+        self.handler.begin_batch()
+        self.handler._buffer("INSERT INTO DummyTable VALUES (?)", ("a",))
+        with patch("logging.error"), self.assertRaises(sqlite3.IntegrityError):
+            self.handler.flush()
+        self.mock_conn.rollback.assert_called_once()
+        self.mock_conn.commit.assert_not_called()
+        self.assertEqual(self.handler.batch.groups, [])
+
+    def test_buffer_auto_flush(self) -> None:
+        """
+        Test that the buffer is flushed once the row threshold is reached.
+        """
+        self.handler.batch.max_rows = 2
+        self.handler.begin_batch()
+        with patch.object(DBQueryHandler, "flush") as mock_flush:
+            self.handler._buffer("INSERT INTO DummyTable VALUES (?)", ("a",))
+            mock_flush.assert_not_called()
+            self.handler._buffer("INSERT INTO DummyTable VALUES (?)", ("b",))
+            mock_flush.assert_called_once()
+
+    def test_end_batch(self) -> None:
+        """
+        Test that end_batch flushes and leaves batch mode, also when closing.
+        """
+        self.handler.begin_batch()
+        self.handler._buffer("INSERT INTO DummyTable VALUES (?)", ("a",))
+        self.handler.close()
+        self.assertFalse(self.handler.batch.active)
+        self.assertEqual(
+            self.mock_conn.method_calls[-2:], [call.commit(), call.close()]
+        )
+
+    def test_load_index_commands(self) -> None:
+        """
+        Test that no index command is loaded when no index file is configured.
+        """
+        self.assertEqual(self.handler._load_index_commands(), [])
+        self.handler.index_file = "indexes.sql"
+        with patch(
+            "builtins.open",
+            new_callable=unittest.mock.mock_open,
+            read_data="CREATE INDEX IF NOT EXISTS idx_a ON A (B);",
+        ):
+            self.assertEqual(
+                self.handler._load_index_commands(),
+                ["CREATE INDEX IF NOT EXISTS idx_a ON A (B)"],
+            )
+
+    @patch.object(DBQueryHandler, "_load_index_commands")
+    def test_get_index_names(self, mock_load) -> None:
+        """
+        Test the get_index_names method.
+        """
+        mock_load.return_value = [
+            "CREATE INDEX IF NOT EXISTS idx_a ON A (B)",
+            "\ncreate index idx_b ON B (C)",
+            "",
+        ]
+        self.assertEqual(self.handler.get_index_names(), ["idx_a", "idx_b"])
+
+    @patch.object(DBQueryHandler, "_execute_sql_commands_list")
+    @patch.object(DBQueryHandler, "get_index_names", return_value=["idx_a"])
+    @patch.object(DBQueryHandler, "_load_index_commands", return_value=["CREATE idx_a"])
+    def test_rebuild_indexes(self, _mock_load, _mock_names, mock_execute) -> None:
+        """
+        Test that rebuild_indexes drops and then creates the indexes.
+        """
+        self.assertEqual(self.handler.rebuild_indexes(), ["idx_a"])
+        self.assertEqual(
+            mock_execute.call_args_list,
+            [call(["DROP INDEX IF EXISTS idx_a"]), call(["CREATE idx_a"])],
+        )
+
+    def test_execute_transaction(self) -> None:
+        """
+        Test that execute_transaction commits once, or rolls back on failure.
+        """
+        self.handler.execute_transaction([("DELETE FROM A", ()), ("INSERT B", (1,))])
+        self.mock_cursor.execute.assert_has_calls(
+            [call("DELETE FROM A", ()), call("INSERT B", (1,))]
+        )
+        self.mock_conn.commit.assert_called_once()
+
+        self.mock_cursor.execute.side_effect = sqlite3.OperationalError("locked")
+        with self.assertRaises(sqlite3.OperationalError):
+            self.handler.execute_transaction([("DELETE FROM A", ())])
+        self.mock_conn.rollback.assert_called_once()
+
+    def test_transaction(self) -> None:
+        """
+        Test that the writes of a transaction block are committed once at its end,
+        or rolled back with the buffered writes if the block raises.
+        """
+        with self.handler.transaction():
+            self.handler.execute("INSERT A", (1,))
+            with self.handler.transaction():
+                self.handler.execute_transaction([("INSERT B", (2,))])
+            self.mock_conn.commit.assert_not_called()
+        self.mock_conn.commit.assert_called_once()
+
+        self.handler.begin_batch()
+        with self.assertRaises(ValueError):
+            with self.handler.transaction():
+                self.handler.execute("INSERT C", (3,))
+                raise ValueError("failed")
+        self.mock_conn.rollback.assert_called_once()
+        self.assertEqual(self.handler.batch.drain(), ([], 0))
+        self.mock_conn.commit.assert_called_once()
+
+    def test_apply_profile(self) -> None:
+        """
+        Test that apply_profile runs the PRAGMA statements of the profile.
+        """
+        self.assertEqual(self.handler.profile, "")
+        self.handler.apply_profile("bulk_load")
+        self.mock_conn.execute.assert_any_call("PRAGMA synchronous = NORMAL")
+        self.assertEqual(self.handler.profile, "bulk_load")
+        with self.assertRaises(ValueError):
+            self.handler.apply_profile("unknown")
+
+    def test_checkpoint_without_memory(self) -> None:
+        """
+        Test that checkpoint does nothing when the database is not in memory.
+        """
+        self.assertFalse(self.handler.checkpoint())
+        self.mock_conn.backup.assert_not_called()
+
+    def test_explain(self) -> None:
+        """
+        Test the explain method.
+        """
+        self.mock_conn.execute.return_value.fetchall.return_value = [(2, 0, 0, "SCAN A")]
+        self.assertEqual(self.handler.explain("SELECT * FROM A"), [(2, 0, 0, "SCAN A")])
+        self.mock_conn.execute.assert_called_once_with(
+            "EXPLAIN QUERY PLAN SELECT * FROM A", ()
+        )
+
+    def test_fetch_batches(self) -> None:
+        """
+        Test that fetch_batches streams fetchmany batches and closes its cursor.
+        """
+        read_cursor = MagicMock()
+        read_cursor.fetchmany.side_effect = [[(1,), (2,)], [(3,)], []]
+        self.mock_conn.cursor.return_value = read_cursor
+
+        batches = list(self.handler.fetch_batches("SELECT 1", batch_size=2))
+
+        self.assertEqual(batches, [[(1,), (2,)], [(3,)]])
+        read_cursor.execute.assert_called_once_with("SELECT 1", ())
+        read_cursor.fetchmany.assert_called_with(2)
+        read_cursor.close.assert_called_once()
+
+    def test_fetch(self) -> None:
+        """
+        Test that fetch yields single rows and can return sqlite3.Row objects.
+        """
+        read_cursor = MagicMock()
+        read_cursor.fetchmany.side_effect = [[(1,), (2,)], []]
+        self.mock_conn.cursor.return_value = read_cursor
+
+        rows = list(self.handler.fetch("SELECT ?", (1,), as_rows=True))
+
+        self.assertEqual(rows, [(1,), (2,)])
+        self.assertIs(read_cursor.row_factory, sqlite3.Row)
+        read_cursor.fetchmany.assert_called_with(self.handler.fetch_size)
+
+    def test_fetch_is_lazy(self) -> None:
+        """
+        Test that fetch does not run the query before the first row is requested.
+        """
+        rows = self.handler.fetch("SELECT 1")
+        self.mock_conn.cursor.assert_called_once()
+        self.assertIsNotNone(rows)
+
 
 if __name__ == "__main__":
     unittest.main()
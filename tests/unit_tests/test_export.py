@@ -0,0 +1,95 @@
+"""
+Unit tests for the NumPy export of the analysis tables.
+"""
+
+import os
+import unittest
+
+import numpy as np
+
+from datapiece.scripts.export import (EXPORT_TABLES, export_tables,
+                                      get_column_expression, load_categories,
+                                      load_table)
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestExport(DatabaseTestCase):
+    """
+    Test case for the export of the analysis tables.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with a small hierarchy and an export directory.
+        """
+        super().setUp()
+        self.insert_hierarchy()
+        self.handler.execute_transaction(
+            [
+                ("UPDATE Panels SET Location = 'Shells Town' WHERE PanelID IN (2, 4)", ()),
+                ("UPDATE Pages SET IsCoverPage = TRUE WHERE PageID = 2", ()),
+                (
+                    "INSERT INTO Characters (CharacterID, Name, Race, Height) "
+                    "VALUES (1, 'Luffy', 'Human', 174)",
+                    (),
+                ),
+                (
+                    "INSERT INTO Characters (CharacterID, Name, Race) VALUES (2, 'Chopper', NULL)",
+                    (),
+                ),
+            ]
+        )
+        self.export_dir = os.path.join(self.tmp_dir.name, "exports")
+
+    def test_get_column_expression(self) -> None:
+        """
+        Test the SQL expressions converting the columns to their NumPy type.
+        """
+        self.assertEqual(get_column_expression("Location", "category"), "Location")
+        self.assertEqual(get_column_expression("IsOther", "bool"), "COALESCE(IsOther, 0) <> 0")
+        self.assertIn("typeof(Height)", get_column_expression("Height", "int32"))
+
+    def test_export_and_load(self) -> None:
+        """
+        Test that the columns are typed, dictionary-encoded and memory-mapped.
+        """
+        report = export_tables(self.handler, self.export_dir, chunk_size=3)
+        self.assertEqual([table for table, _, _, _ in report], list(EXPORT_TABLES))
+        panels = load_table(self.export_dir, "Panels")
+        self.assertIsInstance(panels["PanelID"], np.memmap)
+        self.assertEqual(panels["PanelID"].tolist(), [1, 2, 3, 4])
+        locations = load_categories(self.export_dir, "Panels", "Location")
+        self.assertEqual(
+            locations[panels["Location"]].tolist(),
+            ["Unknown", "Shells Town", "Unknown", "Shells Town"],
+        )
+        pages = load_table(self.export_dir, "Pages")
+        self.assertEqual(pages["IsCoverPage"].dtype, np.bool_)
+        self.assertEqual(pages["IsCoverPage"].tolist(), [False, True])
+        characters = load_table(self.export_dir, "Characters")
+        self.assertEqual(characters["Height"].tolist(), [174, -1])
+        self.assertEqual(characters["Race"].tolist(), [0, -1])
+        self.assertEqual(load_table(self.export_dir, "CharacterEvents")["Bounty"].dtype, np.int64)
+
+    def test_incremental_export(self) -> None:
+        """
+        Test that only the changed tables are exported again.
+        """
+        export_tables(self.handler, self.export_dir)
+        report = export_tables(self.handler, self.export_dir)
+        self.assertTrue(all(skipped for _, _, _, skipped in report))
+        self.handler.execute("INSERT INTO Panels (PanelID, PageID, PanelNumber) VALUES (5, 2, 3)")
+        report = export_tables(self.handler, self.export_dir, ["Panels", "Pages"])
+        self.assertEqual(
+            [(table, rows, skipped) for table, rows, _, skipped in report],
+            [("Panels", 5, False), ("Pages", 2, True)],
+        )
+        self.assertEqual(len(load_table(self.export_dir, "Panels")["PanelID"]), 5)
+        report = export_tables(self.handler, self.export_dir, ["Pages"], force=True)
+        self.assertFalse(report[0][3])
+        with self.assertRaises(ValueError):
+            export_tables(self.handler, self.export_dir, ["Unknown"])
+
+
+if __name__ == "__main__":
+    unittest.main()
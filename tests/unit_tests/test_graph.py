@@ -0,0 +1,161 @@
+"""
+Unit tests for the InteractionGraph class and the graph algorithms.
+"""
+
+import unittest
+
+import numpy as np
+
+from datapiece.scripts.csr import CSRMatrix
+from datapiece.scripts.graph import (InteractionGraph, get_components,
+                                     get_pagerank, get_shortest_path)
+from tests.unit_tests.database import DatabaseTestCase
+
+WEIGHTS = {"type": {"Fight": 3.0}, "outcome": {"Win": 2.0}}
+
+
+def get_undirected(edges: list[tuple[int, int]], size: int = 0) -> CSRMatrix:
+    """
+    Returns the unweighted adjacency matrix of undirected edges.
+    """
+    left, right = np.array(edges).T
+    return CSRMatrix.from_coo(np.r_[left, right], np.r_[right, left], np.ones(2 * len(edges)), size)
+
+
+class TestGraphAlgorithms(unittest.TestCase):
+    """
+    Test case for the vectorized graph algorithms.
+    """
+
+    def test_get_shortest_path(self) -> None:
+        """
+        Test that the path with the fewest edges is found, and none between components.
+        """
+        matrix = get_undirected([(0, 1), (1, 2), (2, 3), (0, 4), (4, 3), (5, 6)])
+        self.assertEqual(get_shortest_path(matrix, 0, 3), [0, 4, 3])
+        self.assertEqual(get_shortest_path(matrix, 2, 2), [2])
+        self.assertEqual(get_shortest_path(matrix, 0, 6), [])
+
+    def test_get_pagerank(self) -> None:
+        """
+        Test that the ranks sum to 1 and follow the degrees on an undirected graph.
+        """
+        matrix = get_undirected([(0, 1), (0, 2), (0, 3), (1, 2)], size=5)
+        ranks = get_pagerank(matrix)
+        self.assertAlmostEqual(ranks.sum(), 1.0)
+        self.assertEqual(int(np.argmax(ranks)), 0)
+        self.assertAlmostEqual(ranks[1], ranks[2])
+        self.assertLess(ranks[4], ranks[3])
+        self.assertEqual(len(get_pagerank(CSRMatrix.empty())), 0)
+
+    def test_get_components(self) -> None:
+        """
+        Test that every node is labelled with the smallest node of its component.
+        """
+        matrix = get_undirected([(5, 1), (1, 4), (4, 0), (2, 3)], size=7)
+        self.assertEqual(get_components(matrix).tolist(), [0, 0, 2, 2, 0, 0, 6])
+
+
+class TestInteractionGraph(DatabaseTestCase):
+    """
+    Test case for the InteractionGraph class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with the hierarchy and a weighted graph.
+        """
+        super().setUp()
+        self.insert_hierarchy()
+        self.graph = InteractionGraph(self.handler, WEIGHTS)
+
+    def add_interaction(self, interaction_id: int, kind: str, outcome: str, *characters) -> None:
+        """
+        Inserts an interaction and its participants.
+        """
+        self.handler.execute(
+            "INSERT INTO CharacterInteractions VALUES (?, 1, ?, ?)",
+            (interaction_id, kind, outcome),
+        )
+        self.add_participants(interaction_id, *characters)
+
+    def add_participants(self, interaction_id: int, *characters) -> None:
+        """
+        Inserts participants of an interaction.
+        """
+        self.handler.executemany(
+            "INSERT INTO InteractionCharacters VALUES (?, ?)",
+            [(interaction_id, character) for character in characters],
+        )
+
+    def get_edges(self, graph: InteractionGraph) -> dict:
+        """
+        Returns the weight of every edge of a graph between CharacterIDs.
+        """
+        rows, cols, values = graph.matrix.to_coo()
+        return {
+            (int(graph.ids[row]), int(graph.ids[col])): value
+            for row, col, value in zip(rows, cols, values)
+        }
+
+    def test_weights(self) -> None:
+        """
+        Test that the weights of the interactions of a pair are summed.
+        """
+        self.add_interaction(1, "Fight", "Win", 10, 20)
+        self.add_interaction(2, "Talk", "Ongoing", 10, 20, 30, 30)
+        self.graph.refresh()
+        edges = self.get_edges(self.graph)
+        self.assertEqual(self.graph.ids.tolist(), [10, 20, 30])
+        self.assertEqual(edges[(10, 20)], 7.0)
+        self.assertEqual(edges[(20, 10)], 7.0)
+        self.assertEqual(edges[(30, 10)], 1.0)
+        self.assertEqual(len(edges), 6)
+
+    def test_incremental_refresh(self) -> None:
+        """
+        Test that the participants added later, also to existing interactions,
+        give the same graph as a full load.
+        """
+        self.add_interaction(1, "Fight", "Win", 10, 20)
+        self.add_interaction(2, "Talk", "Ongoing", 20, 30)
+        self.assertEqual(self.graph.refresh(), 4)
+        self.assertEqual(self.graph.refresh(), 0)
+        self.add_participants(1, 5)
+        self.add_interaction(3, "Fight", "Loss", 30, 40)
+        self.assertEqual(self.graph.refresh(), 5)
+        expected = InteractionGraph(self.handler, WEIGHTS)
+        expected.refresh()
+        self.assertEqual(self.graph.ids.tolist(), [5, 10, 20, 30, 40])
+        self.assertEqual(self.get_edges(self.graph), self.get_edges(expected))
+
+    def test_refresh_after_delete(self) -> None:
+        """
+        Test that deleted participants make the graph load everything again.
+        """
+        self.add_interaction(1, "Talk", "Ongoing", 10, 20, 30)
+        self.graph.refresh()
+        self.handler.execute("DELETE FROM InteractionCharacters WHERE CharacterID = 30")
+        self.graph.refresh()
+        self.assertEqual(self.graph.ids.tolist(), [10, 20])
+        self.assertEqual(self.get_edges(self.graph), {(10, 20): 1.0, (20, 10): 1.0})
+
+    def test_queries(self) -> None:
+        """
+        Test the queries by CharacterID.
+        """
+        self.add_interaction(1, "Fight", "Win", 10, 20)
+        self.add_interaction(2, "Talk", "Ongoing", 20, 30)
+        self.add_interaction(3, "Talk", "Ongoing", 40, 50)
+        self.assertEqual(self.graph.shortest_path(10, "30"), [10, 20, 30])
+        self.assertEqual(self.graph.shortest_path(10, 50), [])
+        self.assertEqual(self.graph.degree(20), (2, 7.0))
+        self.assertEqual(self.graph.central(1)[0][0], 20)
+        components = self.graph.components()
+        self.assertEqual([group.tolist() for group in components], [[10, 20, 30], [40, 50]])
+        with self.assertRaises(ValueError):
+            self.graph.degree(99)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Unit tests for the IdAllocator class.
+"""
+
+import sqlite3
+import threading
+import unittest
+
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestIdAllocator(DatabaseTestCase):
+    """
+    Test case for the IDs handed out from the blocks of the Sequences table.
+    """
+
+    def get_next_id(self, table: str) -> int:
+        """
+        Returns the next ID of a table to reserve.
+        """
+        return self.handler.conn.execute(
+            "SELECT NextID FROM Sequences WHERE Name = ?", (table,)
+        ).fetchone()[0]
+
+    def test_blocks(self) -> None:
+        """
+        Test that a block is reserved once and the IDs are handed out from memory.
+        """
+        handler = self.create_handler(ids={"block_size": 10})
+        allocator = handler.id_allocator
+        try:
+            self.assertEqual(allocator.allocate("Chapters", 3), [1, 2, 3])
+            self.assertEqual(allocator.next_id("Chapters"), 4)
+            self.assertEqual(allocator.reserved("Chapters"), 6)
+            self.assertEqual(self.get_next_id("Chapters"), 11)
+            self.assertEqual(allocator.allocate("Chapters", 8), list(range(5, 13)))
+            self.assertEqual(self.get_next_id("Chapters"), 21)
+        finally:
+            handler.close()
+
+    def test_existing_ids(self) -> None:
+        """
+        Test that a reservation starts above the IDs inserted explicitly.
+        """
+        self.insert_hierarchy()
+        self.handler.execute("INSERT INTO Panels (PanelID, PageID, PanelNumber) VALUES (50, 1, 3)")
+        self.assertEqual(self.handler.id_allocator.next_id("Panels"), 51)
+        self.assertEqual(self.handler.id_allocator.next_id("Pages"), 3)
+        with self.assertRaises(ValueError):
+            self.handler.id_allocator.next_id("Volumes")
+
+    def test_transaction(self) -> None:
+        """
+        Test that a reservation during a batch is kept after the batch.
+        """
+        self.handler.begin_batch()
+        self.handler.id_allocator.next_id("Characters")
+        self.handler.end_batch()
+        self.assertEqual(self.get_next_id("Characters"), 101)
+
+    def test_rollback(self) -> None:
+        """
+        Test that a block reserved in a transaction rolled back is not handed out.
+        """
+        allocator = self.handler.id_allocator
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.handler.pool.writer() as conn:
+                conn.execute("INSERT INTO Volumes VALUES (1)")
+                self.assertEqual(allocator.next_id("Chapters"), 1)
+                conn.execute("INSERT INTO Volumes VALUES (1)")
+        self.assertEqual(allocator.reserved("Chapters"), 0)
+        self.assertEqual(allocator.next_id("Chapters"), 1)
+        self.assertEqual(self.get_next_id("Chapters"), 101)
+
+    def test_concurrent_writers(self) -> None:
+        """
+        Test that two handlers on the same database, used from several threads,
+        never receive the same ID.
+        """
+        handlers = [self.handler, self.create_handler(ids={"block_size": 7})]
+        ids: list[int] = []
+        ids_lock = threading.Lock()
+
+        def allocate(index: int) -> None:
+            allocator = handlers[index % 2].id_allocator
+            for _ in range(50):
+                allocated = allocator.allocate("CharacterEvents", 1 + index % 3)
+                with ids_lock:
+                    ids.extend(allocated)
+
+        threads = [threading.Thread(target=allocate, args=(index,)) for index in range(6)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            handlers[1].close()
+        self.assertEqual(len(ids), 50 * (1 + 2 + 3) * 2)
+        self.assertEqual(len(set(ids)), len(ids))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+Unit tests for the Importer class.
+"""
+
+import json
+import os
+import sqlite3
+import unittest
+from typing import Any
+from unittest.mock import patch
+
+from datapiece.scripts.importer import Importer, normalize_value, read_records
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestImporter(DatabaseTestCase):
+    """
+    Test case for the Importer class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with a fresh database.
+        """
+        super().setUp()
+        self.records: list[dict[str, Any]] = [
+            {"VolumeNumber": 1, "ChapterID": 1, "ChapterNumber": 1, "PageID": 1,
+             "PageNumber": 1, "PanelID": 1, "PanelNumber": 1, "AppearanceID": 1,
+             "CharacterID": 1},
+            {"VolumeNumber": 1, "ChapterID": 1, "ChapterNumber": 1, "PageID": 1,
+             "PageNumber": 1, "PanelID": 1, "PanelNumber": 1, "AppearanceID": 2,
+             "CharacterID": 2},
+            {"VolumeNumber": 1, "ChapterID": 1, "ChapterNumber": 1, "PageID": 1,
+             "PageNumber": 1, "PanelID": 2, "PanelNumber": 2, "AppearanceID": 3,
+             "CharacterID": 1, "Location": "Windmill Village"},
+        ]
+
+    def test_normalize_value(self) -> None:
+        """
+        Test the normalize_value function.
+        """
+        self.assertIsNone(normalize_value("ChapterName", ""))
+        self.assertEqual(normalize_value("IsFlashback", "True"), 1)
+        self.assertEqual(normalize_value("IsFlashback", "0"), 0)
+        self.assertEqual(normalize_value("PanelID", "3"), "3")
+
+    def test_read_records(self) -> None:
+        """
+        Test that read_records picks the reader from the file extension.
+        """
+        csv_path = os.path.join(self.tmp_dir.name, "data.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("VolumeNumber,ChapterName\n1,Romance Dawn\n")
+        jsonl_path = os.path.join(self.tmp_dir.name, "data.jsonl")
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"VolumeNumber": 2}) + "\n\n")
+
+        self.assertEqual(
+            list(read_records(csv_path)),
+            [{"VolumeNumber": "1", "ChapterName": "Romance Dawn"}],
+        )
+        self.assertEqual(list(read_records(jsonl_path)), [{"VolumeNumber": 2}])
+        with self.assertRaises(ValueError):
+            read_records("data.xml")
+
+    def test_import_records(self) -> None:
+        """
+        Test that records fill the whole hierarchy in chunks without duplicating parents.
+        """
+        importer = Importer(self.handler, chunk_size=4)
+        with patch.object(
+            self.handler, "flush", wraps=self.handler.flush
+        ) as mock_flush:
+            rows = importer.import_records(iter(self.records))
+
+        self.assertEqual(rows, 8)
+        self.assertGreaterEqual(mock_flush.call_count, 2)
+        self.assertFalse(self.handler.batch.active)
+        self.assertEqual(self.count("Volumes"), 1)
+        self.assertEqual(self.count("Chapters"), 1)
+        self.assertEqual(self.count("Pages"), 1)
+        self.assertEqual(self.count("Panels"), 2)
+        self.assertEqual(self.count("CharacterAppearances"), 3)
+        location = self.handler.conn.execute(
+            "SELECT Location FROM Panels WHERE PanelID = 1"
+        ).fetchone()[0]
+        self.assertEqual(location, "Unknown")
+
+    def test_import_records_rollback(self) -> None:
+        """
+        Test that a failing chunk is rolled back.
+        """
+        importer = Importer(self.handler, chunk_size=100)
+        importer.import_records(iter(self.records[:1]))
+        with patch("logging.error"), self.assertRaises(sqlite3.IntegrityError):
+            importer.import_records(iter(self.records))
+        self.assertEqual(self.count("CharacterAppearances"), 1)
+        self.assertEqual(self.count("Panels"), 1)
+
+    def test_import_file(self) -> None:
+        """
+        Test that import_file reads a JSONL file and reports the elapsed time.
+        """
+        path = os.path.join(self.tmp_dir.name, "data.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+        rows, elapsed = Importer(self.handler).import_file(path)
+        self.assertEqual(rows, 8)
+        self.assertGreaterEqual(elapsed, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Unit tests for the Maintenance class and the maintenance of the handler.
+"""
+
+import unittest
+
+from datapiece.scripts.maintenance import MAINTENANCE_STEPS, get_steps
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestMaintenance(DatabaseTestCase):
+    """
+    Test case for the Maintenance class.
+    """
+
+    def insert_volumes(self, count: int) -> None:
+        """
+        Helper method inserting volumes with a large chapter name each.
+        """
+        self.handler.executemany("INSERT INTO Volumes VALUES (?)", [(n,) for n in range(count)])
+        self.handler.executemany(
+            "INSERT INTO Chapters (ChapterID, VolumeNumber, ChapterNumber, ChapterName) "
+            "VALUES (?, ?, ?, ?)",
+            [(n, n, n, "x" * 2000) for n in range(count)],
+        )
+
+    def test_get_steps(self) -> None:
+        """
+        Test that steps are validated and returned in execution order.
+        """
+        self.assertEqual(get_steps(), list(MAINTENANCE_STEPS))
+        self.assertEqual(get_steps(["checkpoint", "analyze"]), ["analyze", "checkpoint"])
+        with self.assertRaises(ValueError):
+            get_steps(["defragment"])
+
+    def test_run_reports_steps(self) -> None:
+        """
+        Test that every step is timed and that the incremental vacuum frees the deleted pages.
+        """
+        self.insert_volumes(200)
+        self.handler.execute("DELETE FROM Chapters")
+        report = self.handler.maintain()
+        self.assertEqual([step for step, _, _ in report], list(MAINTENANCE_STEPS))
+        freed = dict((step, freed) for step, _, freed in report)
+        self.assertGreater(freed["vacuum"], 100 * 2000)
+        self.assertEqual(
+            self.handler.conn.execute("PRAGMA freelist_count").fetchone()[0], 0
+        )
+        self.assertTrue(
+            self.handler.conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()[0]
+        )
+
+    def test_due_steps(self) -> None:
+        """
+        Test that steps become due once their threshold of written rows is crossed.
+        """
+        self.handler.close()
+        self.handler = self.create_handler(
+            maintenance={"thresholds": {"analyze": 0, "optimize": 50, "checkpoint": 10}}
+        )
+        maintenance = self.handler.maintenance
+        self.assertEqual(maintenance.due_steps(), [])
+        # Only volumes: the chapter names would also write their search index entries.
+        self.handler.executemany("INSERT INTO Volumes VALUES (?)", [(n,) for n in range(20)])
+        self.assertEqual(maintenance.writes_since("checkpoint"), 20)
+        self.assertEqual(maintenance.due_steps(), ["checkpoint"])
+        self.assertEqual([step for step, _, _ in maintenance.run_due()], ["checkpoint"])
+        self.assertEqual(maintenance.writes_since("checkpoint"), 0)
+        self.assertEqual(maintenance.run_due(), [])
+
+    def test_skipped_in_transaction(self) -> None:
+        """
+        Test that nothing runs while a transaction is open.
+        """
+        self.handler.execute("INSERT INTO Volumes VALUES (1)", commit=False)
+        self.assertEqual(self.handler.maintenance.run(), [])
+        self.handler.conn.rollback()
+
+    def test_invalid_threshold(self) -> None:
+        """
+        Test that thresholds of unknown steps are rejected.
+        """
+        with self.assertRaises(ValueError):
+            self.create_handler(maintenance={"thresholds": {"defragment": 1}})
+
+
+if __name__ == "__main__":
+    unittest.main()
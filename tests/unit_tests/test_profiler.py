@@ -0,0 +1,81 @@
+"""
+Unit tests for the SessionProfiler class.
+"""
+
+import os
+import pstats
+import tempfile
+import unittest
+
+from datapiece.scripts.profiler import SessionProfiler
+
+
+def allocate(count: int) -> list[str]:
+    """
+    Allocates strings for the memory traces.
+    """
+    return [str(number) * 10 for number in range(count)]
+
+
+class TestSessionProfiler(unittest.TestCase):
+    """
+    Test case for the SessionProfiler class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with a profiler writing to a temporary directory.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        self.profiler = SessionProfiler(os.path.join(self.tmp_dir.name, "reports"), top=5)
+
+    def tearDown(self) -> None:
+        """
+        Clean up after the test case.
+        """
+        self.profiler.close()
+        self.tmp_dir.cleanup()
+
+    def test_profile(self) -> None:
+        """
+        Test that only the profiled blocks are collected and dumped.
+        """
+        with self.profiler.profiled():
+            allocate(10)
+        with self.assertRaises(ValueError):
+            self.profiler.dump()
+        self.profiler.start()
+        with self.assertRaises(ValueError):
+            self.profiler.start()
+        with self.profiler.profiled():
+            allocate(10)
+        self.profiler.stop()
+        stats_path, report_path = self.profiler.dump()
+        functions = {name for _, _, name in pstats.Stats(stats_path).stats}  # type: ignore
+        self.assertIn("allocate", functions)
+        with open(report_path, encoding="utf-8") as f:
+            self.assertIn("cumulative", f.read())
+
+    def test_memtrace(self) -> None:
+        """
+        Test the allocation snapshot and diff reports.
+        """
+        with self.assertRaises(ValueError):
+            self.profiler.snapshot()
+        self.profiler.start_trace()
+        with self.assertRaises(ValueError):
+            self.profiler.diff()
+        self.profiler.snapshot()
+        kept = allocate(10000)
+        path = self.profiler.diff()
+        with open(path, encoding="utf-8") as f:
+            report = f.read()
+        self.assertTrue(report.startswith("Traced memory change: +"))
+        self.assertIn("test_profiler.py", report)
+        self.assertEqual(len(kept), 10000)
+        self.profiler.stop_trace()
+        self.assertEqual(len(os.listdir(self.profiler.output_dir)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
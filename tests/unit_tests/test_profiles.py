@@ -0,0 +1,80 @@
+"""
+Unit tests for the profiles module.
+"""
+
+import unittest
+
+from datapiece.scripts.profiles import (BASE_PRAGMAS, get_pragma_statements,
+                                        merge_profiles)
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestProfiles(unittest.TestCase):
+    """
+    Test case for the profiles module.
+    """
+
+    def test_merge_profiles(self) -> None:
+        """
+        Test that configured profiles override and extend the default ones.
+        """
+        profiles = merge_profiles(
+            {"bulk_load": {"synchronous": "NORMAL"}, "custom": {"cache_size": -1000}}
+        )
+        self.assertEqual(profiles["bulk_load"]["synchronous"], "NORMAL")
+        self.assertEqual(profiles["bulk_load"]["journal_mode"], "WAL")
+        self.assertEqual(profiles["custom"], {"cache_size": -1000})
+        self.assertIn("read_only", profiles)
+
+    def test_get_pragma_statements(self) -> None:
+        """
+        Test that every base PRAGMA is set, overridden by the profile values.
+        """
+        statements = get_pragma_statements({"synchronous": "OFF"})
+        self.assertEqual(len(statements), len(BASE_PRAGMAS))
+        self.assertIn("PRAGMA synchronous = OFF", statements)
+        self.assertIn("PRAGMA query_only = OFF", statements)
+
+    def test_get_pragma_statements_invalid(self) -> None:
+        """
+        Test that unknown settings and unsafe values are rejected.
+        """
+        with self.assertRaises(ValueError):
+            get_pragma_statements({"foreign_keys": "ON"})
+        with self.assertRaises(ValueError):
+            get_pragma_statements({"synchronous": "OFF; DROP TABLE Volumes"})
+
+
+class TestProfilesDatabase(DatabaseTestCase):
+    """
+    Test case applying the profiles to a real database.
+    """
+
+    def _pragma(self, name: str):
+        """
+        Helper method returning the current value of a PRAGMA.
+        """
+        return self.handler.conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+    def test_apply_profile(self) -> None:
+        """
+        Test switching between the bulk load and the read only profiles.
+        """
+        self.handler.apply_profile("bulk_load")
+        self.assertEqual(self.handler.profile, "bulk_load")
+        self.assertEqual(self._pragma("journal_mode"), "wal")
+        self.assertEqual(self._pragma("synchronous"), 1)
+        self.assertEqual(self._pragma("cache_size"), -262144)
+
+        self.handler.apply_profile("read_only")
+        self.assertEqual(self._pragma("query_only"), 1)
+        self.assertEqual(self._pragma("synchronous"), 2)
+
+        self.handler.apply_profile("interactive")
+        self.assertEqual(self._pragma("query_only"), 0)
+        with self.assertRaises(ValueError):
+            self.handler.apply_profile("turbo")
+
+
+if __name__ == "__main__":
+    unittest.main()
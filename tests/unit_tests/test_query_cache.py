@@ -0,0 +1,193 @@
+"""
+Unit tests for the QueryCache class and the cached read path of the handler.
+"""
+
+import sqlite3
+import unittest
+from unittest.mock import patch
+
+from datapiece.scripts.query_cache import (QueryCache, get_statement_tables,
+                                           normalize_sql)
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestQueryCache(unittest.TestCase):
+    """
+    Test case for the QueryCache class.
+    """
+
+    def test_normalize_sql(self) -> None:
+        """
+        Test that whitespace is collapsed outside of quoted strings only.
+        """
+        self.assertEqual(
+            normalize_sql("  SELECT *\n  FROM Arcs\tWHERE ArcName = 'East  Blue' ;"),
+            "SELECT * FROM Arcs WHERE ArcName = 'East  Blue'",
+        )
+
+    def test_get_statement_tables(self) -> None:
+        """
+        Test that the tables written by triggers are reported with the written table.
+        """
+        conn = sqlite3.connect(":memory:")
+        conn.executescript(
+            "CREATE TABLE A (x); CREATE TABLE B (y); CREATE TABLE C (z);"
+            "CREATE TRIGGER T AFTER INSERT ON A BEGIN INSERT INTO B VALUES (NEW.x); END;"
+        )
+        self.assertEqual(
+            get_statement_tables(conn, "SELECT * FROM B JOIN C ON y = z"),
+            (frozenset({"b", "c"}), frozenset()),
+        )
+        self.assertEqual(
+            get_statement_tables(conn, "INSERT INTO A VALUES (?)", (1,))[1],
+            frozenset({"a", "b"}),
+        )
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM A").fetchone(), (0,))
+        conn.close()
+
+    def test_lru_and_invalidation(self) -> None:
+        """
+        Test the entry cap, the least recently used eviction and the table invalidation.
+        """
+        cache = QueryCache(max_entries=2)
+        cache.put("a", [(1,)], frozenset({"volumes"}))
+        cache.put("b", [(2,)], frozenset({"arcs"}))
+        self.assertEqual(cache.get("a"), [(1,)])
+        cache.put("c", [(3,)], frozenset({"arcs", "chapters"}))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.invalidate(frozenset({"arcs"})), 1)
+        self.assertEqual(len(cache), 1)
+        stats = cache.stats()
+        self.assertEqual(
+            (stats["hits"], stats["misses"], stats["evictions"], stats["invalidations"]),
+            (1, 1, 1, 1),
+        )
+
+    def test_memory_cap(self) -> None:
+        """
+        Test that entries are evicted to stay under the memory cap.
+        """
+        rows = [(number, "x" * 100) for number in range(10)]
+        cache = QueryCache(max_entries=100, max_bytes=4000)
+        self.assertTrue(cache.put("a", rows, frozenset()))
+        self.assertTrue(cache.put("b", rows, frozenset()))
+        self.assertIsNone(cache.get("a"))
+        self.assertLessEqual(cache.size, 4000)
+        self.assertFalse(cache.put("c", rows * 10, frozenset()))
+
+    def test_tables_are_bounded(self) -> None:
+        """
+        Test that the tables of at most max_entries statements are kept,
+        the least recently used being forgotten first.
+        """
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE A (x INT)")
+        cache = QueryCache(max_entries=2)
+        for number in range(5):
+            cache.get_tables(conn, f"SELECT x FROM A WHERE x = {number}")
+        cache.get_tables(conn, "SELECT x FROM A WHERE x = 3")
+        cache.get_tables(conn, "SELECT x FROM A")
+        with patch("datapiece.scripts.query_cache.get_statement_tables") as mock_tables:
+            self.assertEqual(cache.get_tables(conn, "SELECT x FROM A WHERE x = 3")[0], {"a"})
+            mock_tables.assert_not_called()
+        self.assertEqual(len(cache._tables), 2)  # pylint: disable=protected-access
+        conn.close()
+
+
+class TestCachedHandler(DatabaseTestCase):
+    """
+    Test case for the cached read path of the handler.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with the query cache enabled.
+        """
+        super().setUp()
+        self.handler.close()
+        self.handler = self.create_handler(query_cache={"max_entries": 10})
+        self.cache = self.handler.query_cache
+
+    def test_hit_and_write_invalidation(self) -> None:
+        """
+        Test that results are cached and evicted only by writes to the tables they read.
+        """
+        self.handler.execute("INSERT INTO Volumes VALUES (1)")
+        query = "SELECT VolumeNumber FROM Volumes"
+        self.assertEqual(list(self.handler.fetch(query)), [(1,)])
+        self.assertEqual(list(self.handler.fetch(f"  {query} ;")), [(1,)])
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+        self.handler.execute("INSERT INTO Characters (CharacterID, Name) VALUES (1, 'Luffy')")
+        self.assertEqual(len(self.cache), 1)
+        self.handler.executemany("INSERT INTO Volumes VALUES (?)", [(2,), (3,)])
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(list(self.handler.fetch(query)), [(1,), (2,), (3,)])
+
+    def test_empty_executemany_in_batch(self) -> None:
+        """
+        Test that an executemany without rows in batch mode is flushed as a no-op.
+        """
+        self.assertEqual(list(self.handler.fetch("SELECT * FROM Volumes")), [])
+        self.handler.begin_batch()
+        self.handler.executemany("INSERT INTO Volumes VALUES (?)", [])
+        self.handler.execute("INSERT INTO Volumes VALUES (1)")
+        self.assertEqual(self.handler.end_batch(), 1)
+        self.assertEqual(list(self.handler.fetch("SELECT * FROM Volumes")), [(1,)])
+
+    def test_writer_and_id_invalidation(self) -> None:
+        """
+        Test that the writes through the pooled writer and the ID reservations,
+        made on the handler's own connection, evict the cached results.
+        """
+        count_query = "SELECT COUNT(*) FROM Volumes"
+        self.assertEqual(list(self.handler.fetch(count_query)), [(0,)])
+        with self.handler.pool.writer() as conn:
+            conn.execute("INSERT INTO Volumes VALUES (1)")
+        self.assertEqual(list(self.handler.fetch(count_query)), [(1,)])
+        sequence_query = "SELECT NextID FROM Sequences WHERE Name = 'Chapters'"
+        self.assertEqual(list(self.handler.fetch(sequence_query)), [])
+        self.handler.id_allocator.next_id("Chapters")
+        self.assertEqual(list(self.handler.fetch(sequence_query)), [(101,)])
+
+    def test_trigger_invalidation(self) -> None:
+        """
+        Test that a write to CharacterAppearances evicts the cached rollup results.
+        """
+        self.insert_hierarchy()
+        query = "SELECT AppearanceCount FROM CharacterChapterAppearances WHERE CharacterID = ?"
+        self.assertEqual(list(self.handler.fetch(query, (1,))), [])
+        self.handler.begin_batch()
+        self.handler.execute("INSERT INTO CharacterAppearances VALUES (1, 1, 1)")
+        self.handler.end_batch()
+        self.assertEqual(list(self.handler.fetch(query, (1,))), [(1,)])
+        self.assertEqual(self.cache.stats()["hits"], 0)
+
+    def test_partial_reads_and_transactions(self) -> None:
+        """
+        Test that unfinished reads and reads inside a transaction are not cached.
+        """
+        self.handler.executemany("INSERT INTO Volumes VALUES (?)", [(n,) for n in range(10)])
+        batches = self.handler.fetch_batches("SELECT * FROM Volumes", batch_size=3)
+        next(batches)
+        batches.close()
+        self.assertEqual(len(self.cache), 0)
+        self.handler.execute("INSERT INTO Volumes VALUES (10)", commit=False)
+        self.assertEqual(len(list(self.handler.fetch("SELECT * FROM Volumes"))), 11)
+        self.handler.conn.rollback()
+        self.assertEqual(len(list(self.handler.fetch("SELECT * FROM Volumes"))), 10)
+
+    def test_external_writes(self) -> None:
+        """
+        Test that a commit of another connection clears the cache.
+        """
+        query = "SELECT COUNT(*) FROM Volumes"
+        self.assertEqual(list(self.handler.fetch(query)), [(0,)])
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO Volumes VALUES (1)")
+        conn.close()
+        self.assertEqual(list(self.handler.fetch(query)), [(1,)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Unit tests for the QueryStats class and the instrumentation of the handler.
+"""
+
+import unittest
+
+from datapiece.scripts.query_stats import (LATENCY_BUCKETS_MS, QueryStats,
+                                           get_percentile, get_statement_shape)
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestQueryStats(unittest.TestCase):
+    """
+    Test case for the QueryStats class.
+    """
+
+    def test_get_statement_shape(self) -> None:
+        """
+        Test that literals are replaced and placeholder lists collapsed.
+        """
+        self.assertEqual(
+            get_statement_shape("SELECT *  FROM Arcs WHERE ArcID = 12 AND ArcName = 'It''s'"),
+            "SELECT * FROM Arcs WHERE ArcID = ? AND ArcName = ?",
+        )
+        self.assertEqual(
+            get_statement_shape("INSERT INTO Volumes VALUES (1), (2), (3)"),
+            "INSERT INTO Volumes VALUES (?, ...)",
+        )
+        self.assertEqual(
+            get_statement_shape("SELECT Panel2 FROM T WHERE x IN (?, ?, ?)"),
+            "SELECT Panel2 FROM T WHERE x IN (?, ...)",
+        )
+
+    def test_get_percentile(self) -> None:
+        """
+        Test the percentile estimates of a histogram.
+        """
+        histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.assertIsNone(get_percentile(histogram, 50))
+        histogram[3] = 90
+        histogram[6] = 10
+        self.assertEqual(get_percentile(histogram, 50), LATENCY_BUCKETS_MS[3])
+        self.assertEqual(get_percentile(histogram, 95), LATENCY_BUCKETS_MS[6])
+        histogram[-1] = 100
+        self.assertIsNone(get_percentile(histogram, 99))
+
+    def test_record(self) -> None:
+        """
+        Test that statements of the same shape are aggregated and slow ones logged.
+        """
+        stats = QueryStats(slow_query_ms=10, slow_log_size=1)
+        explained = []
+
+        def explain() -> list[str]:
+            explained.append(True)
+            return ["SCAN Arcs"]
+
+        stats.record("SELECT * FROM Arcs WHERE ArcID = 1", 0.001, 1, explain)
+        with self.assertLogs(level="WARNING"):
+            stats.record("SELECT * FROM Arcs WHERE ArcID = 2", 0.02, 1, explain)
+            stats.record("SELECT * FROM Arcs WHERE ArcID = 3", 0.03, 0, explain)
+        stats.record_commit(0.005)
+        summary = stats.summary()
+        self.assertEqual(len(summary["statements"]), 1)
+        statement = summary["statements"][0]
+        self.assertEqual((statement["count"], statement["rows"]), (3, 2))
+        self.assertAlmostEqual(statement["max_ms"], 30)
+        self.assertEqual(sum(statement["histogram"]), 3)
+        self.assertEqual(summary["commits"]["count"], 1)
+        self.assertEqual(len(explained), 2)
+        self.assertEqual(len(summary["slow_queries"]), 1)
+        self.assertEqual(summary["slow_queries"][0]["plan"], ["SCAN Arcs"])
+
+    def test_disabled(self) -> None:
+        """
+        Test that nothing is recorded while the statistics are disabled.
+        """
+        stats = QueryStats(enabled=False)
+        stats.record("SELECT 1", 1.0)
+        stats.record_commit(1.0)
+        self.assertEqual(stats.summary()["statements"], [])
+        self.assertEqual(stats.summary()["commits"]["count"], 0)
+
+
+class TestInstrumentedHandler(DatabaseTestCase):
+    """
+    Test case for the statistics recorded by the handler.
+    """
+
+    def test_reads_writes_and_commits(self) -> None:
+        """
+        Test that reads, writes and commits are counted with their rows.
+        """
+        self.handler.stats.reset()
+        self.handler.executemany("INSERT INTO Volumes VALUES (?)", ((n,) for n in range(5)))
+        self.handler.execute("DELETE FROM Volumes WHERE VolumeNumber < 2")
+        self.assertEqual(len(list(self.handler.fetch("SELECT * FROM Volumes", batch_size=2))), 3)
+        statements = {
+            item["sql"]: (item["count"], item["rows"])
+            for item in self.handler.stats.summary()["statements"]
+        }
+        self.assertEqual(
+            statements,
+            {
+                "INSERT INTO Volumes VALUES (?, ...)": (1, 5),
+                "DELETE FROM Volumes WHERE VolumeNumber < ?": (1, 2),
+                "SELECT * FROM Volumes": (1, 3),
+            },
+        )
+        self.assertEqual(self.handler.stats.summary()["commits"]["count"], 2)
+
+    def test_slow_query_plan(self) -> None:
+        """
+        Test that the slow-query log records the query plan of the statement.
+        """
+        self.handler.close()
+        self.handler = self.create_handler(stats={"slow_query_ms": 1e-9})
+        with self.assertLogs(level="WARNING"):
+            list(self.handler.fetch("SELECT * FROM Panels WHERE Location = ?", ("Dawn",)))
+        entry = self.handler.stats.summary()["slow_queries"][-1]
+        self.assertEqual(entry["sql"], "SELECT * FROM Panels WHERE Location = ?")
+        self.assertTrue(entry["plan"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Unit tests for the rollups module and the appearance rollup triggers.
+"""
+
+import unittest
+
+from datapiece.scripts.rollups import (get_appearance_counts,
+                                       get_rebuild_statements, rebuild_rollups)
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestRollups(DatabaseTestCase):
+    """
+    Test case for the appearance rollups.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with a chapter hierarchy and a few appearances.
+        """
+        super().setUp()
+        self.insert_hierarchy()
+        self.handler.executemany(
+            "INSERT INTO CharacterAppearances (AppearanceID, CharacterID, PanelID) "
+            "VALUES (?, ?, ?)",
+            [(1, 1, 1), (2, 1, 2), (3, 2, 2), (4, 1, 3)],
+        )
+
+    def _counts(self, level: str) -> list[tuple]:
+        """
+        Helper method returning every count of a rollup level.
+        """
+        return list(get_appearance_counts(self.handler, level))
+
+    def test_insert_trigger(self) -> None:
+        """
+        Test that inserted appearances are counted per chapter, arc and volume.
+        """
+        self.assertEqual(self._counts("chapter"), [(1, 1, 2), (1, 2, 1), (2, 1, 1)])
+        self.assertEqual(self._counts("arc"), [(1, 1, 3), (2, 1, 1)])
+        self.assertEqual(self._counts("volume"), [(1, 1, 2), (1, 2, 1), (2, 1, 1)])
+
+    def test_delete_trigger(self) -> None:
+        """
+        Test that deleted appearances are subtracted and empty counts removed.
+        """
+        self.handler.execute("DELETE FROM CharacterAppearances WHERE AppearanceID IN (3, 4)")
+        self.assertEqual(self._counts("chapter"), [(1, 1, 2)])
+        self.assertEqual(self._counts("arc"), [(1, 1, 2)])
+
+    def test_update_trigger(self) -> None:
+        """
+        Test that moving an appearance to another panel and character moves its count.
+        """
+        self.handler.execute(
+            "UPDATE CharacterAppearances SET PanelID = 4, CharacterID = 2 WHERE AppearanceID = 1"
+        )
+        self.assertEqual(
+            self._counts("chapter"), [(1, 1, 1), (1, 2, 1), (2, 1, 1), (2, 2, 1)]
+        )
+
+    def test_rebuild_rollups(self) -> None:
+        """
+        Test that a rebuild matches the counts maintained by the triggers.
+        """
+        expected = {level: self._counts(level) for level in ("chapter", "arc", "volume")}
+        self.handler.execute("UPDATE Chapters SET ArcID = 2 WHERE ChapterID = 2")
+        rebuild_rollups(self.handler)
+        self.assertEqual(self._counts("chapter"), expected["chapter"])
+        self.assertEqual(self._counts("volume"), expected["volume"])
+        self.assertEqual(self._counts("arc"), [(1, 1, 2), (1, 2, 1), (2, 1, 1)])
+        self.assertEqual(len(get_rebuild_statements()), 6)
+
+    def test_get_appearance_counts_filters(self) -> None:
+        """
+        Test filtering the counts by character and by chapter.
+        """
+        self.assertEqual(
+            list(get_appearance_counts(self.handler, "chapter", character_id=2)), [(2, 1, 1)]
+        )
+        self.assertEqual(
+            list(get_appearance_counts(self.handler, "chapter", key=2)), [(1, 2, 1)]
+        )
+        with self.assertRaises(ValueError):
+            get_appearance_counts(self.handler, "page")
+
+
+if __name__ == "__main__":
+    unittest.main()
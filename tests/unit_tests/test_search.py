@@ -0,0 +1,111 @@
+"""
+Unit tests for the search of names and the Locations table.
+"""
+
+import unittest
+
+from datapiece.scripts.search import (get_substring_distance, get_trigrams,
+                                      rebuild_search, search)
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestSearchHelpers(unittest.TestCase):
+    """
+    Test case for the search helpers.
+    """
+
+    def test_get_trigrams(self) -> None:
+        """
+        Test that the trigrams are lowercase, distinct and in order.
+        """
+        self.assertEqual(get_trigrams("Abab"), ["aba", "bab"])
+        self.assertEqual(get_trigrams("ab"), [])
+
+    def test_get_substring_distance(self) -> None:
+        """
+        Test that the distance is measured to the closest substring of the text.
+        """
+        self.assertEqual(get_substring_distance("luffy", "Monkey D. Luffy"), 0)
+        self.assertEqual(get_substring_distance("lufy", "Monkey D. Luffy"), 1)
+        self.assertEqual(get_substring_distance("enis lobi", "Enies Lobby Arc"), 2)
+        self.assertEqual(get_substring_distance("zoro", ""), 4)
+
+
+class TestSearch(DatabaseTestCase):
+    """
+    Test case for the search of names kept in sync by the triggers of the schema.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with the hierarchy, characters and named chapters.
+        """
+        super().setUp()
+        self.insert_hierarchy()
+        self.handler.executemany(
+            "INSERT INTO Characters (CharacterID, Name) VALUES (?, ?)",
+            [(1, "Monkey D. Luffy"), (2, "Roronoa Zoro"), (3, "Nico Robin")],
+        )
+        self.handler.executemany(
+            "UPDATE Chapters SET ChapterName = ? WHERE ChapterID = ?",
+            [("Enter Enies Lobby", 1), ("Robin's Past", 2)],
+        )
+        self.handler.execute("UPDATE Panels SET Location = 'Enies Lobby' WHERE PanelID <= 2")
+
+    def test_search_across_kinds(self) -> None:
+        """
+        Test that every kind of entity is found by substring, and filtered by kind.
+        """
+        hits = search(self.handler, "enies")
+        self.assertEqual(
+            sorted(hits),
+            [("chapter", 1, "Enter Enies Lobby", 0), ("location", 2, "Enies Lobby", 0)],
+        )
+        self.assertEqual(
+            search(self.handler, "robin", "character"), [("character", 3, "Nico Robin", 0)]
+        )
+        self.assertEqual(len(search(self.handler, "rob")), 2)
+        self.assertEqual(search(self.handler, "d. luf"), [("character", 1, "Monkey D. Luffy", 0)])
+        with self.assertRaises(ValueError):
+            search(self.handler, "robin", "arc")
+
+    def test_fuzzy_fallback(self) -> None:
+        """
+        Test that a misspelled text finds the closest names.
+        """
+        self.assertEqual(search(self.handler, "lufy"), [("character", 1, "Monkey D. Luffy", 1)])
+        self.assertEqual(search(self.handler, "lufy", fuzzy=False), [])
+        self.assertEqual(search(self.handler, "xqzwv"), [])
+
+    def test_triggers(self) -> None:
+        """
+        Test that the index and the Locations table follow the updates and deletes.
+        """
+        self.handler.execute(
+            "UPDATE Characters SET Name = 'Pirate Hunter Zoro' WHERE CharacterID = 2"
+        )
+        self.assertEqual(search(self.handler, "hunter")[0][1], 2)
+        self.handler.execute("DELETE FROM Characters WHERE CharacterID = 3")
+        self.assertEqual(search(self.handler, "nico", fuzzy=False), [])
+        locations = self.handler.conn.execute(
+            "SELECT Name, PanelCount FROM Locations ORDER BY Name"
+        ).fetchall()
+        self.assertEqual(locations, [("Enies Lobby", 2), ("Unknown", 2)])
+        self.handler.execute("DELETE FROM Panels WHERE Location = 'Unknown'")
+        self.assertEqual(search(self.handler, "unknown", "location", fuzzy=False), [])
+        self.assertEqual(self.count("Locations"), 1)
+
+    def test_rebuild_search(self) -> None:
+        """
+        Test that a rebuild recomputes the same entries, the locations being numbered again.
+        """
+        query = "SELECT rowid & 3, Text FROM SearchIndex"
+        expected = self.handler.conn.execute(query).fetchall()
+        self.handler.execute("DELETE FROM SearchIndex")
+        rebuild_search(self.handler)
+        rows = self.handler.conn.execute(query).fetchall()
+        self.assertEqual(sorted(rows), sorted(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,205 @@
+"""
+Unit tests for the QueryServer class.
+"""
+
+import http.client
+import json
+import os
+import socket
+import threading
+import unittest
+from typing import Any
+from unittest.mock import patch
+
+from datapiece.scripts.commands import Commands
+from datapiece.scripts.server import QueryServer
+from tests.unit_tests.database import DatabaseTestCase
+
+
+class TestQueryServer(DatabaseTestCase):
+    """
+    Test case for the QueryServer class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with a server on a free port and a keep-alive client.
+        """
+        super().setUp()
+        self.server = QueryServer(("127.0.0.1", 0), self.handler, Commands(self.handler, {}))
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1])
+
+    def tearDown(self) -> None:
+        """
+        Clean up after the test case.
+        """
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def request(self, method: str, path: str, body: Any = None) -> tuple[int, Any]:
+        """
+        Sends a request on the keep-alive connection and decodes the JSON response.
+        """
+        data = None if body is None else json.dumps(body)
+        self.client.request(method, path, body=data)
+        response = self.client.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_commands(self) -> None:
+        """
+        Test that commands are listed and run, returning their output.
+        """
+        status, body = self.request("GET", "/commands")
+        self.assertEqual(status, 200)
+        self.assertIn("start_volume", body["commands"])
+        self.assertNotIn("query", body["commands"])
+        self.assertNotIn("import", body["commands"])
+        self.assertNotIn("stats", body["commands"])
+        self.assertEqual(self.request("POST", "/commands/export", {"args": ["/tmp"]})[0], 404)
+        status, body = self.request("POST", "/commands/start_volume", {"args": [7]})
+        self.assertEqual((status, body["status"]), (200, "ok"))
+        self.assertEqual(self.count("Volumes"), 1)
+        status, body = self.request("POST", "/commands/pool", {})
+        self.assertEqual(status, 200)
+        self.assertIn("reader_leases", body["output"])
+
+    def test_command_position_per_connection(self) -> None:
+        """
+        Test that every connection adds to its own volume and chapter.
+        """
+        other = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1])
+        self.addCleanup(other.close)
+        self.request("POST", "/commands/start_volume", {"args": [1]})
+        other.request("POST", "/commands/start_volume", body=json.dumps({"args": [2]}))
+        other.getresponse().read()
+        self.assertEqual(self.request("POST", "/commands/start_chapter", {"args": [1]})[0], 200)
+        other.request("POST", "/commands/add_page", body=json.dumps({}))
+        response = other.getresponse()
+        response.read()
+        self.assertEqual(response.status, 400)
+        self.assertEqual(self.request("POST", "/commands/add_page", {})[0], 200)
+        volume = self.handler.conn.execute("SELECT VolumeNumber FROM Chapters").fetchall()
+        self.assertEqual(volume, [(1,)])
+        self.assertEqual(self.server.commands.position["volume"], None)
+
+    def test_command_unexpected_error(self) -> None:
+        """
+        Test that an unexpected exception of a command is answered with a 500 JSON body.
+        """
+        with patch.object(self.server.commands, "pool", side_effect=KeyError("readers")):
+            status, body = self.request("POST", "/commands/pool", {})
+        self.assertEqual(status, 500)
+        self.assertIn("KeyError", body["error"])
+        self.assertEqual(self.request("GET", "/health"), (200, {"status": "ok"}))
+
+    def test_in_memory_batches_release_lock(self) -> None:
+        """
+        Test that an in-memory query holds the handler's lock only while fetching a batch.
+        """
+        handler = self.create_handler(
+            in_memory=True, db=os.path.join(self.tmp_dir.name, "memory.db")
+        )
+        handler.fetch_size = 2
+        handler.executemany("INSERT INTO Volumes VALUES (?)", [(n,) for n in range(5)])
+        with QueryServer(("127.0.0.1", 0), handler, Commands(handler, {})) as server:
+            with server.read_batches("SELECT VolumeNumber FROM Volumes ORDER BY 1", []) as (
+                columns,
+                batches,
+            ):
+                self.assertEqual(columns, ["VolumeNumber"])
+                self.assertEqual(next(batches), [(0,), (1,)])
+                acquired = []
+
+                def acquire() -> None:
+                    with handler.lock:
+                        acquired.append(True)
+
+                thread = threading.Thread(target=acquire, daemon=True)
+                thread.start()
+                thread.join(timeout=5)
+                self.assertEqual(acquired, [True])
+                self.assertEqual(handler.conn.execute("PRAGMA query_only").fetchone()[0], 0)
+                self.assertEqual(list(batches), [[(2,), (3,)], [(4,)]])
+        # Closed before tearDown removes the directory the handler checkpoints to.
+        handler.close()
+
+    def test_query_streams_rows(self) -> None:
+        """
+        Test that a parameterized query is streamed in chunks on a reused connection.
+        """
+        self.handler.fetch_size = 3
+        self.handler.executemany("INSERT INTO Volumes VALUES (?)", [(n,) for n in range(10)])
+        self.client.request(
+            "POST",
+            "/query",
+            body=json.dumps(
+                {"sql": "SELECT VolumeNumber FROM Volumes WHERE VolumeNumber >= ?", "params": [4]}
+            ),
+        )
+        response = self.client.getresponse()
+        self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+        body = json.loads(response.read())
+        self.assertEqual(body["columns"], ["VolumeNumber"])
+        self.assertEqual(body["rows"], [[n] for n in range(4, 10)])
+        status, body = self.request("POST", "/query", {"sql": "SELECT 1 WHERE 0"})
+        self.assertEqual((status, body["rows"]), (200, []))
+        self.assertEqual(self.handler.pool.stats()["readers_open"], 1)
+
+    def test_query_error_while_streaming(self) -> None:
+        """
+        Test that an error after the first chunk closes the connection without writing
+        a second status line into the body.
+        """
+        self.handler.fetch_size = 2
+        body = json.dumps(
+            {
+                "sql": "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n "
+                "WHERE x < 10) SELECT CASE WHEN x < 5 THEN x "
+                "ELSE abs(-9223372036854775807 - 1) END FROM n"
+            }
+        ).encode("utf-8")
+        address = ("127.0.0.1", self.server.server_address[1])
+        with socket.create_connection(address, timeout=5) as sock:
+            sock.sendall(
+                b"POST /query HTTP/1.1\r\nHost: localhost\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode("ascii")
+                + body
+            )
+            data = b""
+            while chunk := sock.recv(65536):
+                data += chunk
+        self.assertTrue(data.startswith(b"HTTP/1.1 200"))
+        self.assertEqual(data.count(b"HTTP/1.1"), 1)
+        self.assertIn(b"[1], [2]", data)
+        self.assertFalse(data.endswith(b"0\r\n\r\n"))
+        self.assertEqual(self.request("GET", "/health"), (200, {"status": "ok"}))
+
+    def test_query_is_read_only(self) -> None:
+        """
+        Test that writes are rejected by the query endpoint.
+        """
+        status, body = self.request("POST", "/query", {"sql": "INSERT INTO Volumes VALUES (1)"})
+        self.assertEqual(status, 400)
+        self.assertIn("error", body)
+        self.assertEqual(self.count("Volumes"), 0)
+
+    def test_errors(self) -> None:
+        """
+        Test the responses to unknown endpoints, unknown commands and invalid bodies.
+        """
+        self.assertEqual(self.request("GET", "/unknown")[0], 404)
+        self.assertEqual(self.request("POST", "/commands/unknown", {})[0], 404)
+        self.assertEqual(self.request("POST", "/commands/start_volume", {"args": [1, 2]})[0], 400)
+        self.client.request("POST", "/query", body="not json")
+        response = self.client.getresponse()
+        response.read()
+        self.assertEqual(response.status, 400)
+        self.assertEqual(self.request("GET", "/health"), (200, {"status": "ok"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Unit tests for the template_cache module.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from datapiece.scripts.db_query_handler import DBQueryHandler
+from datapiece.scripts.template_cache import (build_template, clone_template,
+                                              get_schema_hash,
+                                              get_template_path)
+from tests.unit_tests.database import SCHEMA_PATH, DatabaseTestCase
+
+
+class TestTemplateCache(unittest.TestCase):
+    """
+    Test case for the template_cache module.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with a temporary directory and a schema file.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()  # pylint: disable=R1732
+        self.schema_path = os.path.join(self.tmp_dir.name, "schema.sql")
+        self._write_schema("CREATE TABLE A (x INT);")
+
+    def tearDown(self) -> None:
+        """
+        Clean up after the test case.
+        """
+        self.tmp_dir.cleanup()
+
+    def _write_schema(self, content: str) -> None:
+        """
+        Helper method writing the schema file.
+        """
+        with open(self.schema_path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def test_get_schema_hash(self) -> None:
+        """
+        Test that the hash changes with the content of the schema files.
+        """
+        first = get_schema_hash([self.schema_path, ""])
+        self.assertEqual(first, get_schema_hash([self.schema_path, ""]))
+        self._write_schema("CREATE TABLE B (x INT);")
+        self.assertNotEqual(first, get_schema_hash([self.schema_path, ""]))
+
+    def test_build_and_clone_template(self) -> None:
+        """
+        Test that a built template is cloned and that older templates are removed.
+        """
+        template_dir = os.path.join(self.tmp_dir.name, "templates")
+        old_path = get_template_path(template_dir, [self.schema_path])
+        build_template(old_path, ["CREATE TABLE A (x INT)"])
+        self._write_schema("CREATE TABLE B (x INT);")
+        new_path = get_template_path(template_dir, [self.schema_path])
+        build_template(new_path, ["CREATE TABLE B (x INT)"])
+
+        self.assertEqual(os.listdir(template_dir), [os.path.basename(new_path)])
+
+        db_path = os.path.join(self.tmp_dir.name, "db", "clone.db")
+        clone_template(new_path, db_path)
+        with sqlite3.connect(db_path) as conn:
+            tables = conn.execute("SELECT name FROM sqlite_master").fetchall()
+        conn.close()
+        self.assertEqual(tables, [("B",)])
+
+
+class TestTemplateHandler(DatabaseTestCase):
+    """
+    Test case for the creation of databases from templates.
+    """
+
+    def test_handler_clones_template(self) -> None:
+        """
+        Test that the schema is replayed only once for several fresh databases.
+        """
+        template_dir = os.path.join(self.tmp_dir.name, "templates")
+        self.handler.close()
+        os.remove(self.db_path)
+        with patch(
+            "datapiece.scripts.db_query_handler.build_template", wraps=build_template
+        ) as mock_build:
+            for _ in range(2):
+                self.handler = self.create_handler(template_dir=template_dir, mode="test")
+                self.handler.execute("INSERT INTO Volumes VALUES (1)")
+                self.handler.close()
+        mock_build.assert_called_once()
+        self.handler = self.create_handler(template_dir=template_dir)
+        self.assertEqual(self.count("Volumes"), 1)
+        self.assertEqual(self.count("CharacterChapterAppearances"), 0)
+
+    def test_handler_keeps_existing_database(self) -> None:
+        """
+        Test that opening an existing database does not replay the schema.
+        """
+        self.handler.execute("INSERT INTO Volumes VALUES (1)")
+        self.handler.close()
+        self.handler = self.create_handler()
+        self.assertEqual(self.count("Volumes"), 1)
+
+    def test_memory_database_ignores_template(self) -> None:
+        """
+        Test that a :memory: database gets the schema without a template file
+        named after it.
+        """
+        template_dir = os.path.join(self.tmp_dir.name, "templates")
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        try:
+            handler = DBQueryHandler(
+                {"schema": SCHEMA_PATH, "db": ":memory:", "template_dir": template_dir}
+            )
+            handler.execute("INSERT INTO Volumes VALUES (1)")
+            self.assertEqual(
+                handler.conn.execute("SELECT COUNT(*) FROM Volumes").fetchone()[0], 1
+            )
+            handler.close()
+        finally:
+            os.chdir(cwd)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir.name, ":memory:")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Unit tests for the panel ordinals and the character timeline.
+"""
+
+import unittest
+
+from datapiece.scripts.timeline import (defer_timeline, get_chapter_end,
+                                        get_history, get_ordinal, get_snapshot,
+                                        is_timeline_deferred, rebuild_timeline,
+                                        split_ordinal)
+from tests.unit_tests.database import DatabaseTestCase
+
+EVENT_INSERT = (
+    "INSERT INTO CharacterEvents (EventID, AppearanceID, PanelID, Bounty, Status) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+class TestOrdinals(unittest.TestCase):
+    """
+    Test case for the ordinal helpers.
+    """
+
+    def test_ordinals(self) -> None:
+        """
+        Test that the ordinals follow the reading order and are split back.
+        """
+        self.assertLess(get_ordinal(1, 65535, 65535), get_ordinal(2))
+        self.assertLess(get_ordinal(2, 1, 9), get_ordinal(2, 2, 1))
+        self.assertEqual(split_ordinal(get_ordinal(900, 12, 3)), (900, 12, 3))
+        self.assertEqual(split_ordinal(get_chapter_end(5)), (5, 65535, 65535))
+
+
+class TestTimeline(DatabaseTestCase):
+    """
+    Test case for the timeline kept by the triggers of the schema.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case with the hierarchy and the events of one character.
+        """
+        super().setUp()
+        self.insert_hierarchy()
+        self.handler.executemany(
+            "INSERT INTO CharacterAppearances VALUES (?, 7, ?)", [(1, 1), (2, 3), (3, 4)]
+        )
+        self.handler.executemany(
+            EVENT_INSERT,
+            [(1, 1, 1, 100, "Alive"), (2, 2, 3, 0, "Unknown"), (3, 3, 4, 300, "Unknown")],
+        )
+
+    def get_ordinals(self) -> dict:
+        """
+        Returns the ordinal of every panel.
+        """
+        return dict(self.handler.conn.execute("SELECT PanelID, Ordinal FROM PanelOrdinals"))
+
+    def get_timeline(self) -> list:
+        """
+        Returns every timeline entry.
+        """
+        return self.handler.conn.execute("SELECT * FROM CharacterTimeline").fetchall()
+
+    def test_snapshot(self) -> None:
+        """
+        Test that every attribute holds its last known value as of a chapter.
+        """
+        self.assertEqual(
+            get_snapshot(self.handler, 7, 1),
+            {
+                "Bounty": (100, get_ordinal(1, 1, 1), 1),
+                "Status": ("Alive", get_ordinal(1, 1, 1), 1),
+            },
+        )
+        snapshot = get_snapshot(self.handler, 7)
+        self.assertEqual(snapshot["Bounty"], (300, get_ordinal(2, 1, 2), 3))
+        self.assertEqual(snapshot["Status"][0], "Alive")
+        self.assertEqual(get_snapshot(self.handler, 7, 0), {})
+
+    def test_history(self) -> None:
+        """
+        Test that the known values within chapters are returned in reading order.
+        """
+        self.assertEqual(
+            get_history(self.handler, 7, 1, 2, "Bounty"),
+            [(get_ordinal(1, 1, 1), 1, "Bounty", 100), (get_ordinal(2, 1, 2), 3, "Bounty", 300)],
+        )
+        self.assertEqual(len(get_history(self.handler, 7, 2, 2)), 1)
+        with self.assertRaises(ValueError):
+            get_history(self.handler, 7, 1, 2, "Height")
+
+    def test_insert_mid_chapter(self) -> None:
+        """
+        Test that a page inserted between two pages only adds the ordinals of its panels.
+        """
+        self.handler.execute("UPDATE Pages SET PageNumber = 3 WHERE PageID = 2")
+        before = self.get_ordinals()
+        self.handler.execute("INSERT INTO Pages (PageID, ChapterID, PageNumber) VALUES (3, 2, 2)")
+        self.handler.execute("INSERT INTO Panels (PanelID, PageID, PanelNumber) VALUES (5, 3, 1)")
+        self.handler.execute("INSERT INTO CharacterAppearances VALUES (4, 7, 5)")
+        self.handler.execute(EVENT_INSERT, (4, 4, 5, 200, "Unknown"))
+        self.assertEqual(self.get_ordinals(), {**before, 5: get_ordinal(2, 2, 1)})
+        self.assertEqual(
+            [value for _, _, _, value in get_history(self.handler, 7, 1, 2, "Bounty")],
+            [100, 200, 300],
+        )
+
+    def test_event_before_appearance(self) -> None:
+        """
+        Test that an event inserted before its appearance and its panel enters the timeline
+        once both are inserted.
+        """
+        self.handler.execute(EVENT_INSERT, (4, 4, 5, 200, "Unknown"))
+        self.handler.execute("INSERT INTO Panels (PanelID, PageID, PanelNumber) VALUES (5, 2, 3)")
+        self.assertEqual(len(get_history(self.handler, 7, 1, 2, "Bounty")), 2)
+        self.handler.execute("INSERT INTO CharacterAppearances VALUES (4, 7, 5)")
+        self.assertEqual(
+            [value for _, _, _, value in get_history(self.handler, 7, 1, 2, "Bounty")],
+            [100, 300, 200],
+        )
+        timeline = self.get_timeline()
+        rebuild_timeline(self.handler)
+        self.assertEqual(self.get_timeline(), timeline)
+
+    def test_renumbering_and_deletes(self) -> None:
+        """
+        Test that the timeline follows renumbered chapters, moved appearances and deletes.
+        """
+        self.handler.execute("UPDATE Chapters SET ChapterNumber = 10 WHERE ChapterID = 1")
+        self.assertEqual(get_snapshot(self.handler, 7, 2)["Bounty"][0], 300)
+        self.assertEqual(get_snapshot(self.handler, 7, 10)["Bounty"][0], 100)
+        self.handler.execute(
+            "UPDATE CharacterAppearances SET CharacterID = 8 WHERE AppearanceID = 3"
+        )
+        self.assertEqual(get_snapshot(self.handler, 8)["Bounty"][0], 300)
+        self.assertNotIn("Bounty", get_snapshot(self.handler, 7, 2))
+        self.handler.execute("DELETE FROM CharacterEvents WHERE EventID = 1")
+        self.assertEqual(get_snapshot(self.handler, 7), {})
+        self.handler.execute("DELETE FROM Panels WHERE PanelID = 4")
+        self.assertEqual(self.get_timeline(), [])
+
+    def test_rebuild_timeline(self) -> None:
+        """
+        Test that a rebuild recomputes the same ordinals and entries.
+        """
+        ordinals, timeline = self.get_ordinals(), self.get_timeline()
+        self.handler.execute("DELETE FROM CharacterTimeline")
+        rebuild_timeline(self.handler)
+        self.assertEqual(self.get_ordinals(), ordinals)
+        self.assertEqual(self.get_timeline(), timeline)
+
+    def test_deferred_timeline(self) -> None:
+        """
+        Test that the deferred triggers leave both tables untouched until a rebuild,
+        which gives the same tables as the triggers.
+        """
+        self.handler.execute("UPDATE Chapters SET ChapterNumber = 3 WHERE ChapterID = 1")
+        self.handler.execute(EVENT_INSERT, (4, 2, 3, 400, "Alive"))
+        ordinals, timeline = self.get_ordinals(), self.get_timeline()
+        self.handler.execute("UPDATE Chapters SET ChapterNumber = 1 WHERE ChapterID = 1")
+        self.handler.execute("DELETE FROM CharacterEvents WHERE EventID = 4")
+        defer_timeline(self.handler)
+        self.assertTrue(is_timeline_deferred(self.handler))
+        self.handler.execute("UPDATE Chapters SET ChapterNumber = 3 WHERE ChapterID = 1")
+        self.handler.execute(EVENT_INSERT, (4, 2, 3, 400, "Alive"))
+        self.assertNotEqual(self.get_ordinals(), ordinals)
+        self.assertNotEqual(self.get_timeline(), timeline)
+        rebuild_timeline(self.handler)
+        self.assertFalse(is_timeline_deferred(self.handler))
+        self.assertEqual(self.get_ordinals(), ordinals)
+        self.assertEqual(self.get_timeline(), timeline)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Unit tests for the WriteBatch class.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from datapiece.scripts.write_batch import WriteBatch
+
+
+class TestWriteBatch(unittest.TestCase):
+    """
+    Test case for the WriteBatch class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Set up the test case.
+        """
+        self.batch = WriteBatch(max_rows=3, max_seconds=10.0)
+
+    def test_start_stop(self) -> None:
+        """
+        Test the start and stop methods.
+        """
+        self.assertFalse(self.batch.active)
+        self.batch.start()
+        self.assertTrue(self.batch.active)
+        self.batch.stop()
+        self.assertFalse(self.batch.active)
+
+    def test_add_groups_consecutive_queries(self) -> None:
+        """
+        Test that consecutive statements with the same SQL share a group.
+        """
+        self.batch.start()
+        self.batch.add("INSERT A", (1,))
+        self.batch.add("INSERT A", (2,))
+        self.batch.add("INSERT B", (3,))
+        self.assertEqual(
+            self.batch.groups, [("INSERT A", [(1,), (2,)]), ("INSERT B", [(3,)])]
+        )
+
+    def test_add_many(self) -> None:
+        """
+        Test that add_many extends the last group and reports a full batch.
+        """
+        self.batch.start()
+        self.batch.add("INSERT A", (1,))
+        self.assertTrue(self.batch.add_many("INSERT A", [(2,), (3,)]))
+        self.assertEqual(self.batch.groups, [("INSERT A", [(1,), (2,), (3,)])])
+        self.assertEqual(self.batch.rows, 3)
+
+    def test_add_many_without_rows(self) -> None:
+        """
+        Test that add_many without rows adds no empty group.
+        """
+        self.batch.start()
+        self.assertFalse(self.batch.add_many("INSERT A", []))
+        self.assertEqual((self.batch.groups, self.batch.rows), ([], 0))
+
+    def test_add_row_threshold(self) -> None:
+        """
+        Test that add reports a full batch once max_rows is reached.
+        """
+        self.batch.start()
+        self.assertFalse(self.batch.add("INSERT A", (1,)))
+        self.assertFalse(self.batch.add("INSERT A", (2,)))
+        self.assertTrue(self.batch.add("INSERT A", (3,)))
+
+    @patch("datapiece.scripts.write_batch.time.monotonic")
+    def test_add_time_threshold(self, mock_monotonic) -> None:
+        """
+        Test that add reports a full batch once max_seconds have passed.
+        """
+        mock_monotonic.return_value = 100.0
+        self.batch.start()
+        mock_monotonic.return_value = 111.0
+        self.assertTrue(self.batch.add("INSERT A", (1,)))
+
+    def test_drain(self) -> None:
+        """
+        Test that drain returns the buffered groups and empties the buffer.
+        """
+        self.batch.start()
+        self.batch.add("INSERT A", (1,))
+        groups, rows = self.batch.drain()
+        self.assertEqual(groups, [("INSERT A", [(1,)])])
+        self.assertEqual(rows, 1)
+        self.assertEqual(self.batch.drain(), ([], 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
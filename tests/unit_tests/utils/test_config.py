@@ -5,7 +5,8 @@ Unit tests for the config util.
 import unittest
 from unittest.mock import mock_open, patch
 
-from datapiece.scripts.utils.config import (get_key_dict, get_key_list,
+from datapiece.scripts.utils.config import (get_key_dict, get_key_float,
+                                            get_key_int, get_key_list,
                                             get_key_str, load_config)
 
 
@@ -22,6 +23,8 @@ class TestConfig(unittest.TestCase):
             "dict": {"key": "value1"},
             "str": "value2",
             "list": ["value3", "value4"],
+            "int": 5,
+            "float": 0.5,
         }
 
     @patch("builtins.open", new_callable=mock_open, read_data='{"key": "value"}')
@@ -54,6 +57,20 @@ class TestConfig(unittest.TestCase):
         result = get_key_list(self.sample_dict, "list")
         self.assertEqual(result, ["value3", "value4"])
 
+    def test_get_key_int(self):
+        """
+        Test the get_key_int method.
+        """
+        self.assertEqual(get_key_int(self.sample_dict, "int"), 5)
+        self.assertEqual(get_key_int(self.sample_dict, "missing", 7), 7)
+
+    def test_get_key_float(self):
+        """
+        Test the get_key_float method.
+        """
+        self.assertEqual(get_key_float(self.sample_dict, "float"), 0.5)
+        self.assertEqual(get_key_float(self.sample_dict, "missing", 1.5), 1.5)
+
 
 if __name__ == "__main__":
     unittest.main()
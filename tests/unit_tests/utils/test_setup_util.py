@@ -6,7 +6,8 @@ import unittest
 from unittest.mock import patch
 
 from datapiece.scripts.db_query_handler import DBQueryHandler
-from datapiece.scripts.utils.setup import create_console, create_handler
+from datapiece.scripts.utils.setup import (create_console, create_handler,
+                                           create_server)
 
 
 class TestSetupUtil(unittest.TestCase):
@@ -45,6 +46,23 @@ class TestSetupUtil(unittest.TestCase):
         self.assertEqual(console, mock_console.return_value)
         mock_get_key_dict.assert_called_once_with(self.config_console, "console")
 
+    @patch("datapiece.scripts.utils.setup.Commands")
+    @patch("datapiece.scripts.utils.setup.QueryServer")
+    def test_create_server(self, mock_server, mock_commands) -> None:
+        """
+        Test the create_server method with configured and overridden addresses.
+        """
+        handler = DBQueryHandler(self.config_handler)
+        config = {"server": {"host": "0.0.0.0", "port": 9000, "commands": {"exclude_list": []}}}
+        server = create_server(handler, config)
+        self.assertEqual(server, mock_server.return_value)
+        mock_commands.assert_called_once_with(handler, {"exclude_list": []})
+        mock_server.assert_called_once_with(
+            ("0.0.0.0", 9000), handler, mock_commands.return_value
+        )
+        create_server(handler, config, "localhost", 0)
+        self.assertEqual(mock_server.call_args[0][0], ("localhost", 0))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,48 @@
+"""
+Unit tests for the sql util.
+"""
+
+import unittest
+
+from datapiece.scripts.utils.sql import format_query_plan, split_sql_statements
+
+
+class TestSql(unittest.TestCase):
+    """
+    Test case for the sql util.
+    """
+
+    def test_split_sql_statements(self) -> None:
+        """
+        Test split_sql_statements with plain statements.
+        """
+        self.assertEqual(split_sql_statements("command1;command2"), ["command1", "command2"])
+        self.assertEqual(split_sql_statements("  a;\n\n b;\n"), ["a", "b"])
+        self.assertEqual(split_sql_statements(""), [])
+
+    def test_split_sql_statements_trigger(self) -> None:
+        """
+        Test that split_sql_statements keeps trigger bodies and literals whole.
+        """
+        trigger = (
+            "CREATE TRIGGER t AFTER INSERT ON A\n"
+            "BEGIN\n    INSERT INTO B VALUES (1);\n    DELETE FROM C;\nEND"
+        )
+        script = f"CREATE TABLE A (x);\n{trigger};\nINSERT INTO A VALUES (';');"
+        self.assertEqual(
+            split_sql_statements(script),
+            ["CREATE TABLE A (x)", trigger, "INSERT INTO A VALUES (';')"],
+        )
+
+    def test_format_query_plan(self) -> None:
+        """
+        Test the format_query_plan function.
+        """
+        rows = [(3, 0, 0, "SCAN Panels"), (5, 0, 0, "SEARCH Pages"), (7, 5, 0, "USE")]
+        self.assertEqual(
+            format_query_plan(rows), ["SCAN Panels", "SEARCH Pages", "  USE"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()